@@ -0,0 +1,59 @@
+"""add per-company dial queue
+
+Revision ID: 0011_company_dial_queue
+Revises: 0010_call_result_direction
+Create Date: 2026-10-02 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_company_dial_queue"
+down_revision = "0010_call_result_direction"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_dial_queue",
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("number_id", sa.Integer(), sa.ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("eligible_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_company_dial_queue_company_eligible",
+        "company_dial_queue",
+        ["company_id", "eligible_at", "number_id"],
+        unique=False,
+    )
+    op.create_index("ix_company_dial_queue_number_id", "company_dial_queue", ["number_id"], unique=False)
+
+    # Backfill: every (company, number) pair without a call result for that company.
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO company_dial_queue (company_id, number_id, eligible_at)
+            SELECT c.id,
+                   n.id,
+                   COALESCE(n.last_called_at + make_interval(days => :cooldown_days), TIMESTAMPTZ '1970-01-01 00:00:00+00')
+            FROM companies c
+            CROSS JOIN numbers n
+            WHERE NOT EXISTS (
+                SELECT 1 FROM call_results cr
+                WHERE cr.phone_number_id = n.id AND cr.company_id = c.id
+            )
+            ON CONFLICT (company_id, number_id) DO NOTHING
+            """
+        ).bindparams(cooldown_days=get_settings().call_cooldown_days)
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_company_dial_queue_number_id", table_name="company_dial_queue")
+    op.drop_index("ix_company_dial_queue_company_eligible", table_name="company_dial_queue")
+    op.drop_table("company_dial_queue")
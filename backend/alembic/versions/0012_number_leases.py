@@ -0,0 +1,68 @@
+"""move batch assignment off numbers into number_leases
+
+Revision ID: 0012_number_leases
+Revises: 0011_company_dial_queue
+Create Date: 2026-10-03 09:30:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_number_leases"
+down_revision = "0011_company_dial_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "number_leases",
+        sa.Column("number_id", sa.Integer(), sa.ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("batch_id", sa.String(length=64), nullable=False),
+        sa.Column("leased_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_number_leases_expires_at", "number_leases", ["expires_at"], unique=False)
+
+    # Carry over in-flight assignments; the owning company comes from the batch trace.
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO number_leases (number_id, company_id, batch_id, leased_at, expires_at)
+            SELECT DISTINCT ON (n.id)
+                   n.id,
+                   bi.company_id,
+                   n.assigned_batch_id,
+                   n.assigned_at,
+                   n.assigned_at + make_interval(mins => :timeout_minutes)
+            FROM numbers n
+            JOIN dialer_batch_items bi
+              ON bi.batch_id = n.assigned_batch_id AND bi.phone_number_id = n.id
+            WHERE n.assigned_at IS NOT NULL AND n.assigned_batch_id IS NOT NULL
+            ORDER BY n.id, bi.id DESC
+            """
+        ).bindparams(timeout_minutes=get_settings().assignment_timeout_minutes)
+    )
+
+    op.drop_column("numbers", "assigned_batch_id")
+    op.drop_column("numbers", "assigned_at")
+
+
+def downgrade() -> None:
+    op.add_column("numbers", sa.Column("assigned_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("numbers", sa.Column("assigned_batch_id", sa.String(length=64), nullable=True))
+    op.execute(
+        """
+        UPDATE numbers n
+        SET assigned_at = l.leased_at, assigned_batch_id = l.batch_id
+        FROM number_leases l
+        WHERE l.number_id = n.id
+        """
+    )
+    op.drop_index("ix_number_leases_expires_at", table_name="number_leases")
+    op.drop_table("number_leases")
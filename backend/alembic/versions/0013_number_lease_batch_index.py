@@ -0,0 +1,24 @@
+"""index number_leases by batch for heartbeat/release
+
+Revision ID: 0013_number_lease_batch_index
+Revises: 0012_number_leases
+Create Date: 2026-10-03 15:10:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_number_lease_batch_index"
+down_revision = "0012_number_leases"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_number_leases_batch_id", "number_leases", ["batch_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_number_leases_batch_id", table_name="number_leases")
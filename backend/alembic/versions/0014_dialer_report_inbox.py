@@ -0,0 +1,44 @@
+"""add dialer report inbox for async ingestion
+
+Revision ID: 0014_dialer_report_inbox
+Revises: 0013_number_lease_batch_index
+Create Date: 2026-10-05 11:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0014_dialer_report_inbox"
+down_revision = "0013_number_lease_batch_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dialer_report_inbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("company", sa.String(length=64), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("received_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+    op.create_index(
+        "ix_dialer_report_inbox_pending",
+        "dialer_report_inbox",
+        ["company", "id"],
+        unique=False,
+        postgresql_where=sa.text("processed_at IS NULL"),
+    )
+    op.create_index("ix_dialer_report_inbox_processed_at", "dialer_report_inbox", ["processed_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_dialer_report_inbox_processed_at", table_name="dialer_report_inbox")
+    op.drop_index("ix_dialer_report_inbox_pending", table_name="dialer_report_inbox")
+    op.drop_table("dialer_report_inbox")
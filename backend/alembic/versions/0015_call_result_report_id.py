@@ -0,0 +1,32 @@
+"""add idempotency key to call results
+
+Revision ID: 0015_call_result_report_id
+Revises: 0014_dialer_report_inbox
+Create Date: 2026-10-06 10:05:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0015_call_result_report_id"
+down_revision = "0014_dialer_report_inbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("call_results", sa.Column("report_id", sa.String(length=64), nullable=True))
+    op.create_index(
+        "ux_call_results_company_report_id",
+        "call_results",
+        ["company_id", "report_id"],
+        unique=True,
+        postgresql_where=sa.text("report_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ux_call_results_company_report_id", table_name="call_results")
+    op.drop_column("call_results", "report_id")
@@ -0,0 +1,42 @@
+"""add wallet charge ledger
+
+Revision ID: 0016_wallet_charges
+Revises: 0015_call_result_report_id
+Create Date: 2026-10-08 09:20:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0016_wallet_charges"
+down_revision = "0015_call_result_report_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_charges",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id"), nullable=False),
+        sa.Column("call_result_id", sa.Integer(), nullable=True),
+        sa.Column("scenario_id", sa.Integer(), nullable=True),
+        sa.Column("amount_toman", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("settled_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_wallet_charges_company_created", "wallet_charges", ["company_id", "created_at"])
+    op.create_index(
+        "ix_wallet_charges_pending",
+        "wallet_charges",
+        ["company_id", "id"],
+        postgresql_where=sa.text("settled_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wallet_charges_pending", table_name="wallet_charges")
+    op.drop_index("ix_wallet_charges_company_created", table_name="wallet_charges")
+    op.drop_table("wallet_charges")
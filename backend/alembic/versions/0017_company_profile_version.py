@@ -0,0 +1,27 @@
+"""add dialer profile version to companies
+
+Revision ID: 0017_company_profile_version
+Revises: 0016_wallet_charges
+Create Date: 2026-10-09 14:40:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0017_company_profile_version"
+down_revision = "0016_wallet_charges"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "companies",
+        sa.Column("profile_version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("companies", "profile_version")
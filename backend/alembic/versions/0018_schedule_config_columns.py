@@ -0,0 +1,42 @@
+"""move schedule_configs billing columns out of runtime checks
+
+Revision ID: 0018_schedule_config_columns
+Revises: 0017_company_profile_version
+Create Date: 2026-10-16 09:30:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0018_schedule_config_columns"
+down_revision = "0017_company_profile_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # These used to be added by ensure_config on first use; existing deployments may already have them.
+    op.execute("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS disabled_by_dialer BOOLEAN DEFAULT FALSE")
+    op.execute("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS wallet_balance INTEGER DEFAULT 0")
+    op.execute("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS cost_per_connected INTEGER DEFAULT 150")
+    op.execute("ALTER TABLE schedule_configs ALTER COLUMN enabled SET DEFAULT TRUE")
+    op.execute(
+        """
+        UPDATE schedule_configs
+        SET enabled = COALESCE(enabled, TRUE),
+            disabled_by_dialer = COALESCE(disabled_by_dialer, FALSE),
+            wallet_balance = COALESCE(wallet_balance, 0),
+            cost_per_connected = COALESCE(cost_per_connected, 150)
+        WHERE enabled IS NULL
+           OR disabled_by_dialer IS NULL
+           OR wallet_balance IS NULL
+           OR cost_per_connected IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE schedule_configs DROP COLUMN IF EXISTS cost_per_connected")
+    op.execute("ALTER TABLE schedule_configs DROP COLUMN IF EXISTS wallet_balance")
+    op.execute("ALTER TABLE schedule_configs DROP COLUMN IF EXISTS disabled_by_dialer")
@@ -0,0 +1,26 @@
+"""add callstatus values that used to be patched in at import time
+
+Revision ID: 0019_callstatus_runtime_values
+Revises: 0018_schedule_config_columns
+Create Date: 2026-10-16 12:10:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0019_callstatus_runtime_values"
+down_revision = "0018_schedule_config_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # core/db.py added these on every import; the other runtime checks there are covered by 0002/0010.
+    op.execute("ALTER TYPE callstatus ADD VALUE IF NOT EXISTS 'HANGUP'")
+    op.execute("ALTER TYPE callstatus ADD VALUE IF NOT EXISTS 'DISCONNECTED'")
+
+
+def downgrade() -> None:
+    # Postgres cannot drop enum values.
+    pass
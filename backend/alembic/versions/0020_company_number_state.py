@@ -0,0 +1,69 @@
+"""add company_number_state (latest call per company and number)
+
+Revision ID: 0020_company_number_state
+Revises: 0019_callstatus_runtime_values
+Create Date: 2026-10-17 09:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0020_company_number_state"
+down_revision = "0019_callstatus_runtime_values"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_number_state",
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("number_id", sa.Integer(), sa.ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("latest_call_id", sa.Integer(), nullable=False),
+        sa.Column("latest_status", sa.String(length=32), nullable=True),
+        sa.Column("last_attempt_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("total_attempts", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("latest_agent_id", sa.Integer(), nullable=True),
+    )
+
+    # Backfill before indexing: one row per (company, number) with any call result.
+    op.execute(
+        """
+        INSERT INTO company_number_state
+            (company_id, number_id, latest_call_id, latest_status, last_attempt_at, total_attempts, latest_agent_id)
+        SELECT company_id, phone_number_id, id, status, attempted_at, total, agent_id
+        FROM (
+            SELECT cr.company_id, cr.phone_number_id, cr.id, cr.status, cr.attempted_at, cr.agent_id,
+                   row_number() OVER (PARTITION BY cr.company_id, cr.phone_number_id ORDER BY cr.id DESC) AS rn,
+                   count(*) OVER (PARTITION BY cr.company_id, cr.phone_number_id) AS total
+            FROM call_results cr
+            WHERE cr.company_id IS NOT NULL AND cr.phone_number_id IS NOT NULL
+        ) ranked
+        WHERE rn = 1
+        """
+    )
+
+    op.create_index(
+        "ix_company_number_state_status",
+        "company_number_state",
+        ["company_id", "latest_status", "number_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_company_number_state_agent", "company_number_state", ["company_id", "latest_agent_id"], unique=False
+    )
+    op.create_index(
+        "ix_company_number_state_last_attempt", "company_number_state", ["company_id", "last_attempt_at"], unique=False
+    )
+    op.create_index("ix_company_number_state_number_id", "company_number_state", ["number_id"], unique=False)
+    op.execute("ANALYZE company_number_state")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_company_number_state_number_id", table_name="company_number_state")
+    op.drop_index("ix_company_number_state_last_attempt", table_name="company_number_state")
+    op.drop_index("ix_company_number_state_agent", table_name="company_number_state")
+    op.drop_index("ix_company_number_state_status", table_name="company_number_state")
+    op.drop_table("company_number_state")
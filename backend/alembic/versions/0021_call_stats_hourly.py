@@ -0,0 +1,58 @@
+"""add call_stats_hourly rollup and rollup_watermarks
+
+Revision ID: 0021_call_stats_hourly
+Revises: 0020_company_number_state
+Create Date: 2026-10-17 11:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0021_call_stats_hourly"
+down_revision = "0020_company_number_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "call_stats_hourly",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), sa.ForeignKey("companies.id", ondelete="CASCADE"), nullable=True),
+        sa.Column("hour_tehran", sa.DateTime(timezone=False), nullable=True),
+        sa.Column("scenario_id", sa.Integer(), nullable=True),
+        sa.Column("outbound_line_id", sa.Integer(), nullable=True),
+        sa.Column("direction", sa.String(length=16), nullable=True),
+        sa.Column("status", sa.String(length=32), nullable=True),
+        sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX ux_call_stats_hourly_key ON call_stats_hourly (
+            coalesce(company_id, 0), hour_tehran, coalesce(scenario_id, 0),
+            coalesce(outbound_line_id, 0), coalesce(direction, ''), coalesce(status, '')
+        )
+        """
+    )
+    op.create_index("ix_call_stats_hourly_company_hour", "call_stats_hourly", ["company_id", "hour_tehran"], unique=False)
+    op.create_index("ix_call_stats_hourly_hour", "call_stats_hourly", ["hour_tehran"], unique=False)
+
+    # No backfill here: the call_stats_rollup job folds existing rows in chunks, and reads fall
+    # back to call_results above its watermark until it has caught up.
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(length=64), primary_key=True),
+        sa.Column("last_id", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("pending_id", sa.BigInteger(), nullable=True),
+        sa.Column("pending_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rollup_watermarks")
+    op.drop_index("ix_call_stats_hourly_hour", table_name="call_stats_hourly")
+    op.drop_index("ix_call_stats_hourly_company_hour", table_name="call_stats_hourly")
+    op.execute("DROP INDEX IF EXISTS ux_call_stats_hourly_key")
+    op.drop_table("call_stats_hourly")
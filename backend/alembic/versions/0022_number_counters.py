@@ -0,0 +1,131 @@
+"""add number_counters maintained by statement triggers on numbers and company_number_state
+
+Revision ID: 0022_number_counters
+Revises: 0021_call_stats_hourly
+Create Date: 2026-10-17 13:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0022_number_counters"
+down_revision = "0021_call_stats_hourly"
+branch_labels = None
+depends_on = None
+
+# Keep in sync with NumberCounter and number_counter_service.rebuild.
+SLOTS = 16
+UPSERT = "ON CONFLICT (company_id, name, slot) DO UPDATE SET count = number_counters.count + excluded.count"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "number_counters",
+        sa.Column("company_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=32), primary_key=True),
+        sa.Column("slot", sa.SmallInteger(), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    # Statement-level triggers see every writer (imports, deletes, admin edits, dialer reports,
+    # FK cascades) and add one row per changed group, in the writer's transaction.
+    op.execute(
+        f"""
+        CREATE FUNCTION number_counters_numbers() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO number_counters (company_id, name, slot, count)
+                SELECT 0, global_status::text, pg_backend_pid() % {SLOTS}, count(*)
+                FROM new_rows GROUP BY global_status ORDER BY 2
+                {UPSERT};
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO number_counters (company_id, name, slot, count)
+                SELECT 0, global_status::text, pg_backend_pid() % {SLOTS}, -count(*)
+                FROM old_rows GROUP BY global_status ORDER BY 2
+                {UPSERT};
+            ELSE
+                -- Most updates (last_called_at) leave global_status alone and write nothing.
+                INSERT INTO number_counters (company_id, name, slot, count)
+                SELECT 0, name, pg_backend_pid() % {SLOTS}, sum(delta)
+                FROM (
+                    SELECT global_status::text AS name, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT global_status::text, -1 FROM old_rows
+                ) changed
+                GROUP BY name HAVING sum(delta) <> 0 ORDER BY name
+                {UPSERT};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        f"""
+        CREATE FUNCTION number_counters_state() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO number_counters (company_id, name, slot, count)
+                SELECT company_id, 'CALLED', pg_backend_pid() % {SLOTS}, count(*)
+                FROM new_rows GROUP BY company_id ORDER BY 1
+                {UPSERT};
+            ELSE
+                INSERT INTO number_counters (company_id, name, slot, count)
+                SELECT company_id, 'CALLED', pg_backend_pid() % {SLOTS}, -count(*)
+                FROM old_rows GROUP BY company_id ORDER BY 1
+                {UPSERT};
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    # Transition tables need one trigger per event. Creating them locks out writers until this
+    # migration commits, so the backfill below counts exactly the rows the triggers did not see.
+    op.execute(
+        "CREATE TRIGGER numbers_count_insert AFTER INSERT ON numbers "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE number_counters_numbers()"
+    )
+    op.execute(
+        "CREATE TRIGGER numbers_count_update AFTER UPDATE ON numbers "
+        "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+        "FOR EACH STATEMENT EXECUTE PROCEDURE number_counters_numbers()"
+    )
+    op.execute(
+        "CREATE TRIGGER numbers_count_delete AFTER DELETE ON numbers "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE PROCEDURE number_counters_numbers()"
+    )
+    op.execute(
+        "CREATE TRIGGER company_number_state_count_insert AFTER INSERT ON company_number_state "
+        "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE PROCEDURE number_counters_state()"
+    )
+    op.execute(
+        "CREATE TRIGGER company_number_state_count_delete AFTER DELETE ON company_number_state "
+        "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE PROCEDURE number_counters_state()"
+    )
+
+    op.execute(
+        """
+        INSERT INTO number_counters (company_id, name, slot, count)
+        SELECT 0, global_status::text, 0, count(*) FROM numbers GROUP BY global_status
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO number_counters (company_id, name, slot, count)
+        SELECT company_id, 'CALLED', 0, count(*) FROM company_number_state GROUP BY company_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS company_number_state_count_delete ON company_number_state")
+    op.execute("DROP TRIGGER IF EXISTS company_number_state_count_insert ON company_number_state")
+    op.execute("DROP TRIGGER IF EXISTS numbers_count_delete ON numbers")
+    op.execute("DROP TRIGGER IF EXISTS numbers_count_update ON numbers")
+    op.execute("DROP TRIGGER IF EXISTS numbers_count_insert ON numbers")
+    op.execute("DROP FUNCTION IF EXISTS number_counters_state()")
+    op.execute("DROP FUNCTION IF EXISTS number_counters_numbers()")
+    op.drop_table("number_counters")
@@ -0,0 +1,205 @@
+"""partition call_results by Tehran month of attempted_at
+
+Revision ID: 0023_call_results_partitioned
+Revises: 0022_number_counters
+Create Date: 2026-10-17 15:00:00.000000
+
+Converts online, in three steps that are each safe to rerun after an interruption:
+1. call_results_p, a partitioned copy of call_results (same columns), gets monthly partitions
+   from the oldest call to MONTHS_AHEAD months ahead, a default partition and every index. From
+   then on a row trigger on call_results mirrors each insert, update and delete into it.
+2. Existing rows are copied by id range, CHUNK rows per committed transaction. The copy reads
+   FOR SHARE, so a concurrent update or delete waits for the chunk and is then mirrored on top.
+3. One short transaction under an ACCESS EXCLUSIVE lock (LOCK_TIMEOUT, then rerun) drops the
+   mirror, the FK from dialer_batch_items and the old table, and renames the copy into place.
+"""
+
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0023_call_results_partitioned"
+down_revision = "0022_number_counters"
+branch_labels = None
+depends_on = None
+
+CHUNK = 50000
+MONTHS_AHEAD = 3
+LOCK_TIMEOUT = "10s"
+TZ_NAME = "Asia/Tehran"
+
+# (name, columns, unique); built on call_results_p as "<name>_p" and renamed after the swap.
+# Unique indexes of a partitioned table must contain the partition key.
+INDEXES = [
+    ("ix_call_results_attempted_at", "(attempted_at)", False),
+    ("ix_call_results_phone_number_id", "(phone_number_id)", False),
+    ("ix_call_results_agent_id", "(agent_id)", False),
+    ("ix_call_results_company_attempted", "(company_id, attempted_at)", False),
+    ("ix_call_results_company_status", "(company_id, status)", False),
+    ("ix_call_results_phone_company", "(phone_number_id, company_id)", False),
+    ("ix_call_results_company_phone_id_desc", "(company_id, phone_number_id, id DESC)", False),
+    ("ix_call_results_company_status_attempted", "(company_id, status, attempted_at DESC)", False),
+    ("ix_call_results_company_agent_id_desc", "(company_id, agent_id, id DESC) WHERE agent_id IS NOT NULL", False),
+    (
+        "ix_call_results_company_agent_attempted",
+        "(company_id, agent_id, attempted_at DESC) WHERE agent_id IS NOT NULL",
+        False,
+    ),
+    ("ux_call_results_company_report_id", "(company_id, report_id, attempted_at) WHERE report_id IS NOT NULL", True),
+]
+
+FOREIGN_KEYS = [
+    ("fk_call_results_phone_number_id", "phone_number_id", "numbers", ""),
+    ("fk_call_results_company_id", "company_id", "companies", ""),
+    ("fk_call_results_scenario_id", "scenario_id", "scenarios", ""),
+    ("fk_call_results_outbound_line_id", "outbound_line_id", "outbound_lines", ""),
+    ("fk_call_results_agent_id", "agent_id", "admin_users", " ON DELETE SET NULL"),
+]
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _scalar(sql: str):
+    return op.get_bind().execute(sa.text(sql)).scalar()
+
+
+def _create_indexes(table: str, suffix: str, partitioned: bool) -> None:
+    for name, columns, unique in INDEXES:
+        if not partitioned and name == "ux_call_results_company_report_id":
+            columns = "(company_id, report_id) WHERE report_id IS NOT NULL"
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        op.execute(f"CREATE {kind} {name}{suffix} ON {table} {columns}")
+
+
+def _add_foreign_keys(table: str) -> None:
+    for name, column, target, on_delete in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) REFERENCES {target} (id){on_delete}"
+        )
+
+
+def _drop_foreign_keys_to(table: str) -> None:
+    names = op.get_bind().execute(
+        sa.text(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE contype = 'f' AND confrelid = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    ).all()
+    for owner, name in names:
+        op.execute(f'ALTER TABLE {owner} DROP CONSTRAINT "{name}"')
+
+
+def _prepare() -> None:
+    if _scalar("SELECT to_regclass('call_results_p')") is not None:
+        return
+    op.execute("CREATE TABLE call_results_p (LIKE call_results INCLUDING DEFAULTS) PARTITION BY RANGE (attempted_at)")
+    op.execute("ALTER TABLE call_results_p ADD CONSTRAINT call_results_p_pkey PRIMARY KEY (id, attempted_at)")
+
+    oldest = _scalar(
+        f"SELECT date_trunc('month', min(attempted_at) AT TIME ZONE '{TZ_NAME}')::date FROM call_results"
+    )
+    this_month = _scalar(f"SELECT date_trunc('month', now() AT TIME ZONE '{TZ_NAME}')::date")
+    month, last = min(oldest or this_month, this_month), _add_months(this_month, MONTHS_AHEAD)
+    while month <= last:
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE call_results_y{month.year}m{month.month:02d} PARTITION OF call_results_p "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00 {TZ_NAME}') TO ('{end:%Y-%m-%d} 00:00:00 {TZ_NAME}')"
+        )
+        month = end
+    op.execute("CREATE TABLE call_results_default PARTITION OF call_results_p DEFAULT")
+
+    _create_indexes("call_results_p", "_p", partitioned=True)
+    _add_foreign_keys("call_results_p")
+
+    # attempted_at is never updated, so the old row's key finds its copy.
+    op.execute(
+        """
+        CREATE FUNCTION call_results_mirror() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                DELETE FROM call_results_p WHERE id = OLD.id AND attempted_at = OLD.attempted_at;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO call_results_p VALUES (NEW.*) ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER call_results_mirror AFTER INSERT OR UPDATE OR DELETE ON call_results "
+        "FOR EACH ROW EXECUTE PROCEDURE call_results_mirror()"
+    )
+
+
+def _copy() -> None:
+    # Rows above this id were written after the mirror trigger existed.
+    low, high = op.get_bind().execute(sa.text("SELECT min(id) - 1, max(id) FROM call_results")).one()
+    while high is not None and low < high:
+        op.execute(
+            f"INSERT INTO call_results_p SELECT * FROM call_results "
+            f"WHERE id > {low} AND id <= {low + CHUNK} FOR SHARE ON CONFLICT DO NOTHING"
+        )
+        low += CHUNK
+    op.execute("ANALYZE call_results_p")
+
+
+def _swap() -> None:
+    op.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+    op.execute("LOCK TABLE call_results IN ACCESS EXCLUSIVE MODE")
+    op.execute("DROP TRIGGER call_results_mirror ON call_results")
+    op.execute("DROP FUNCTION call_results_mirror()")
+    # dialer_batch_items.report_call_result_id keeps the id without an FK, like
+    # wallet_charges.call_result_id: a partitioned table is only referenceable by (id, attempted_at).
+    _drop_foreign_keys_to("call_results")
+    sequence = _scalar("SELECT pg_get_serial_sequence('call_results', 'id')")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY call_results_p.id")
+    op.execute("DROP TABLE call_results")
+    op.execute("ALTER TABLE call_results_p RENAME TO call_results")
+    op.execute("ALTER TABLE call_results RENAME CONSTRAINT call_results_p_pkey TO call_results_pkey")
+    for name, _, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name}_p RENAME TO {name}")
+
+
+def upgrade() -> None:
+    if _scalar("SELECT relkind FROM pg_class WHERE oid = 'call_results'::regclass") == "p":
+        return
+    _prepare()
+    with op.get_context().autocommit_block():
+        _copy()
+    _swap()
+
+
+def downgrade() -> None:
+    # Offline: copies every row into a plain table in one transaction.
+    op.execute("CREATE TABLE call_results_plain (LIKE call_results INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO call_results_plain SELECT * FROM call_results")
+    op.execute("ALTER TABLE call_results_plain ADD CONSTRAINT call_results_plain_pkey PRIMARY KEY (id)")
+    _create_indexes("call_results_plain", "_plain", partitioned=False)
+    _add_foreign_keys("call_results_plain")
+    sequence = _scalar("SELECT pg_get_serial_sequence('call_results', 'id')")
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY call_results_plain.id")
+    op.execute("DROP TABLE call_results")
+    op.execute("ALTER TABLE call_results_plain RENAME TO call_results")
+    op.execute("ALTER TABLE call_results RENAME CONSTRAINT call_results_plain_pkey TO call_results_pkey")
+    for name, _, _ in INDEXES:
+        op.execute(f"ALTER INDEX {name}_plain RENAME TO {name}")
+    op.execute(
+        "UPDATE dialer_batch_items SET report_call_result_id = NULL WHERE report_call_result_id IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM call_results cr WHERE cr.id = dialer_batch_items.report_call_result_id)"
+    )
+    op.execute(
+        "ALTER TABLE dialer_batch_items ADD CONSTRAINT dialer_batch_items_report_call_result_id_fkey "
+        "FOREIGN KEY (report_call_result_id) REFERENCES call_results (id)"
+    )
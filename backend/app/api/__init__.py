@@ -10,6 +10,7 @@ from . import (
     scenarios,
     outbound_lines,
     sms_webhook,
+    settings,
 )
 
 __all__ = [
@@ -24,4 +25,5 @@ __all__ = [
     "scenarios",
     "outbound_lines",
     "sms_webhook",
+    "settings",
 ]
@@ -6,14 +6,14 @@ from ..api.deps import get_active_admin, get_company, get_company_user
 from ..schemas.user import AdminUserCreate, AdminUserUpdate, AdminUserOut
 from ..services import auth_service
 from ..models.user import AdminUser
-from ..models.company import Company
+from ..services.company_registry import CompanyEntry
 
 router = APIRouter()
 
 
 @router.get("/{company_name}/admins", response_model=list[AdminUserOut], dependencies=[Depends(get_active_admin)])
 def list_admins(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -31,7 +31,7 @@ def list_admins(
 @router.post("/{company_name}/admins", response_model=AdminUserOut, dependencies=[Depends(get_active_admin)])
 def create_admin(
     payload: AdminUserCreate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -48,7 +48,7 @@ def create_admin(
 def update_admin(
     user_id: int,
     payload: AdminUserUpdate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -73,7 +73,7 @@ def update_admin(
 @router.delete("/{company_name}/admins/{user_id}", dependencies=[Depends(get_active_admin)])
 def delete_admin(
     user_id: int,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -5,8 +5,8 @@ from ..core.db import get_db
 from ..schemas.auth import LoginRequest, Token
 from ..core.security import get_current_active_user
 from ..schemas.user import AdminUserOut, AdminSelfUpdate
-from ..services import auth_service
-from ..models.company import Company
+from ..services import auth_service, company_registry
+from ..models.user import AdminUser
 
 router = APIRouter()
 
@@ -23,12 +23,14 @@ def get_me(
     db: Session = Depends(get_db),
 ):
     """Get current user profile with company name"""
+    # The dependency yields the cached principal; the profile needs the full row.
+    user = db.get(AdminUser, current_user.id)
     # Add company_name if user has a company
-    if current_user.company_id:
-        company = db.query(Company).filter(Company.id == current_user.company_id).first()
+    if user.company_id:
+        company = company_registry.get(db, user.company_id)
         if company:
-            current_user.company_name = company.name
-    return current_user
+            user.company_name = company.name
+    return user
 
 
 @router.put("/me", response_model=AdminUserOut)
@@ -41,7 +43,7 @@ def update_me(
     updated_user = auth_service.update_self(db, current_user.id, payload)
     # Add company_name if user has a company
     if updated_user.company_id:
-        company = db.query(Company).filter(Company.id == updated_user.company_id).first()
+        company = company_registry.get(db, updated_user.company_id)
         if company:
             updated_user.company_name = company.name
     return updated_user
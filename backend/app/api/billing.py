@@ -12,7 +12,7 @@ from ..schemas.billing import (
     WalletTransactionListOut,
 )
 from ..services import schedule_service, wallet_service
-from ..models.company import Company
+from ..services.company_registry import CompanyEntry
 from ..models.user import AdminUser
 
 router = APIRouter()
@@ -27,7 +27,7 @@ def _creator_display_name(user: AdminUser | None) -> str | None:
 
 @router.get("/{company_name}/billing", response_model=BillingInfo)
 def get_billing(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -39,7 +39,7 @@ def get_billing(
 @router.put("/{company_name}/billing", response_model=BillingInfo, dependencies=[Depends(get_superuser)])
 def update_billing(
     payload: BillingUpdate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     db: Session = Depends(get_db),
 ):
     """Update company billing (superuser only)"""
@@ -56,7 +56,7 @@ def update_billing(
 @router.post("/{company_name}/billing/manual-adjust", response_model=WalletTransactionOut, dependencies=[Depends(get_superuser)])
 def manual_wallet_adjust(
     payload: WalletManualAdjustRequest,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_superuser),
     db: Session = Depends(get_db),
 ):
@@ -89,7 +89,7 @@ def manual_wallet_adjust(
 @router.post("/{company_name}/billing/topup-match", response_model=WalletTransactionOut)
 def topup_match(
     payload: WalletTopupMatchRequest,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -127,7 +127,7 @@ def topup_match(
 
 @router.get("/{company_name}/billing/transactions", response_model=WalletTransactionListOut)
 def list_wallet_transactions(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
     from_jalali: str | None = Query(default=None, pattern=r"^\d{4}/\d{2}/\d{2}$"),
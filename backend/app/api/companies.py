@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from ..core import principals
 from ..core.db import get_db
 from ..core.security import get_current_active_user
 from ..api.deps import get_superuser
@@ -8,10 +9,12 @@ from ..schemas.company import CompanyCreate, CompanyUpdate, CompanyOut, CompanyD
 from ..models.company import Company
 from ..models.user import AdminUser
 from ..models.schedule import ScheduleConfig, ScheduleWindow
+from ..models.wallet import WalletCharge
 from ..models.call_result import CallResult
 from ..models.scenario import Scenario
 from ..models.outbound_line import OutboundLine
 from ..models.phone_number import PhoneNumber
+from ..services import call_stats_service, company_registry, dial_queue_service
 
 router = APIRouter()
 
@@ -51,6 +54,9 @@ def create_company(payload: CompanyCreate, db: Session = Depends(get_db), _: Adm
         settings=payload.settings,
     )
     db.add(company)
+    db.flush()
+    dial_queue_service.populate_company(db, company.id)
+    company_registry.invalidate(db)
     db.commit()
     db.refresh(company)
     return company
@@ -80,6 +86,8 @@ def update_company(
     if payload.settings is not None:
         company.settings = payload.settings
 
+    principals.invalidate_company(db, company_id)
+    company_registry.invalidate(db)
     db.commit()
     db.refresh(company)
     return company
@@ -90,7 +98,7 @@ def delete_company(
     company_id: int,
     payload: CompanyDeleteRequest,
     db: Session = Depends(get_db),
-    current_user: AdminUser = Depends(get_superuser),
+    _: AdminUser = Depends(get_superuser),
 ):
     """Hard delete company data (superuser only), while preserving global numbers."""
     company = db.query(Company).filter(Company.id == company_id).first()
@@ -99,11 +107,8 @@ def delete_company(
     if payload.confirm_name != company.name:
         raise HTTPException(status_code=400, detail="Company name confirmation does not match")
 
-    # Safety: never delete the currently logged-in superuser.
-    if current_user.company_id == company_id:
-        current_user.company_id = None
-
     # 1) Delete company-bound call history and detach shared-number back reference.
+    call_stats_service.retract(db, call_stats_service.lock_folded(db), CallResult.company_id == company_id)
     db.query(CallResult).filter(CallResult.company_id == company_id).delete(synchronize_session=False)
     db.query(PhoneNumber).filter(PhoneNumber.last_called_company_id == company_id).update(
         {PhoneNumber.last_called_company_id: None},
@@ -119,11 +124,12 @@ def delete_company(
     if line_ids:
         db.query(OutboundLine).filter(OutboundLine.id.in_(line_ids)).delete(synchronize_session=False)
 
-    # 3) Remove company-specific schedule/billing config.
+    # 3) Remove company-specific schedule/billing config and the per-call charge ledger.
     db.query(ScheduleWindow).filter(ScheduleWindow.company_id == company_id).delete(synchronize_session=False)
     db.query(ScheduleConfig).filter(ScheduleConfig.company_id == company_id).delete(synchronize_session=False)
+    db.query(WalletCharge).filter(WalletCharge.company_id == company_id).delete(synchronize_session=False)
 
-    # 4) Delete users belonging to this company; keep superusers and detach them.
+    # 4) Delete users belonging to this company; keep superusers (including the caller) and detach them.
     db.query(AdminUser).filter(AdminUser.company_id == company_id, AdminUser.is_superuser == True).update(
         {AdminUser.company_id: None},
         synchronize_session=False,
@@ -134,5 +140,7 @@ def delete_company(
 
     # 5) Finally delete the company row itself.
     db.delete(company)
+    principals.invalidate_company(db, company_id)
+    company_registry.invalidate(db)
     db.commit()
     return {"deleted": True, "id": company_id, "name": company.name}
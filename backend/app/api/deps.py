@@ -3,10 +3,12 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from ..core.db import get_db
+from ..core.principals import Principal
 from ..core.security import get_current_active_user
 from ..core.config import get_settings
-from ..models.user import UserRole, AdminUser
-from ..models.company import Company
+from ..models.user import UserRole
+from ..services import company_registry
+from ..services.company_registry import CompanyEntry
 
 settings = get_settings()
 http_bearer = HTTPBearer(auto_error=False)
@@ -30,18 +32,15 @@ def get_dialer_auth(credentials: HTTPAuthorizationCredentials = Depends(http_bea
     return True
 
 
-def get_company(company_name: str, db: Session = Depends(get_db)) -> Company:
+def get_company(company_name: str, db: Session = Depends(get_db)) -> CompanyEntry:
     """Resolve company from path parameter or query string."""
-    company = db.query(Company).filter(Company.name == company_name, Company.is_active == True).first()
-    if not company:
-        raise HTTPException(status_code=404, detail="Company not found")
-    return company
+    return company_registry.require_active(db, company_name)
 
 
 def get_company_user(
-    current_user: AdminUser = Depends(get_current_active_user),
-    company: Company = Depends(get_company),
-) -> AdminUser:
+    current_user: Principal = Depends(get_current_active_user),
+    company: CompanyEntry = Depends(get_company),
+) -> Principal:
     """Verify user has access to the specified company."""
     if current_user.is_superuser:
         return current_user
@@ -50,7 +49,7 @@ def get_company_user(
     return current_user
 
 
-def get_company_admin(current_user: AdminUser = Depends(get_company_user)) -> AdminUser:
+def get_company_admin(current_user: Principal = Depends(get_company_user)) -> Principal:
     if current_user.is_superuser:
         return current_user
     if current_user.role != UserRole.ADMIN:
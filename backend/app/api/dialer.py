@@ -1,17 +1,27 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+import time
+
+from fastapi import APIRouter, Depends, Query, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from ..api.deps import get_dialer_auth
 from ..core.db import get_db
-from ..schemas.dialer import NextBatchResponse, DialerReport
+from ..core import events, metrics
+from ..core.config import get_settings
+from ..schemas.dialer import (
+    NextBatchResponse, SlimNextBatchResponse, DialerConfigResponse, DialerReport,
+    BatchHeartbeatRequest, BatchReleaseRequest,
+)
 from ..schemas.scenario import RegisterScenariosRequest
 from ..schemas.outbound_line import RegisterOutboundLinesRequest
-from ..services import dialer_service
+from ..services import dialer_service, dialer_profile_service, report_inbox_service
 from ..services import schedule_service
-from ..models.company import Company
+from ..services import company_registry
 from ..models.scenario import Scenario
 from ..models.outbound_line import OutboundLine
 
+settings = get_settings()
+
 router = APIRouter(dependencies=[Depends(get_dialer_auth)])
 
 
@@ -19,47 +29,151 @@ def _default_outbound_line_display_name(phone_number: str) -> str:
     return f"Line {phone_number}"
 
 
-@router.get("/next-batch", response_model=NextBatchResponse)
-def next_batch(
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison (RFC 9110 13.1.2)
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def _batch_ready(payload: dict) -> bool:
+    return bool(payload["call_allowed"] and payload["batch"] and payload["batch"]["size_returned"])
+
+
+def _recheck_after(payload: dict) -> float:
+    """Re-check no later than the moment the schedule says a window opens."""
+    if not payload["call_allowed"] and payload.get("retry_after_seconds"):
+        return min(settings.long_poll_recheck_seconds, payload["retry_after_seconds"])
+    return settings.long_poll_recheck_seconds
+
+
+# response_model is left unset so the slim model is not coerced into the full one.
+@router.get("/next-batch", response_model=None, responses={200: {"model": NextBatchResponse}})
+async def next_batch(
     company: str = Query(..., description="Company slug"),
     size: int | None = Query(default=None, ge=1),
     active_lines_count: int | None = Query(default=None, ge=0, description="Active outbound lines on this dialer server"),
+    slim: bool = Query(default=False, description="Only call_allowed, versions and the batch; lists come from /config"),
+    wait: int | None = Query(
+        default=None,
+        ge=0,
+        le=settings.long_poll_max_wait_seconds,
+        description="Long-poll: hold the request up to this many seconds until a non-empty batch is available",
+    ),
     db: Session = Depends(get_db),
 ):
     """Fetch next batch of numbers for a company"""
-    company_obj = db.query(Company).filter(Company.name == company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
 
-    payload = dialer_service.fetch_next_batch(
-        db,
-        company=company_obj,
-        size=size,
-        active_lines_count=active_lines_count,
-    )
-    return payload
+    def attempt() -> tuple[int, dict]:
+        try:
+            company_obj = company_registry.require_active(db, company)
+            payload = dialer_service.fetch_next_batch(
+                db,
+                company=company_obj,
+                size=size,
+                active_lines_count=active_lines_count,
+                slim=slim,
+            )
+            return company_obj.id, payload
+        finally:
+            # Hand the connection back to the pool; a parked request must not hold one.
+            db.close()
+
+    company_id, payload = await run_in_threadpool(attempt)
+    if wait and not _batch_ready(payload):
+        deadline = time.monotonic() + wait
+        # Subscribed before the re-check, so a change committed in between still wakes us.
+        with events.subscribe(company_id) as waiter:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                woken = await waiter.wait(min(remaining, _recheck_after(payload)))
+                metrics.inc("dialer.long_poll_wakeups" if woken else "dialer.long_poll_rechecks")
+                company_id, payload = await run_in_threadpool(attempt)
+                if _batch_ready(payload):
+                    break
+
+    if slim:
+        return SlimNextBatchResponse(**payload)
+    return NextBatchResponse(**payload)
+
+
+@router.get("/config", response_model=DialerConfigResponse)
+def dialer_config(
+    response: Response,
+    company: str = Query(..., description="Company slug"),
+    if_none_match: str | None = Header(default=None),
+    db: Session = Depends(get_db),
+):
+    """Scenarios, outbound lines and agents of a company; revalidate with If-None-Match"""
+    company_obj = company_registry.require_active(db, company)
+
+    etag = dialer_profile_service.etag(company_obj)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    profile = dialer_profile_service.get_profile(db, company_obj)
+    response.headers.update(headers)
+    return dialer_profile_service.config_payload(company_obj, profile)
 
 
 @router.post("/report-result")
-def report_result(report: DialerReport, db: Session = Depends(get_db)):
+def report_result(report: DialerReport, response: Response, db: Session = Depends(get_db)):
     """Report call result for a company"""
-    company_obj = db.query(Company).filter(Company.name == report.company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
+    if report_inbox_service.is_async():
+        inbox_ids = report_inbox_service.enqueue(db, [report])
+        response.status_code = 202
+        return {"accepted": True, "inbox_id": inbox_ids[0]}
+
+    company_obj = company_registry.require_active(db, report.company)
 
     result = dialer_service.report_result(db, report, company=company_obj)
     return result
 
 
+@router.post("/report-results")
+def report_results(reports: list[DialerReport], response: Response, db: Session = Depends(get_db)):
+    """Report many call results at once; returns one result per item, in order"""
+    if report_inbox_service.is_async():
+        inbox_ids = report_inbox_service.enqueue(db, reports)
+        response.status_code = 202
+        return [{"index": i, "accepted": True, "inbox_id": inbox_id} for i, inbox_id in enumerate(inbox_ids)]
+    return dialer_service.report_results(db, reports)
+
+
+@router.post("/batches/{batch_id}/heartbeat")
+def heartbeat_batch(batch_id: str, payload: BatchHeartbeatRequest, db: Session = Depends(get_db)):
+    """Extend the leases of numbers from this batch that are still being dialed"""
+    company_obj = company_registry.require_active(db, payload.company)
+    return dialer_service.heartbeat_batch(db, batch_id, company=company_obj)
+
+
+@router.post("/batches/{batch_id}/release")
+def release_batch(batch_id: str, payload: BatchReleaseRequest, db: Session = Depends(get_db)):
+    """Return numbers from this batch that will not be dialed"""
+    company_obj = company_registry.require_active(db, payload.company)
+    return dialer_service.release_batch(db, batch_id, company=company_obj, number_ids=payload.number_ids)
+
+
+@router.get("/metrics")
+def dialer_metrics(db: Session = Depends(get_db)):
+    """Background job and dialer path metrics of the worker process serving this request"""
+    snapshot = metrics.snapshot()
+    # Inbox lag is read from the database so it is the same on every worker.
+    snapshot["report_inbox"] = report_inbox_service.lag(db)
+    return snapshot
+
+
 @router.post("/register-scenarios")
 def register_scenarios(
     payload: RegisterScenariosRequest,
     db: Session = Depends(get_db),
 ):
     """Dialer app registers available scenarios on startup"""
-    company_obj = db.query(Company).filter(Company.name == payload.company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_obj = company_registry.require_active(db, payload.company)
     cfg = schedule_service.ensure_config(db, company_id=company_obj.id)
     default_cost = cfg.cost_per_connected or 0
 
@@ -70,6 +184,8 @@ def register_scenarios(
     created = 0
     updated = 0
     deactivated = 0
+    # Costs are not part of the response counts, but the dialer profile carries them.
+    costs_filled = False
 
     for name, item in incoming.items():
         existing = existing_by_name.get(name)
@@ -79,6 +195,7 @@ def register_scenarios(
                 updated += 1
             if existing.cost_per_connected is None:
                 existing.cost_per_connected = default_cost
+                costs_filled = True
         else:
             db.add(Scenario(
                 company_id=company_obj.id,
@@ -96,6 +213,8 @@ def register_scenarios(
             deactivated += 1
 
     # Dialer registration is authoritative for existence; panel controls active toggle afterward.
+    if created or updated or deactivated or costs_filled:
+        dialer_profile_service.bump(db, company_obj.id)
     db.commit()
     return {
         "registered": len(incoming),
@@ -111,9 +230,7 @@ def register_outbound_lines(
     db: Session = Depends(get_db),
 ):
     """Dialer app registers available outbound lines on startup."""
-    company_obj = db.query(Company).filter(Company.name == payload.company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_obj = company_registry.require_active(db, payload.company)
 
     incoming = {item.phone_number: item for item in payload.outbound_lines}
     existing_rows = db.query(OutboundLine).filter(OutboundLine.company_id == company_obj.id).all()
@@ -139,6 +256,8 @@ def register_outbound_lines(
 
     # Dialer registration updates/creates known lines only.
     # Active/inactive state is controlled from panel and must remain untouched here.
+    if created:
+        dialer_profile_service.bump(db, company_obj.id)
     db.commit()
     return {
         "registered": len(incoming),
@@ -69,12 +69,13 @@ def numbers_stats(
     start_date: str | None = Query(default=None, description="ISO date (YYYY-MM-DD)"),
     end_date: str | None = Query(default=None, description="ISO date (YYYY-MM-DD)"),
     agent_id: int | None = Query(default=None, description="Admin-only: filter numbers assigned to an agent"),
+    estimate: bool = Query(default=False, description="Allow a planner estimate for large views without search or dates"),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_user),
 ):
     start = _parse_date_param(start_date, "start_date")
     end = _parse_date_param(end_date, "end_date")
-    total = phone_service.count_numbers(
+    total, estimated = phone_service.count_numbers(
         db,
         current_user=current_user,
         company_name=company,
@@ -84,8 +85,9 @@ def numbers_stats(
         agent_id=agent_id,
         start_date=start,
         end_date=end,
+        estimate=estimate,
     )
-    return PhoneNumberStatsResponse(total=total)
+    return PhoneNumberStatsResponse(total=total, estimated=estimated)
 
 
 @router.post("/", response_model=PhoneNumberImportResponse)
@@ -5,15 +5,16 @@ from ..core.db import get_db
 from ..api.deps import get_company, get_company_admin
 from ..schemas.outbound_line import OutboundLineCreate, OutboundLineUpdate, OutboundLineOut
 from ..models.outbound_line import OutboundLine
-from ..models.company import Company
+from ..services.company_registry import CompanyEntry
 from ..models.user import AdminUser
+from ..services import dialer_profile_service
 
 router = APIRouter()
 
 
 @router.get("/{company_name}/outbound-lines", response_model=list[OutboundLineOut])
 def list_outbound_lines(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -29,7 +30,7 @@ def list_outbound_lines(
 @router.post("/{company_name}/outbound-lines", response_model=OutboundLineOut)
 def create_outbound_line(
     payload: OutboundLineCreate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -53,6 +54,7 @@ def create_outbound_line(
         is_active=payload.is_active,
     )
     db.add(line)
+    dialer_profile_service.bump(db, company.id)
     db.commit()
     db.refresh(line)
     return line
@@ -62,7 +64,7 @@ def create_outbound_line(
 def update_outbound_line(
     line_id: int,
     payload: OutboundLineUpdate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -79,6 +81,7 @@ def update_outbound_line(
     if payload.is_active is not None:
         line.is_active = payload.is_active
 
+    dialer_profile_service.bump(db, company.id)
     db.commit()
     db.refresh(line)
     return line
@@ -87,7 +90,7 @@ def update_outbound_line(
 @router.delete("/{company_name}/outbound-lines/{line_id}")
 def delete_outbound_line(
     line_id: int,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_admin),
     db: Session = Depends(get_db),
 ):
@@ -5,16 +5,16 @@ from ..core.db import get_db
 from ..api.deps import get_company, get_company_user, get_active_admin
 from ..schemas.scenario import ScenarioCreate, ScenarioUpdate, ScenarioOut
 from ..models.scenario import Scenario
-from ..models.company import Company
+from ..services.company_registry import CompanyEntry
 from ..models.user import AdminUser
-from ..services import schedule_service
+from ..services import schedule_service, dialer_profile_service
 
 router = APIRouter()
 
 
 @router.get("/{company_name}/scenarios", response_model=list[ScenarioOut])
 def list_scenarios(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -26,6 +26,7 @@ def list_scenarios(
         Scenario.cost_per_connected.is_(None),
     ).update({Scenario.cost_per_connected: default_cost}, synchronize_session=False)
     if updated:
+        dialer_profile_service.bump(db, company.id)
         db.commit()
     return (
         db.query(Scenario)
@@ -38,7 +39,7 @@ def list_scenarios(
 @router.post("/{company_name}/scenarios", response_model=ScenarioOut)
 def create_scenario(
     payload: ScenarioCreate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_active_admin),
     db: Session = Depends(get_db),
 ):
@@ -67,6 +68,7 @@ def create_scenario(
         is_active=payload.is_active,
     )
     db.add(scenario)
+    dialer_profile_service.bump(db, company.id)
     db.commit()
     db.refresh(scenario)
     return scenario
@@ -76,7 +78,7 @@ def create_scenario(
 def update_scenario(
     scenario_id: int,
     payload: ScenarioUpdate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_active_admin),
     db: Session = Depends(get_db),
 ):
@@ -98,6 +100,7 @@ def update_scenario(
     if payload.is_active is not None:
         scenario.is_active = payload.is_active
 
+    dialer_profile_service.bump(db, company.id)
     db.commit()
     db.refresh(scenario)
     return scenario
@@ -106,7 +109,7 @@ def update_scenario(
 @router.delete("/{company_name}/scenarios/{scenario_id}")
 def delete_scenario(
     scenario_id: int,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_active_admin),
     db: Session = Depends(get_db),
 ):
@@ -119,5 +122,6 @@ def delete_scenario(
         raise HTTPException(status_code=404, detail="Scenario not found")
 
     db.delete(scenario)
+    dialer_profile_service.bump(db, company.id)
     db.commit()
     return {"deleted": True, "id": scenario_id}
@@ -5,7 +5,7 @@ from ..api.deps import get_active_admin, get_company, get_company_user
 from ..core.db import get_db
 from ..services import schedule_service
 from ..schemas.schedule import ScheduleConfigOut, ScheduleConfigUpdate, ScheduleInterval
-from ..models.company import Company
+from ..services.company_registry import CompanyEntry
 from ..models.user import AdminUser
 
 router = APIRouter()
@@ -13,7 +13,7 @@ router = APIRouter()
 
 @router.get("/{company_name}/schedule", response_model=ScheduleConfigOut, dependencies=[Depends(get_active_admin)])
 def get_schedule(
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -38,7 +38,7 @@ def get_schedule(
 @router.put("/{company_name}/schedule", response_model=ScheduleConfigOut, dependencies=[Depends(get_active_admin)])
 def update_schedule(
     payload: ScheduleConfigUpdate,
-    company: Company = Depends(get_company),
+    company: CompanyEntry = Depends(get_company),
     user: AdminUser = Depends(get_company_user),
     db: Session = Depends(get_db),
 ):
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from ..api.deps import get_superuser
+from ..core import metrics
+from ..core.config import reload_settings
+from ..models.user import AdminUser
+
+router = APIRouter()
+
+
+@router.post("/reload")
+def reload(_: AdminUser = Depends(get_superuser)):
+    """Re-read .env / environment in the worker serving this request (superuser only)"""
+    changed = reload_settings()
+    metrics.inc("settings.reloads")
+    return {"changed": changed}
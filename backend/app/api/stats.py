@@ -4,8 +4,7 @@ from sqlalchemy.orm import Session
 from ..api.deps import get_active_admin, get_current_active_user
 from ..core.db import get_db
 from ..schemas.stats import NumbersSummary, AttemptTrendResponse, AttemptSummary, CostSummary
-from ..services import stats_service
-from ..models.company import Company
+from ..services import company_registry, stats_cache, stats_service
 from ..models.user import AdminUser
 
 router = APIRouter(dependencies=[Depends(get_active_admin)])
@@ -19,15 +18,15 @@ def get_numbers_summary(
 ):
     company_id = None
     if company:
-        company_obj = db.query(Company).filter(Company.name == company, Company.is_active == True).first()
-        if not company_obj:
-            raise HTTPException(status_code=404, detail="Company not found")
+        company_obj = company_registry.require_active(db, company)
         if not user.is_superuser and user.company_id != company_obj.id:
             raise HTTPException(status_code=403, detail="Access denied to this company")
         company_id = company_obj.id
     elif user.company_id:
         company_id = user.company_id
-    return stats_service.numbers_summary(db, company_id=company_id)
+    return stats_cache.get(
+        "numbers-summary", company_id, {}, lambda: stats_service.numbers_summary(db, company_id=company_id)
+    )
 
 
 @router.get("/attempt-trend", response_model=AttemptTrendResponse)
@@ -40,14 +39,17 @@ def get_attempt_trend(
 ):
     company_id = None
     if company:
-        company_obj = db.query(Company).filter(Company.name == company, Company.is_active == True).first()
-        if not company_obj:
-            raise HTTPException(status_code=404, detail="Company not found")
+        company_obj = company_registry.require_active(db, company)
         if not user.is_superuser and user.company_id != company_obj.id:
             raise HTTPException(status_code=403, detail="Access denied to this company")
         company_id = company_obj.id
 
-    return stats_service.attempt_trend(db, span=span, granularity=granularity, company_id=company_id)
+    return stats_cache.get(
+        "attempt-trend",
+        company_id,
+        {"span": span, "granularity": granularity},
+        lambda: stats_service.attempt_trend(db, span=span, granularity=granularity, company_id=company_id),
+    )
 
 
 @router.get("/attempts-summary", response_model=AttemptSummary)
@@ -56,7 +58,12 @@ def get_attempts_summary(
     hours: int | None = Query(default=None, ge=1, le=720, description="Optional: limit to last N hours (Tehran)"),
     db: Session = Depends(get_db),
 ):
-    return stats_service.attempt_summary(db, days=days, hours=hours)
+    return stats_cache.get(
+        "attempts-summary",
+        None,
+        {"days": days, "hours": hours},
+        lambda: stats_service.attempt_summary(db, days=days, hours=hours),
+    )
 
 
 @router.get("/costs", response_model=CostSummary)
@@ -66,15 +73,13 @@ def get_costs(
     db: Session = Depends(get_db)
 ):
     """Get cost summary for a company"""
-    company_obj = db.query(Company).filter(Company.name == company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_obj = company_registry.require_active(db, company)
 
     # Verify user has access to this company
     if not user.is_superuser and user.company_id != company_obj.id:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
-    return stats_service.cost_summary(db, company_obj.id)
+    return stats_cache.get("costs", company_obj.id, {}, lambda: stats_service.cost_summary(db, company_obj.id))
 
 
 @router.get("/dashboard-stats")
@@ -86,12 +91,16 @@ def get_dashboard_stats(
     db: Session = Depends(get_db),
 ):
     """Get dashboard statistics grouped by scenario or outbound line"""
-    company_obj = db.query(Company).filter(Company.name == company, Company.is_active == True).first()
-    if not company_obj:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_obj = company_registry.require_active(db, company)
 
     # Verify user has access to this company
     if not user.is_superuser and user.company_id != company_obj.id:
         raise HTTPException(status_code=403, detail="Access denied to this company")
 
-    return stats_service.dashboard_stats(db, company_obj.id, group_by, time_filter)
+    return stats_cache.get(
+        "dashboard-stats",
+        company_obj.id,
+        {"group_by": group_by, "time_filter": time_filter},
+        lambda: stats_service.dashboard_stats(db, company_obj.id, group_by, time_filter),
+        closed_day=stats_service.closed_day(time_filter),
+    )
@@ -1,6 +1,12 @@
+import logging
+import threading
+from typing import Callable
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
@@ -9,14 +15,63 @@ class Settings(BaseSettings):
     database_url: str = Field(..., alias="DATABASE_URL")
     secret_key: str = Field(..., alias="SECRET_KEY")
     access_token_expire_minutes: int = Field(1440, alias="ACCESS_TOKEN_EXPIRE_MINUTES")  # default: 1 day
+    # Resolved panel users are cached per worker by token (0 disables); changes invalidate across workers.
+    auth_cache_ttl_seconds: int = Field(60, alias="AUTH_CACHE_TTL_SECONDS")
+    auth_cache_size: int = Field(1024, alias="AUTH_CACHE_SIZE")
     algorithm: str = "HS256"
     dialer_token: str = Field(..., alias="DIALER_TOKEN")
     default_batch_size: int = Field(100, alias="DEFAULT_BATCH_SIZE")
     max_batch_size: int = Field(40, alias="MAX_BATCH_SIZE")
     timezone: str = Field("Asia/Tehran", alias="TIMEZONE")
+    # Companies are resolved from an in-process snapshot; NOTIFY reloads it on change, this bounds it otherwise.
+    company_registry_max_age_seconds: int = Field(300, alias="COMPANY_REGISTRY_MAX_AGE_SECONDS")
     skip_holidays_default: bool = Field(True, alias="SKIP_HOLIDAYS")
-    assignment_timeout_minutes: int = Field(1440, alias="ASSIGNMENT_TIMEOUT_MINUTES")
+    # Lease length for dispatched numbers; dialers extend it via /batches/{id}/heartbeat.
+    assignment_timeout_minutes: int = Field(15, alias="ASSIGNMENT_TIMEOUT_MINUTES")
     call_cooldown_days: int = Field(3, alias="CALL_COOLDOWN_DAYS")
+    # next-batch is capped by what the wallet can pay for, using the recent billable ratio
+    billable_ratio_window_hours: int = Field(24, alias="BILLABLE_RATIO_WINDOW_HOURS")
+    billable_ratio_cache_seconds: int = Field(60, alias="BILLABLE_RATIO_CACHE_SECONDS")
+    # next-batch?wait=N long-poll: upper bound for N, and how often a parked request re-checks
+    # on its own (time-based changes such as a schedule window opening send no event)
+    long_poll_max_wait_seconds: int = Field(300, alias="LONG_POLL_MAX_WAIT_SECONDS")
+    long_poll_recheck_seconds: int = Field(30, alias="LONG_POLL_RECHECK_SECONDS")
+    max_report_batch_size: int = Field(1000, alias="MAX_REPORT_BATCH_SIZE")
+    # "sync" applies reports inside the request; "async" appends them to dialer_report_inbox (202)
+    report_ingest_mode: str = Field("sync", alias="REPORT_INGEST_MODE")
+    report_inbox_workers: int = Field(2, alias="REPORT_INBOX_WORKERS")
+    report_inbox_poll_ms: int = Field(500, alias="REPORT_INBOX_POLL_MS")
+    report_inbox_batch_size: int = Field(200, alias="REPORT_INBOX_BATCH_SIZE")
+    report_inbox_max_batches_per_pass: int = Field(10, alias="REPORT_INBOX_MAX_BATCHES_PER_PASS")
+    report_inbox_max_attempts: int = Field(5, alias="REPORT_INBOX_MAX_ATTEMPTS")
+    report_inbox_retention_hours: int = Field(72, alias="REPORT_INBOX_RETENTION_HOURS")
+    # Startup compares alembic_version with the shipped migration head: "strict" refuses to
+    # start on a mismatch, "warn" logs it, "off" skips the check. Workers never run DDL.
+    schema_check: str = Field("warn", alias="SCHEMA_CHECK")
+    # Periodic jobs run inside every API process; advisory locks keep each one single-runner.
+    background_jobs_enabled: bool = Field(True, alias="BACKGROUND_JOBS_ENABLED")
+    lease_sweep_interval_seconds: int = Field(30, alias="LEASE_SWEEP_INTERVAL_SECONDS")
+    lease_sweep_chunk_size: int = Field(1000, alias="LEASE_SWEEP_CHUNK_SIZE")
+    # Billable calls append wallet_charges rows; the settler folds them into wallet_balance
+    # every WALLET_SETTLE_INTERVAL_MS, or sooner once WALLET_SETTLE_MAX_PENDING were recorded.
+    wallet_settle_interval_ms: int = Field(1000, alias="WALLET_SETTLE_INTERVAL_MS")
+    wallet_settle_max_pending: int = Field(200, alias="WALLET_SETTLE_MAX_PENDING")
+    # call_results are folded into call_stats_hourly by id range, once no transaction that could
+    # still commit an id in the range is open (see call_stats_service.fold_settled).
+    call_stats_rollup_interval_seconds: int = Field(30, alias="CALL_STATS_ROLLUP_INTERVAL_SECONDS")
+    call_stats_rollup_chunk_size: int = Field(50000, alias="CALL_STATS_ROLLUP_CHUNK_SIZE")
+    # Stats responses: live ranges for STATS_CACHE_TTL_SECONDS (0 disables the cache), finished
+    # days for STATS_CACHE_CLOSED_TTL_SECONDS unless a late report for that day is rolled up.
+    stats_cache_ttl_seconds: int = Field(15, alias="STATS_CACHE_TTL_SECONDS")
+    stats_cache_closed_ttl_seconds: int = Field(3600, alias="STATS_CACHE_CLOSED_TTL_SECONDS")
+    stats_cache_size: int = Field(1000, alias="STATS_CACHE_SIZE")
+    # /api/numbers/stats?estimate=true answers from planner statistics when they predict at
+    # least this many rows; smaller results are counted exactly.
+    numbers_count_estimate_min_rows: int = Field(50000, alias="NUMBERS_COUNT_ESTIMATE_MIN_ROWS")
+    # call_results is partitioned by Tehran month; the call_results_partitions job creates this
+    # many months ahead and, when CALL_RESULTS_RETENTION_MONTHS > 0, drops older months whole.
+    call_results_partition_months_ahead: int = Field(3, alias="CALL_RESULTS_PARTITION_MONTHS_AHEAD")
+    call_results_retention_months: int = Field(0, alias="CALL_RESULTS_RETENTION_MONTHS")
     # Legacy single-profile bank config (kept as fallback)
     bank_sms_sender: str = Field("30008528", alias="BANK_SMS_SENDER")
     manager_alert_numbers: str = Field("", alias="MANAGER_ALERT_NUMBERS")
@@ -57,5 +112,55 @@ class Settings(BaseSettings):
     )
 
 
+# Bound once at import (engine, Asia/Tehran zone); a reload logs a warning instead of applying them.
+RESTART_REQUIRED = {"database_url", "timezone"}
+
+_settings: Settings | None = None
+# Reentrant so a reload hook may call get_settings().
+_settings_lock = threading.RLock()
+_reload_hooks: list[Callable[[Settings], None]] = []
+
+
 def get_settings() -> Settings:
-    return Settings()
+    """Process-wide settings; the environment and .env are parsed once."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
+
+
+def on_reload(hook: Callable[[Settings], None]) -> Callable[[Settings], None]:
+    """Register a callback that rebuilds state derived from settings (usable as a decorator)."""
+    _reload_hooks.append(hook)
+    return hook
+
+
+def reload_settings() -> list[str]:
+    """
+    Re-read the environment and .env into the shared Settings object and run the reload hooks.
+
+    Values are copied in place, so every module-level `settings = get_settings()` sees them.
+    Returns the names of the fields that were applied.
+    """
+    with _settings_lock:
+        current = get_settings()
+        fresh = Settings()
+        changed = []
+        for name in Settings.model_fields:
+            value = getattr(fresh, name)
+            if value == getattr(current, name):
+                continue
+            if name in RESTART_REQUIRED:
+                logger.warning("Setting %s changed; restart the process to apply it", name)
+                continue
+            setattr(current, name, value)
+            changed.append(name)
+        for hook in list(_reload_hooks):
+            try:
+                hook(current)
+            except Exception:
+                logger.exception("Settings reload hook %r failed", hook)
+    logger.info("Settings reloaded; changed: %s", ", ".join(changed) or "nothing")
+    return changed
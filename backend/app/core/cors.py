@@ -0,0 +1,15 @@
+from starlette.middleware.cors import CORSMiddleware
+
+from .config import Settings, get_settings, on_reload
+
+
+class ReloadableCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware whose allowed origins follow CORS_ORIGINS across settings reloads."""
+
+    def __init__(self, app, **options):
+        self._options = options
+        super().__init__(app, allow_origins=get_settings().cors_origins, **options)
+        on_reload(self._reload)
+
+    def _reload(self, settings: Settings) -> None:
+        super().__init__(self.app, allow_origins=settings.cors_origins, **self._options)
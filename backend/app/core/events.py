@@ -0,0 +1,155 @@
+"""
+Cross-worker "something changed for this company" signal over Postgres LISTEN/NOTIFY.
+
+Writers call `notify(db, company_id)` inside their transaction (NOTIFY is delivered on
+commit). Each API process runs one listener thread that wakes the asyncio waiters parked
+by long-polling `next-batch` requests of that company.
+
+Other per-process caches use their own channel: `publish(db, channel, payload)` to send,
+`on_notify(channel, handler)` to receive. Handlers also get ALL_COMPANIES ("*") whenever the
+listener (re)connects, since notifications sent while it was down are lost.
+"""
+import asyncio
+import logging
+import select
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import metrics
+from .db import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "dialer_events"
+ALL_COMPANIES = "*"
+
+
+class Waiter:
+    def __init__(self, company_id: int):
+        self.company_id = company_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self) -> None:
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """True when woken by an event, False on timeout."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+_waiters_lock = threading.Lock()
+_waiters: dict[int, set[Waiter]] = {}
+_channel_handlers: dict[str, list[Callable[[str], None]]] = {}
+_listener: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def notify(db: Session, company_id: int | None = None) -> None:
+    """Signal a change for one company (None = every company). Delivered when the caller commits."""
+    publish(db, CHANNEL, ALL_COMPANIES if company_id is None else str(company_id))
+
+
+def publish(db: Session, channel: str, payload: str) -> None:
+    db.execute(text("SELECT pg_notify(:channel, :payload)").bindparams(channel=channel, payload=payload))
+
+
+def on_notify(channel: str, handler: Callable[[str], None]) -> None:
+    """Call `handler(payload)` on the listener thread for every notification on `channel`; register before startup."""
+    _channel_handlers.setdefault(channel, []).append(handler)
+
+
+def _handle(channel: str, payload: str) -> None:
+    if channel == CHANNEL:
+        dispatch(payload)
+        return
+    for handler in _channel_handlers.get(channel, ()):
+        try:
+            handler(payload)
+        except Exception:
+            logger.exception("Handler for %s failed", channel)
+
+
+@contextmanager
+def subscribe(company_id: int) -> Iterator[Waiter]:
+    """Register before checking state, so an event that lands in between is not missed."""
+    waiter = Waiter(company_id)
+    with _waiters_lock:
+        _waiters.setdefault(company_id, set()).add(waiter)
+    try:
+        yield waiter
+    finally:
+        with _waiters_lock:
+            waiters = _waiters.get(company_id)
+            if waiters is not None:
+                waiters.discard(waiter)
+                if not waiters:
+                    del _waiters[company_id]
+
+
+def dispatch(payload: str) -> None:
+    with _waiters_lock:
+        if payload == ALL_COMPANIES:
+            targets = [w for waiters in _waiters.values() for w in waiters]
+        else:
+            try:
+                targets = list(_waiters.get(int(payload), ()))
+            except ValueError:
+                return
+    metrics.inc("events.received")
+    for waiter in targets:
+        waiter.wake()
+
+
+def _listen_forever() -> None:
+    while not _stop.is_set():
+        raw = None
+        try:
+            raw = engine.raw_connection()
+            raw.detach()  # a long-lived LISTEN connection must not go back to the pool
+            conn = raw.driver_connection
+            conn.autocommit = True
+            cursor = conn.cursor()
+            for channel in (CHANNEL, *_channel_handlers):
+                cursor.execute(f"LISTEN {channel}")
+            for channel in _channel_handlers:
+                _handle(channel, ALL_COMPANIES)
+            while not _stop.is_set():
+                if select.select([conn], [], [], 5) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    _handle(notification.channel, notification.payload)
+        except Exception:
+            metrics.inc("events.listener_errors")
+            logger.exception("Dialer event listener failed; reconnecting")
+            _stop.wait(5)
+        finally:
+            if raw is not None:
+                try:
+                    raw.close()
+                except Exception:
+                    pass
+
+
+def start_listener() -> None:
+    global _listener
+    if engine.dialect.name != "postgresql" or (_listener and _listener.is_alive()):
+        return
+    _stop.clear()
+    _listener = threading.Thread(target=_listen_forever, name="dialer-events", daemon=True)
+    _listener.start()
+
+
+def stop_listener() -> None:
+    _stop.set()
@@ -0,0 +1,77 @@
+"""Periodic background jobs started with the API process (one daemon thread per job)."""
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[], None]
+    _stop: threading.Event = field(default_factory=threading.Event, repr=False)
+    _wake: threading.Event = field(default_factory=threading.Event, repr=False)
+    _thread: threading.Thread | None = field(default=None, repr=False)
+
+    def run_once(self) -> None:
+        try:
+            with metrics.timed(f"jobs.{self.name}.duration_seconds"):
+                self.func()
+            metrics.inc(f"jobs.{self.name}.runs")
+        except Exception:
+            metrics.inc(f"jobs.{self.name}.errors")
+            logger.exception("Background job %s failed", self.name)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            self.run_once()
+
+    def wake(self) -> None:
+        """Run the next pass now instead of waiting for the rest of the interval."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+_jobs: dict[str, PeriodicJob] = {}
+
+
+def register_job(name: str, interval_seconds: float, func: Callable[[], None]) -> PeriodicJob:
+    job = PeriodicJob(name=name, interval_seconds=interval_seconds, func=func)
+    _jobs[name] = job
+    return job
+
+
+def wake_job(name: str) -> None:
+    """Nudge a registered job (no-op when it is not registered, e.g. background jobs disabled)."""
+    job = _jobs.get(name)
+    if job is not None:
+        job.wake()
+
+
+def start_jobs() -> None:
+    for job in _jobs.values():
+        job.start()
+
+
+def stop_jobs() -> None:
+    for job in _jobs.values():
+        job.stop()
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .db import engine
+
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[Connection | None]:
+    """
+    Try to take a session-level Postgres advisory lock keyed by `name` on a dedicated connection.
+
+    Yields that connection when the lock was acquired (run the guarded work on it so the
+    lock and the work share one backend), or None when another worker/node already holds it.
+    """
+    with engine.connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}).scalar()
+        conn.commit()
+        if not acquired:
+            yield None
+            return
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), {"name": name})
+            conn.commit()
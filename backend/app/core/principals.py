@@ -0,0 +1,113 @@
+"""
+Per-process cache of authenticated panel users, keyed by bearer token.
+
+Without it every panel request decodes the JWT and loads its admin_users row. An entry lives
+at most AUTH_CACHE_TTL_SECONDS and never past the token's `exp`. User and company changes drop
+entries in every worker through the `auth_events` channel (see core/events.py).
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from . import events, metrics
+from .config import get_settings
+from ..models.user import AdminUser, UserRole
+
+settings = get_settings()
+
+CHANNEL = "auth_events"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The fields request handlers read from the current user; /me loads the full row."""
+    id: int
+    username: str
+    role: UserRole
+    company_id: int | None
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: AdminUser) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            company_id=user.company_id,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+_lock = threading.Lock()
+# token -> (expires_at epoch seconds, principal), least recently used first
+_entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+# Bumped by every invalidation so a row loaded before it is not cached after it.
+_generation = 0
+
+
+def generation() -> int:
+    return _generation
+
+
+def get(token: str) -> Principal | None:
+    if settings.auth_cache_ttl_seconds <= 0:
+        return None
+    with _lock:
+        entry = _entries.get(token)
+        if entry is not None and entry[0] <= time.time():
+            del _entries[token]
+            entry = None
+        if entry is not None:
+            _entries.move_to_end(token)
+    metrics.inc("auth_cache.hits" if entry else "auth_cache.misses")
+    return entry[1] if entry else None
+
+
+def put(token: str, principal: Principal, token_exp: float, loaded_at_generation: int) -> None:
+    if settings.auth_cache_ttl_seconds <= 0:
+        return
+    with _lock:
+        if loaded_at_generation != _generation:
+            return
+        _entries[token] = (min(time.time() + settings.auth_cache_ttl_seconds, token_exp), principal)
+        _entries.move_to_end(token)
+        while len(_entries) > settings.auth_cache_size:
+            _entries.popitem(last=False)
+
+
+def _drop(payload: str) -> None:
+    """Payload is "user:<id>", "company:<id>" or "*" (everything)."""
+    global _generation
+    kind, _, raw = payload.partition(":")
+    with _lock:
+        _generation += 1
+        if payload == events.ALL_COMPANIES or not raw.isdigit():
+            _entries.clear()
+            return
+        field = "id" if kind == "user" else "company_id"
+        target = int(raw)
+        for token in [t for t, (_, p) in _entries.items() if getattr(p, field) == target]:
+            del _entries[token]
+
+
+def invalidate_user(db: Session, user_id: int) -> None:
+    """Drop the user's entries here now and in every worker when the caller commits."""
+    _drop(f"user:{user_id}")
+    events.publish(db, CHANNEL, f"user:{user_id}")
+
+
+def invalidate_company(db: Session, company_id: int) -> None:
+    _drop(f"company:{company_id}")
+    events.publish(db, CHANNEL, f"company:{company_id}")
+
+
+def clear() -> None:
+    _drop(events.ALL_COMPANIES)
+
+
+events.on_notify(CHANNEL, _drop)
@@ -0,0 +1,82 @@
+"""
+Read-only startup check that the database is at the Alembic head this build ships.
+
+The schema is only ever changed by `alembic upgrade head`; workers never run DDL. Each process
+checks once at startup (one SELECT on alembic_version) and keeps the result for /health.
+"""
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import text
+
+from . import metrics
+from .config import get_settings
+from .db import engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SCRIPT_LOCATION = Path(__file__).resolve().parents[2] / "alembic"
+
+
+@dataclass(frozen=True)
+class SchemaStatus:
+    current: str | None
+    expected: str | None
+
+    @property
+    def ok(self) -> bool:
+        # Both None when SCHEMA_CHECK=off.
+        return self.current == self.expected
+
+
+_status: SchemaStatus | None = None
+
+
+@lru_cache(maxsize=1)
+def expected_head() -> str | None:
+    """Head revision of the migrations shipped with this code (read from the files, no DB)."""
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory(str(SCRIPT_LOCATION)).get_current_head()
+
+
+def current_revision() -> str | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        # No alembic_version table (never migrated) or the database is unreachable.
+        logger.exception("Could not read alembic_version")
+        return None
+
+
+def check_schema() -> SchemaStatus:
+    """
+    Compare alembic_version with the shipped head once per process.
+
+    SCHEMA_CHECK=strict refuses to start on a mismatch, "warn" logs it, "off" skips the query.
+    """
+    global _status
+    if _status is not None:
+        return _status
+    if settings.schema_check == "off":
+        _status = SchemaStatus(current=None, expected=None)
+        return _status
+    _status = SchemaStatus(current=current_revision(), expected=expected_head())
+    if not _status.ok:
+        metrics.inc("schema.check_mismatch")
+        message = (
+            f"Database schema is at {_status.current or 'no revision'}, expected {_status.expected}; "
+            "run `alembic upgrade head`"
+        )
+        if settings.schema_check == "strict":
+            raise RuntimeError(message)
+        logger.error(message)
+    return _status
+
+
+def status() -> SchemaStatus | None:
+    return _status
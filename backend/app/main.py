@@ -1,8 +1,21 @@
+import asyncio
+import logging
+import signal
+
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
 
-from .core.db import Base, engine
-from .core.config import get_settings
+from .core.config import get_settings, reload_settings
+from .core.cors import ReloadableCORSMiddleware
+from .core.db import SessionLocal
+from .core import events, jobs, metrics, schema_check
+from .services import (
+    call_partition_service,
+    call_stats_service,
+    company_registry,
+    dialer_service,
+    report_inbox_service,
+    wallet_charge_service,
+)
 from .api import (
     auth,
     admins,
@@ -15,17 +28,16 @@ from .api import (
     scenarios,
     outbound_lines,
     sms_webhook,
+    settings as settings_api,
 )
 
 settings = get_settings()
-
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Salehi Dialer Admin Panel - Multi-Company")
 
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
+    ReloadableCORSMiddleware,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -36,6 +48,7 @@ app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 
 # Company management routes (superuser only)
 app.include_router(companies.router, prefix="/api/companies", tags=["companies"])
+app.include_router(settings_api.router, prefix="/api/settings", tags=["settings"])
 
 # Company-scoped routes (include {company_name} in path)
 app.include_router(admins.router, prefix="/api", tags=["admins"])
@@ -51,6 +64,71 @@ app.include_router(stats.router, prefix="/api/stats", tags=["stats"])
 app.include_router(sms_webhook.router, tags=["sms-webhook"])
 
 
+@app.on_event("startup")
+def check_schema_version():
+    # Read-only: the schema is created and changed by `alembic upgrade head` only.
+    schema_check.check_schema()
+
+
+@app.on_event("startup")
+def load_company_registry():
+    # Dialer and stats requests resolve companies from this snapshot; a failed warm-up retries on first use.
+    try:
+        with SessionLocal() as db:
+            company_registry.load(db)
+    except Exception:
+        logger.warning("Could not preload the company registry", exc_info=True)
+
+
+@app.on_event("startup")
+async def install_reload_signal():
+    # `kill -HUP <worker pid>` re-reads .env / environment in that worker (same as POST /api/settings/reload).
+    def on_sighup():
+        reload_settings()
+        metrics.inc("settings.reloads")
+
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, on_sighup)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        logger.info("SIGHUP settings reload is not available on this platform")
+
+
+@app.on_event("startup")
+def start_event_listener():
+    # Wakes long-polling next-batch requests; needed whether or not this process runs jobs.
+    events.start_listener()
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    if not settings.background_jobs_enabled:
+        return
+    jobs.register_job("lease_sweeper", settings.lease_sweep_interval_seconds, dialer_service.sweep_expired_leases)
+    # Inbox workers run in both ingest modes so rows left over after switching back to sync still drain.
+    for i in range(settings.report_inbox_workers):
+        jobs.register_job(f"report_inbox_worker_{i}", settings.report_inbox_poll_ms / 1000, report_inbox_service.run_worker)
+    jobs.register_job("report_inbox_purge", 600, report_inbox_service.purge_processed)
+    jobs.register_job(
+        wallet_charge_service.SETTLER_JOB,
+        settings.wallet_settle_interval_ms / 1000,
+        wallet_charge_service.settle_pending,
+    )
+    jobs.register_job(
+        call_stats_service.ROLLUP_JOB,
+        settings.call_stats_rollup_interval_seconds,
+        call_stats_service.roll_up,
+    )
+    jobs.register_job(call_partition_service.PARTITION_JOB, 3600, call_partition_service.maintain)
+    jobs.start_jobs()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    jobs.stop_jobs()
+    events.stop_listener()
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    schema = schema_check.status()
+    return {"status": "ok", "schema_ok": schema.ok if schema else None}
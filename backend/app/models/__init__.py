@@ -7,7 +7,13 @@ from .dialer_batch_item import DialerBatchItem
 from .company import Company
 from .scenario import Scenario
 from .outbound_line import OutboundLine
-from .wallet import WalletTransaction, BankIncomingSms
+from .wallet import WalletTransaction, BankIncomingSms, WalletCharge
+from .dial_queue import CompanyDialQueue
+from .company_number_state import CompanyNumberState
+from .call_stats import CallStatsHourly, RollupWatermark
+from .number_counter import NumberCounter
+from .number_lease import NumberLease
+from .report_inbox import DialerReportInbox
 
 __all__ = [
     "AdminUser",
@@ -26,4 +32,12 @@ __all__ = [
     "OutboundLine",
     "WalletTransaction",
     "BankIncomingSms",
+    "WalletCharge",
+    "CompanyDialQueue",
+    "CompanyNumberState",
+    "CallStatsHourly",
+    "RollupWatermark",
+    "NumberCounter",
+    "NumberLease",
+    "DialerReportInbox",
 ]
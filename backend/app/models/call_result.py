@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from enum import Enum
-from sqlalchemy import Integer, String, DateTime, ForeignKey
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.db import Base
@@ -13,9 +13,18 @@ class CallDirection(str, Enum):
 
 
 class CallResult(Base):
+    """
+    One call attempt. Partitioned by month of attempted_at (Tehran months, migration 0023), so
+    the primary key and unique indexes carry attempted_at; ids still come from one sequence.
+
+    Other tables point at rows by id without an FK (a partitioned table can only be referenced
+    through its full key): dialer_batch_items.report_call_result_id, wallet_charges.call_result_id
+    and company_number_state.latest_call_id.
+    """
+
     __tablename__ = "call_results"  # Renamed from call_attempts
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     phone_number_id: Mapped[int] = mapped_column(ForeignKey("numbers.id"), index=True)  # Updated FK reference
     company_id: Mapped[int | None] = mapped_column(ForeignKey("companies.id"), index=True, nullable=True)
     scenario_id: Mapped[int | None] = mapped_column(ForeignKey("scenarios.id"), nullable=True)
@@ -29,7 +38,10 @@ class CallResult(Base):
         index=True,
         nullable=True,
     )
-    attempted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    # Partition key; never updated.
+    attempted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, index=True)
+    # Dialer-supplied idempotency key; a replayed report (same key and attempted_at) is a no-op.
+    report_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     # Relationships
     phone_number = relationship("PhoneNumber")
@@ -37,3 +49,15 @@ class CallResult(Base):
     scenario = relationship("Scenario")
     outbound_line = relationship("OutboundLine")
     agent = relationship("AdminUser")
+
+    __table_args__ = (
+        Index(
+            "ux_call_results_company_report_id",
+            "company_id",
+            "report_id",
+            "attempted_at",
+            unique=True,
+            postgresql_where=text("report_id IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (attempted_at)"},
+    )
@@ -0,0 +1,59 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class CallStatsHourly(Base):
+    """
+    call_results counted per Tehran hour and dimension, folded in by the call_stats_rollup job.
+
+    Admin status edits and deletes of folded call_results apply their deltas in the same
+    transaction (call_stats_service.retract / restatus); rebuild from scratch with
+    `python -m app.utils.rebuild_call_stats`.
+    """
+
+    __tablename__ = "call_stats_hourly"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    company_id: Mapped[int | None] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), nullable=True)
+    # Wall-clock hour in Asia/Tehran (timestamp without time zone), like the stats buckets.
+    hour_tehran: Mapped[datetime | None] = mapped_column(DateTime(timezone=False), nullable=True)
+    scenario_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    outbound_line_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    direction: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # Dimensions are nullable, so uniqueness is on their coalesced values (the upsert target).
+        Index(
+            "ux_call_stats_hourly_key",
+            func.coalesce(company_id, 0),
+            hour_tehran,
+            func.coalesce(scenario_id, 0),
+            func.coalesce(outbound_line_id, 0),
+            func.coalesce(direction, ""),
+            func.coalesce(status, ""),
+            unique=True,
+        ),
+        Index("ix_call_stats_hourly_company_hour", "company_id", "hour_tehran"),
+        Index("ix_call_stats_hourly_hour", "hour_tehran"),
+    )
+
+
+class RollupWatermark(Base):
+    """
+    Progress of an incremental rollup over an id sequence.
+
+    Rows with id <= last_id are folded in. pending_id is the max id visible at pending_at; it is
+    folded once every transaction that began before pending_at has ended.
+    """
+
+    __tablename__ = "rollup_watermarks"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    last_id: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pending_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    pending_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,32 @@
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class CompanyNumberState(Base):
+    """
+    Latest call per (company, number), maintained next to call_results.
+
+    A row exists once the company has a call result for the number; no row means IN_QUEUE.
+    "Latest" is the highest call_results.id, the same tie-break the history view uses.
+    """
+
+    __tablename__ = "company_number_state"
+
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    number_id: Mapped[int] = mapped_column(ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True)
+    # No FK: call_results rows are removed by resets in the same transaction that updates this row.
+    latest_call_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    latest_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    last_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    total_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    latest_agent_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    __table_args__ = (
+        Index("ix_company_number_state_status", "company_id", "latest_status", "number_id"),
+        Index("ix_company_number_state_agent", "company_id", "latest_agent_id"),
+        Index("ix_company_number_state_last_attempt", "company_id", "last_attempt_at"),
+        Index("ix_company_number_state_number_id", "number_id"),
+    )
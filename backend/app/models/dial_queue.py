@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class CompanyDialQueue(Base):
+    """Numbers a company may still dial, keyed by when they become eligible (cooldown)."""
+
+    __tablename__ = "company_dial_queue"
+
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    number_id: Mapped[int] = mapped_column(ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True)
+    eligible_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_company_dial_queue_company_eligible", "company_id", "eligible_at", "number_id"),
+        Index("ix_company_dial_queue_number_id", "number_id"),
+    )
@@ -16,7 +16,8 @@ class DialerBatchItem(Base):
 
     reported_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     report_batch_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
-    report_call_result_id: Mapped[int | None] = mapped_column(ForeignKey("call_results.id"), index=True, nullable=True)
+    # call_results.id without an FK: call_results is partitioned (see CallResult).
+    report_call_result_id: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
     report_attempted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     report_status: Mapped[str | None] = mapped_column(String(32), nullable=True)
     report_scenario_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -27,4 +28,8 @@ class DialerBatchItem(Base):
 
     company = relationship("Company")
     phone_number = relationship("PhoneNumber")
-    call_result = relationship("CallResult")
+    call_result = relationship(
+        "CallResult",
+        primaryjoin="foreign(DialerBatchItem.report_call_result_id) == CallResult.id",
+        viewonly=True,
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Integer, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class NumberCounter(Base):
+    """
+    Row counts of numbers and company_number_state, kept exact by triggers (migration 0022).
+
+    company_id 0 holds numbers per global_status; company_id N holds "CALLED", the company's
+    state rows (IN_QUEUE = all numbers minus CALLED). Each writer adds to the slot of its
+    backend (pg_backend_pid() % 16), so concurrent transactions rarely wait on the same row;
+    a count is the sum over slots.
+    """
+
+    __tablename__ = "number_counters"
+
+    # No FK: company 0 is the global scope; a deleted company's slots sum to zero.
+    company_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    slot: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
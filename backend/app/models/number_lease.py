@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class NumberLease(Base):
+    """A number handed to the dialer and not yet reported. Kept off `numbers` so dispatch never rewrites it."""
+
+    __tablename__ = "number_leases"
+
+    number_id: Mapped[int] = mapped_column(ForeignKey("numbers.id", ondelete="CASCADE"), primary_key=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    batch_id: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    leased_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, nullable=False)
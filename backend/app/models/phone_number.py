@@ -36,8 +36,6 @@ class PhoneNumber(Base):
     global_status: Mapped[GlobalStatus] = mapped_column(PgEnum(GlobalStatus), default=GlobalStatus.ACTIVE, nullable=False)
     last_called_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_called_company_id: Mapped[int | None] = mapped_column(ForeignKey("companies.id"), nullable=True)
-    assigned_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
-    assigned_batch_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     # Relationships
     last_called_company = relationship("Company")
@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, String, Integer, DateTime, Text, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import JSONB
+
+from ..core.db import Base
+
+
+class DialerReportInbox(Base):
+    """Raw dialer reports accepted in async ingest mode, applied later by the inbox worker."""
+
+    __tablename__ = "dialer_report_inbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_dialer_report_inbox_pending",
+            "company",
+            "id",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
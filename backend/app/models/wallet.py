@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Integer, String, DateTime, ForeignKey, Boolean, Text, func
+from sqlalchemy import BigInteger, Integer, String, DateTime, ForeignKey, Boolean, Text, Index, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..core.db import Base
@@ -48,3 +48,28 @@ class WalletTransaction(Base):
     company = relationship("Company")
     created_by = relationship("AdminUser")
     bank_sms = relationship("BankIncomingSms")
+
+
+class WalletCharge(Base):
+    """Per-call charge ledger; pending rows (settled_at NULL) are folded into wallet_balance by the settler."""
+
+    __tablename__ = "wallet_charges"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id"), nullable=False)
+    # No FK: call results can be deleted by a number reset while their charge stays on record.
+    call_result_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    scenario_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    amount_toman: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    settled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_wallet_charges_company_created", "company_id", "created_at"),
+        Index(
+            "ix_wallet_charges_pending",
+            "company_id",
+            "id",
+            postgresql_where=text("settled_at IS NULL"),
+        ),
+    )
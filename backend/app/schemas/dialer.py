@@ -12,6 +12,7 @@ class DialerBatchOut(BaseModel):
     batch_id: str
     size_requested: int
     size_returned: int
+    lease_expires_at: datetime | None = None
     numbers: list[DialerNumber]
 
 
@@ -39,8 +40,10 @@ class NextBatchResponse(BaseModel):
     timezone: str = "Asia/Tehran"
     server_time: datetime
     schedule_version: int
+    profile_version: int | None = None
     reason: str | None = None
     retry_after_seconds: int | None = None
+    window_closes_in_seconds: int | None = None
     batch: DialerBatchOut | None = None
     active_scenarios: list[ScenarioSimple] = []
     outbound_lines: list[DialerOutboundLine] = []
@@ -49,6 +52,26 @@ class NextBatchResponse(BaseModel):
     # Deprecated: active_agents (replaced by inbound_agents + outbound_agents)
 
 
+class SlimNextBatchResponse(BaseModel):
+    """next-batch with slim=true: the profile lists are fetched from /config when profile_version changes"""
+    call_allowed: bool
+    schedule_version: int
+    profile_version: int
+    reason: str | None = None
+    retry_after_seconds: int | None = None
+    window_closes_in_seconds: int | None = None
+    batch: DialerBatchOut | None = None
+
+
+class DialerConfigResponse(BaseModel):
+    company: str
+    profile_version: int
+    active_scenarios: list[ScenarioSimple] = []
+    outbound_lines: list[DialerOutboundLine] = []
+    inbound_agents: list[DialerAgent] = []
+    outbound_agents: list[DialerAgent] = []
+
+
 class DialerReport(BaseModel):
     number_id: int | None = Field(default=None, description="Optional when reporting by phone_number only")
     phone_number: str
@@ -63,3 +86,17 @@ class DialerReport(BaseModel):
     agent_phone: str | None = Field(default=None, description="Phone of the agent who handled the call")
     user_message: str | None = Field(default=None, description="Customer message/comment to store with the attempt")
     batch_id: str | None = Field(default=None, description="Batch ID that dialer believes this report belongs to")
+    report_id: str | None = Field(
+        default=None,
+        max_length=64,
+        description="Idempotency key; retries with the same key return the original response without side effects",
+    )
+
+
+class BatchHeartbeatRequest(BaseModel):
+    company: str = Field(..., description="Company slug (e.g., 'salehi')")
+
+
+class BatchReleaseRequest(BaseModel):
+    company: str = Field(..., description="Company slug (e.g., 'salehi')")
+    number_ids: list[int] | None = Field(default=None, description="Unused numbers to return; omit to release the whole batch")
@@ -65,6 +65,8 @@ class PhoneNumberImportResponse(BaseModel):
 
 class PhoneNumberStatsResponse(BaseModel):
     total: int
+    # True when total is the planner's estimate (estimate=true on a large view)
+    estimated: bool = False
 
 
 class PhoneNumberBulkAction(BaseModel):
@@ -6,8 +6,10 @@ from ..models.user import AdminUser, UserRole
 from ..schemas.auth import LoginRequest
 from ..schemas.user import AdminUserCreate, AdminUserUpdate, AdminSelfUpdate
 from ..core.security import verify_password, get_password_hash, create_access_token
+from ..core import principals
 from ..core.config import get_settings
 from .phone_service import normalize_phone
+from . import dialer_profile_service
 
 settings = get_settings()
 
@@ -58,6 +60,7 @@ def create_admin_user(db: Session, data: AdminUserCreate) -> AdminUser:
         agent_type=data.agent_type,
     )
     db.add(user)
+    dialer_profile_service.bump(db, user.company_id)
     db.commit()
     db.refresh(user)
     return user
@@ -124,10 +127,14 @@ def update_admin_user(db: Session, user_id: int, data: AdminUserUpdate) -> Admin
         if existing_phone:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already in use")
         user.phone_number = normalized_phone
+    previous_company_id = user.company_id
     if data.company_id is not None:
         user.company_id = data.company_id
     if data.agent_type is not None:
         user.agent_type = data.agent_type
+    # Agent lists in the dialer profile of both the old and the new company may change.
+    dialer_profile_service.bump(db, previous_company_id, user.company_id)
+    principals.invalidate_user(db, user.id)
     db.commit()
     db.refresh(user)
     return user
@@ -148,6 +155,8 @@ def delete_admin_user(db: Session, user_id: int) -> None:
         if remaining_admins == 0:
             raise HTTPException(status_code=400, detail="At least one active admin is required")
     db.delete(user)
+    dialer_profile_service.bump(db, user.company_id)
+    principals.invalidate_user(db, user.id)
     db.commit()
 
 
@@ -191,6 +200,8 @@ def update_self(db: Session, user_id: int, data: AdminSelfUpdate) -> AdminUser:
         if existing_phone:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Phone number already in use")
         user.phone_number = normalized_phone
+    dialer_profile_service.bump(db, user.company_id)
+    principals.invalidate_user(db, user.id)
     db.commit()
     db.refresh(user)
     return user
@@ -0,0 +1,140 @@
+"""
+Monthly partitions of call_results on attempted_at (Tehran months, migration 0023).
+
+The call_results_partitions job keeps the current month and CALL_RESULTS_PARTITION_MONTHS_AHEAD
+more months created ahead of the reports that need them. With CALL_RESULTS_RETENTION_MONTHS set
+it drops whole months past retention (DETACH + DROP, no row deletes). Rows outside every month
+(a dialer clock far off) land in call_results_default; those of a month still ahead are moved
+into its partition when the job creates it.
+"""
+import logging
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.config import get_settings
+from ..core.locks import advisory_lock
+from .schedule_service import TEHRAN_TZ
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PARTITION_JOB = "call_results_partitions"
+TZ_NAME = str(TEHRAN_TZ)
+_NAME = re.compile(r"^call_results_y(\d{4})m(\d{2})$")
+# DDL on call_results waits behind running queries; give up and retry on the next pass instead
+# of queueing reports behind the lock.
+LOCK_TIMEOUT = "5s"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"call_results_y{month.year}m{month.month:02d}"
+
+
+def create_partition_sql(month: date) -> list[str]:
+    """
+    Statements that create the month's partition, for one transaction.
+
+    A month cannot be attached while call_results_default holds rows in its range, so those rows
+    are moved into the new table first. The default stays locked until commit, so no report
+    routed there meanwhile can land in the range.
+    """
+    name = partition_name(month)
+    start = f"'{month:%Y-%m-%d} 00:00:00 {TZ_NAME}'"
+    end = f"'{add_months(month, 1):%Y-%m-%d} 00:00:00 {TZ_NAME}'"
+    in_range = f"attempted_at >= {start} AND attempted_at < {end}"
+    return [
+        "LOCK TABLE call_results_default IN ACCESS EXCLUSIVE MODE",
+        f"CREATE TABLE {name} (LIKE call_results INCLUDING DEFAULTS)",
+        f"INSERT INTO {name} SELECT * FROM call_results_default WHERE {in_range}",
+        f"DELETE FROM call_results_default WHERE {in_range}",
+        # Attaching builds the partitioned indexes and FKs on the new table.
+        f"ALTER TABLE call_results ATTACH PARTITION {name} FOR VALUES FROM ({start}) TO ({end})",
+    ]
+
+
+def partitions(db: Session) -> dict[date, str]:
+    """Monthly partitions attached to call_results, by month."""
+    names = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'call_results'::regclass"
+        )
+    ).scalars()
+    found = {}
+    for name in names:
+        match = _NAME.match(name)
+        if match:
+            found[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return found
+
+
+def _this_month(today: date | None) -> date:
+    return (today or datetime.now(TEHRAN_TZ).date()).replace(day=1)
+
+
+def _run_ddl(db: Session, statements: list[str], name: str) -> bool:
+    """Run DDL for one partition in its own transaction; a failure is counted and retried next pass."""
+    try:
+        db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        for statement in statements:
+            db.execute(text(statement))
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        metrics.inc("call_results_partitions.errors")
+        logger.warning("Partition maintenance failed for %s", name, exc_info=True)
+        return False
+
+
+def ensure_ahead(db: Session, today: date | None = None) -> list[str]:
+    """Create the missing partitions from this month to CALL_RESULTS_PARTITION_MONTHS_AHEAD ahead."""
+    first = _this_month(today)
+    existing = partitions(db)
+    created = []
+    for offset in range(settings.call_results_partition_months_ahead + 1):
+        month = add_months(first, offset)
+        if month not in existing and _run_ddl(db, create_partition_sql(month), partition_name(month)):
+            created.append(partition_name(month))
+    return created
+
+
+def drop_expired(db: Session, today: date | None = None) -> list[str]:
+    """Keep this month and CALL_RESULTS_RETENTION_MONTHS before it, drop older ones (0 keeps everything)."""
+    if settings.call_results_retention_months <= 0:
+        return []
+    cutoff = add_months(_this_month(today), -settings.call_results_retention_months)
+    dropped = []
+    for month, name in sorted(partitions(db).items()):
+        if month >= cutoff:
+            break
+        if _run_ddl(db, [f"ALTER TABLE call_results DETACH PARTITION {name}", f"DROP TABLE {name}"], name):
+            dropped.append(name)
+    return dropped
+
+
+def maintain() -> None:
+    """Background job: create partitions ahead and apply retention; single runner across processes."""
+    with advisory_lock(PARTITION_JOB) as conn:
+        if conn is None:
+            metrics.inc("call_results_partitions.skipped_locked")
+            return
+        with Session(bind=conn) as db:
+            created = ensure_ahead(db)
+            dropped = drop_expired(db)
+            last = max(partitions(db), default=None)
+    metrics.inc("call_results_partitions.created", len(created))
+    metrics.inc("call_results_partitions.dropped", len(dropped))
+    if last is not None:
+        this_month = _this_month(None)
+        ahead = (last.year - this_month.year) * 12 + last.month - this_month.month
+        metrics.set_gauge("call_results_partitions.months_ahead", ahead)
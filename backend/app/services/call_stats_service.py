@@ -0,0 +1,294 @@
+"""
+Hourly rollup of call_results (call_stats_hourly) and the counts read from it.
+
+The call_stats_rollup job folds call_results into per-hour counts by id range and keeps its
+progress in rollup_watermarks. Admin edits and deletes of rows already folded apply their
+deltas in the same transaction (`retract`, `restatus`). `counts` answers from the rollup plus
+the raw rows it does not cover: rows above the watermark (not folded yet) and the partial hours
+at either end of the requested range. Both parts are read in one statement, so the result
+matches a scan of call_results while a 30-day range reads a few hundred rollup rows.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import String, func, literal, literal_column, or_, and_, select, text, union_all, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.config import get_settings
+from ..core.locks import advisory_lock
+from ..models.call_result import CallResult
+from ..models.call_stats import CallStatsHourly, RollupWatermark
+from . import stats_cache
+from .schedule_service import TEHRAN_TZ
+
+settings = get_settings()
+
+ROLLUP_JOB = "call_stats_rollup"
+WATERMARK = "call_stats_hourly"
+TZ_NAME = str(TEHRAN_TZ)
+
+_COLUMNS = ["company_id", "hour_tehran", "scenario_id", "outbound_line_id", "direction", "status", "count"]
+# Must match ux_call_stats_hourly_key expression for expression.
+_KEY = [
+    func.coalesce(CallStatsHourly.company_id, literal_column("0")),
+    CallStatsHourly.hour_tehran,
+    func.coalesce(CallStatsHourly.scenario_id, literal_column("0")),
+    func.coalesce(CallStatsHourly.outbound_line_id, literal_column("0")),
+    func.coalesce(CallStatsHourly.direction, literal_column("''")),
+    func.coalesce(CallStatsHourly.status, literal_column("''")),
+]
+# Sessions of this database whose transaction began at or before :at (see fold_settled).
+_OPEN_SINCE = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_stat_activity WHERE datname = current_database() "
+    "AND backend_type = 'client backend' AND pid <> pg_backend_pid() AND xact_start <= :at)"
+)
+
+
+def _local(granularity: str, attempted_at):
+    return func.date_trunc(granularity, func.timezone(TZ_NAME, attempted_at))
+
+
+def _dims() -> list:
+    """call_results expressions for the rollup dimensions except status, in _COLUMNS order."""
+    return [
+        CallResult.company_id,
+        _local("hour", CallResult.attempted_at),
+        CallResult.scenario_id,
+        CallResult.outbound_line_id,
+        CallResult.call_direction,
+    ]
+
+
+def _add(rows):
+    """INSERT grouped (_COLUMNS) rows into the rollup, adding their counts to existing rows."""
+    stmt = insert(CallStatsHourly).from_select(_COLUMNS, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=_KEY,
+        set_={"count": CallStatsHourly.count + stmt.excluded.count},
+    )
+
+
+def fold(db: Session, after_id: int, up_to_id: int) -> set[int | None]:
+    """
+    Add call_results with after_id < id <= up_to_id to the rollup. Caller commits.
+
+    Returns the companies that got rows for a Tehran day before today (late reports).
+    """
+    dims = [*_dims(), CallResult.status]
+    touched = db.execute(
+        _add(
+            select(*dims, func.count()).where(CallResult.id > after_id, CallResult.id <= up_to_id).group_by(*dims)
+        ).returning(CallStatsHourly.company_id, CallStatsHourly.hour_tehran)
+    ).all()
+    today = datetime.now(TEHRAN_TZ).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    return {company_id for company_id, hour in touched if hour is None or hour < today}
+
+
+def lock_folded(db: Session) -> int:
+    """
+    The watermark, share-locked until the caller commits.
+
+    The job cannot fold a chunk meanwhile, so call_results rows with id <= the result are in the
+    rollup and rows above it will be folded with whatever values the caller leaves them.
+    Take it before `retract` / `restatus` and before changing call_results.
+    """
+    return (
+        db.execute(
+            select(RollupWatermark.last_id).where(RollupWatermark.name == WATERMARK).with_for_update(read=True)
+        ).scalar()
+        or 0
+    )
+
+
+def retract(db: Session, folded: int, *where) -> None:
+    """Subtract folded call_results (id <= `folded`) matching `where` from the rollup; run before deleting them."""
+    dims = [*_dims(), CallResult.status]
+    db.execute(_add(select(*dims, -func.count()).where(CallResult.id <= folded, *where).group_by(*dims)))
+
+
+def restatus(call_ids, status: str, folded: int):
+    """
+    Data-modifying CTE moving the folded calls in `call_ids` (a select of call_results ids) from
+    their current status to `status` in the rollup. Attach it to the UPDATE that sets the status:
+    both read call_results as it was before the statement.
+    """
+    names = ["company_id", "hour", "scenario_id", "outbound_line_id", "direction"]
+    changed = [CallResult.id.in_(call_ids), CallResult.id <= folded]
+
+    def side(status_column, delta: int):
+        dims = [column.label(name) for column, name in zip(_dims(), names)]
+        return select(*dims, status_column.label("status"), literal(delta).label("delta")).where(*changed)
+
+    deltas = union_all(side(CallResult.status, -1), side(literal(status, String), 1)).subquery("status_deltas")
+    keys = [deltas.c[name] for name in names] + [deltas.c.status]
+    return _add(
+        select(*keys, func.sum(deltas.c.delta)).group_by(*keys).having(func.sum(deltas.c.delta) != 0)
+    ).cte("rollup_restatus")
+
+
+def _watermark(db: Session) -> RollupWatermark:
+    """The watermark row, locked FOR UPDATE until commit (see `lock_folded`)."""
+    mark = db.get(RollupWatermark, WATERMARK, with_for_update=True)
+    if mark is None:
+        mark = RollupWatermark(name=WATERMARK, last_id=0)
+        db.add(mark)
+        db.flush()
+    return mark
+
+
+def fold_settled(db: Session, chunk_size: int | None = None) -> int:
+    """
+    Fold the pending id range once no transaction that could still commit an id in it is open,
+    then take the next marker. Commits per chunk. Returns the new watermark.
+
+    Ids come from nextval before their transaction commits, or even gets an xid, so a lower id
+    can commit after a higher one. pending_id is the max visible id and pending_at the clock
+    read right after that snapshot: any transaction still holding a lower id began before
+    pending_at. The range is folded once pg_stat_activity shows none of those left open.
+    """
+    chunk_size = chunk_size or settings.call_stats_rollup_chunk_size
+    mark = _watermark(db)
+    if mark.pending_id is not None and not db.execute(_OPEN_SINCE, {"at": mark.pending_at}).scalar():
+        while mark.last_id < mark.pending_id:
+            up_to_id = min(mark.last_id + chunk_size, mark.pending_id)
+            late = fold(db, mark.last_id, up_to_id)
+            if late:
+                # Cached results for finished days of these companies are stale now.
+                stats_cache.invalidate(db, late)
+            mark.last_id = up_to_id
+            db.commit()
+            mark = _watermark(db)
+        mark.pending_id = None
+    if mark.pending_id is None:
+        latest, seen_at = db.execute(select(func.max(CallResult.id), func.clock_timestamp())).one()
+        if (latest or 0) > mark.last_id:
+            mark.pending_id, mark.pending_at = latest, seen_at
+    last_id = mark.last_id
+    db.commit()
+    return last_id
+
+
+def roll_up() -> None:
+    """Background job: advance the rollup; single runner across processes."""
+    with advisory_lock(ROLLUP_JOB) as conn:
+        if conn is None:
+            metrics.inc("call_stats.rollup_skipped_locked")
+            return
+        with Session(bind=conn) as db:
+            last_id = fold_settled(db)
+            lag = db.execute(
+                select(func.count()).select_from(CallResult).where(CallResult.id > last_id)
+            ).scalar() or 0
+    metrics.set_gauge("call_stats.rollup_lag_rows", lag)
+
+
+def reset(db: Session) -> None:
+    """Drop the rollup and refold from the start; the job picks it up once the reset commits."""
+    db.execute(delete(CallStatsHourly))
+    mark = _watermark(db)
+    mark.last_id = 0
+    mark.pending_id = None
+    stats_cache.invalidate(db)
+
+
+def _hour_bounds(start_utc: datetime | None, end_utc: datetime | None):
+    """
+    Whole Tehran hours inside [start_utc, end_utc] as (first, after_last) aware Tehran datetimes;
+    after_last is exclusive. `end_utc` is inclusive, like the stats time filters.
+    """
+    first = after_last = None
+    if start_utc is not None:
+        local = start_utc.astimezone(TEHRAN_TZ)
+        first = local.replace(minute=0, second=0, microsecond=0)
+        if first != local:
+            first += timedelta(hours=1)
+    if end_utc is not None:
+        local = (end_utc + timedelta(microseconds=1)).astimezone(TEHRAN_TZ)
+        after_last = local.replace(minute=0, second=0, microsecond=0)
+    if first is not None and after_last is not None and after_last < first:
+        after_last = first
+    return first, after_last
+
+
+def counts(
+    db: Session,
+    *,
+    start_utc: datetime | None = None,
+    end_utc: datetime | None = None,
+    company_id: int | None = None,
+    statuses: list[str] | None = None,
+    group: str | None = None,
+) -> list[tuple]:
+    """
+    Call counts as (key, status, count) for attempted_at in [start_utc, end_utc] (both optional).
+
+    `group` is None (key is None), "scenario", "line", "hour" or "day" (Tehran wall-clock
+    buckets, naive datetimes).
+    """
+    rollup_keys = {
+        "scenario": CallStatsHourly.scenario_id,
+        "line": CallStatsHourly.outbound_line_id,
+        "hour": CallStatsHourly.hour_tehran,
+        "day": func.date_trunc("day", CallStatsHourly.hour_tehran),
+    }
+    raw_keys = {
+        "scenario": CallResult.scenario_id,
+        "line": CallResult.outbound_line_id,
+        "hour": _local("hour", CallResult.attempted_at),
+        "day": _local("day", CallResult.attempted_at),
+    }
+    first, after_last = _hour_bounds(start_utc, end_utc)
+    end_excl = end_utc + timedelta(microseconds=1) if end_utc is not None else None
+
+    rolled_where, raw_unfolded = [], []
+    watermark = select(RollupWatermark.last_id).where(RollupWatermark.name == WATERMARK).scalar_subquery()
+    raw_unfolded.append(CallResult.id > func.coalesce(watermark, 0))
+    if first is not None:
+        rolled_where.append(CallStatsHourly.hour_tehran >= first.replace(tzinfo=None))
+        raw_unfolded.append(CallResult.attempted_at >= first.astimezone(timezone.utc))
+    if after_last is not None:
+        rolled_where.append(CallStatsHourly.hour_tehran < after_last.replace(tzinfo=None))
+        raw_unfolded.append(CallResult.attempted_at < after_last.astimezone(timezone.utc))
+    raw_ranges = [and_(*raw_unfolded)]
+    # Partial hours at the edges are never read from the rollup.
+    if start_utc is not None:
+        head_end = first.astimezone(timezone.utc)
+        if end_excl is not None:
+            head_end = min(head_end, end_excl)
+        if head_end > start_utc:
+            raw_ranges.append(and_(CallResult.attempted_at >= start_utc, CallResult.attempted_at < head_end))
+    if end_excl is not None:
+        tail_start = after_last.astimezone(timezone.utc)
+        if start_utc is not None:
+            tail_start = max(tail_start, start_utc)
+        if end_excl > tail_start:
+            raw_ranges.append(and_(CallResult.attempted_at >= tail_start, CallResult.attempted_at < end_excl))
+    raw_where = [or_(*raw_ranges)]
+    if company_id is not None:
+        rolled_where.append(CallStatsHourly.company_id == company_id)
+        raw_where.append(CallResult.company_id == company_id)
+    if statuses is not None:
+        rolled_where.append(CallStatsHourly.status.in_(statuses))
+        raw_where.append(CallResult.status.in_(statuses))
+
+    rolled_group = [rollup_keys[group].label("key")] if group else []
+    raw_group = [raw_keys[group].label("key")] if group else []
+    rolled = (
+        select(*rolled_group, CallStatsHourly.status.label("status"), func.sum(CallStatsHourly.count).label("cnt"))
+        .where(*rolled_where)
+        .group_by(*[c.element for c in rolled_group], CallStatsHourly.status)
+    )
+    raw = (
+        select(*raw_group, CallResult.status.label("status"), func.count().label("cnt"))
+        .where(*raw_where)
+        .group_by(*[c.element for c in raw_group], CallResult.status)
+    )
+    both = union_all(rolled, raw).subquery()
+    keys = [both.c.key] if group else []
+    rows = db.execute(
+        select(*keys, both.c.status, func.sum(both.c.cnt)).group_by(*keys, both.c.status)
+    ).all()
+    if group:
+        return [(key, status, int(count)) for key, status, count in rows]
+    return [(None, status, int(count)) for status, count in rows]
@@ -0,0 +1,153 @@
+"""
+In-process snapshot of the companies table for name -> company resolution.
+
+Dialer, stats and panel requests resolve their company here instead of querying `companies`
+per request. The whole table (a handful of rows) is loaded through the caller's session at
+startup or on first use. Writers call `invalidate(db)` inside their transaction: once it
+commits the snapshot is dropped locally, and NOTIFY on `company_events` drops it in every
+other worker. A snapshot older than COMPANY_REGISTRY_MAX_AGE_SECONDS is reloaded as a backstop.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from ..core import events, metrics
+from ..core.config import get_settings
+from ..models.company import Company
+
+settings = get_settings()
+
+CHANNEL = "company_events"
+# Session.info flag set by invalidate(); the drop happens when that session commits.
+_PENDING = "company_registry.invalidate"
+
+
+@dataclass(frozen=True)
+class CompanyEntry:
+    id: int
+    name: str
+    display_name: str
+    is_active: bool
+    settings: dict = field(default_factory=dict)
+    # Read by the dialer profile cache; bump() invalidates the registry with it.
+    profile_version: int = 1
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    loaded_at: float
+    by_name: dict[str, CompanyEntry]
+    by_id: dict[int, CompanyEntry]
+
+
+_snapshot: _Snapshot | None = None
+_load_lock = threading.Lock()
+_drop_lock = threading.Lock()
+# Bumped by every invalidation so a snapshot read before it is not kept after it.
+_generation = 0
+
+
+def _load(db: Session) -> _Snapshot:
+    rows = db.execute(
+        select(
+            Company.id,
+            Company.name,
+            Company.display_name,
+            Company.is_active,
+            Company.settings,
+            Company.profile_version,
+        )
+    ).all()
+    entries = [
+        CompanyEntry(
+            id=row.id,
+            name=row.name,
+            display_name=row.display_name,
+            is_active=bool(row.is_active),
+            settings=dict(row.settings or {}),
+            profile_version=row.profile_version,
+        )
+        for row in rows
+    ]
+    metrics.inc("company_registry.loads")
+    return _Snapshot(
+        loaded_at=time.monotonic(),
+        by_name={entry.name: entry for entry in entries},
+        by_id={entry.id: entry for entry in entries},
+    )
+
+
+def _fresh(snapshot: _Snapshot | None) -> bool:
+    return snapshot is not None and time.monotonic() - snapshot.loaded_at < settings.company_registry_max_age_seconds
+
+
+def _current(db: Session) -> _Snapshot:
+    global _snapshot
+    snapshot = _snapshot
+    if _fresh(snapshot):
+        return snapshot
+    with _load_lock:
+        snapshot = _snapshot
+        if _fresh(snapshot):
+            return snapshot
+        generation = _generation
+        snapshot = _load(db)
+        with _drop_lock:
+            if generation == _generation:
+                _snapshot = snapshot
+    return snapshot
+
+
+def load(db: Session) -> None:
+    """Warm the registry at startup."""
+    _current(db)
+
+
+def get_by_name(db: Session, name: str, active_only: bool = True) -> CompanyEntry | None:
+    entry = _current(db).by_name.get(name)
+    if entry is None or (active_only and not entry.is_active):
+        return None
+    return entry
+
+
+def get(db: Session, company_id: int) -> CompanyEntry | None:
+    return _current(db).by_id.get(company_id)
+
+
+def require_active(db: Session, name: str) -> CompanyEntry:
+    entry = get_by_name(db, name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return entry
+
+
+def _drop(_payload: str = events.ALL_COMPANIES) -> None:
+    global _snapshot, _generation
+    with _drop_lock:
+        _generation += 1
+        _snapshot = None
+
+
+def invalidate(db: Session) -> None:
+    """Reload on next use in every worker once the caller commits; a rollback keeps the snapshot."""
+    db.info[_PENDING] = True
+    events.publish(db, CHANNEL, events.ALL_COMPANIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    # Dropping any earlier would let a concurrent request reload the pre-commit rows and keep them.
+    if session.info.pop(_PENDING, False):
+        _drop()
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+
+events.on_notify(CHANNEL, _drop)
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete, update, func, text, true, false, values, column, cast, not_, Integer, DateTime
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from ..core.config import get_settings
+from ..models.dial_queue import CompanyDialQueue
+from ..models.company import Company
+from ..models.phone_number import PhoneNumber
+
+settings = get_settings()
+
+# Backfilled rows sort ahead of fresh imports while keeping number-id order among themselves.
+BACKFILL_ELIGIBLE_AT = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+REBUILD_SQL = """
+    INSERT INTO company_dial_queue (company_id, number_id, eligible_at)
+    SELECT c.id,
+           n.id,
+           COALESCE(n.last_called_at + make_interval(days => :cooldown_days), :backfill_at)
+    FROM companies c
+    CROSS JOIN numbers n
+    WHERE (CAST(:company_id AS INTEGER) IS NULL OR c.id = :company_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM call_results cr
+          WHERE cr.phone_number_id = n.id AND cr.company_id = c.id
+      )
+    ON CONFLICT (company_id, number_id) DO NOTHING
+"""
+
+
+def _cooldown() -> timedelta:
+    return timedelta(days=settings.call_cooldown_days)
+
+
+def enqueue_for_all_companies(db: Session, number_ids) -> None:
+    """Queue freshly imported numbers for every company. `number_ids` is a list or a select of ids."""
+    if isinstance(number_ids, list) and not number_ids:
+        return
+    db.execute(
+        insert(CompanyDialQueue)
+        .from_select(
+            ["company_id", "number_id", "eligible_at"],
+            select(Company.id, PhoneNumber.id, func.now())
+            .select_from(Company)
+            .join(PhoneNumber, true())
+            .where(PhoneNumber.id.in_(number_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=[CompanyDialQueue.company_id, CompanyDialQueue.number_id])
+    )
+
+
+def enqueue_reported(db: Session, number_ids: list[int], attempts: list[tuple[int, int, datetime]]) -> None:
+    """
+    Queue numbers that a call report just created. Companies that reported them in `attempts`
+    (company_id, number_id, attempted_at) are skipped; every other company may dial them once the
+    global cooldown of the latest attempt has passed.
+    """
+    if not number_ids:
+        return
+    wanted = set(number_ids)
+    cooldown = _cooldown()
+    rows = sorted({(company_id, number_id, attempted_at + cooldown) for company_id, number_id, attempted_at in attempts if number_id in wanted})
+    if not rows:
+        enqueue_for_all_companies(db, sorted(wanted))
+        return
+    reported = values(
+        column("company_id", Integer), column("number_id", Integer), column("until", DateTime(timezone=True)),
+        name="reported",
+    ).data(rows)
+    db.execute(
+        insert(CompanyDialQueue)
+        .from_select(
+            ["company_id", "number_id", "eligible_at"],
+            select(
+                Company.id,
+                PhoneNumber.id,
+                func.coalesce(func.max(cast(reported.c.until, DateTime(timezone=True))), func.now()),
+            )
+            .select_from(Company)
+            .join(PhoneNumber, true())
+            .outerjoin(reported, reported.c.number_id == PhoneNumber.id)
+            .where(PhoneNumber.id.in_(sorted(wanted)))
+            .group_by(Company.id, PhoneNumber.id)
+            .having(not_(func.coalesce(func.bool_or(reported.c.company_id == Company.id), false()))),
+        )
+        .on_conflict_do_nothing(index_elements=[CompanyDialQueue.company_id, CompanyDialQueue.number_id])
+    )
+
+
+def enqueue_for_company(db: Session, company_id: int, number_ids) -> None:
+    """Put numbers back into one company's queue (after a reset), honoring the global cooldown."""
+    if isinstance(number_ids, list) and not number_ids:
+        return
+    eligible_at = func.greatest(
+        func.now(),
+        func.coalesce(PhoneNumber.last_called_at + _cooldown(), func.now()),
+    )
+    db.execute(
+        insert(CompanyDialQueue)
+        .from_select(
+            ["company_id", "number_id", "eligible_at"],
+            select(Company.id, PhoneNumber.id, eligible_at)
+            .select_from(Company)
+            .join(PhoneNumber, true())
+            .where(Company.id == company_id, PhoneNumber.id.in_(number_ids)),
+        )
+        .on_conflict_do_nothing(index_elements=[CompanyDialQueue.company_id, CompanyDialQueue.number_id])
+    )
+
+
+def populate_company(db: Session, company_id: int) -> int:
+    """Fill the queue of a newly created company with every number it has not called yet."""
+    return rebuild(db, company_id=company_id, truncate=False)
+
+
+def dequeue(db: Session, company_id: int, number_ids) -> None:
+    """Drop numbers from one company's queue (they now have a call result for it)."""
+    if isinstance(number_ids, list) and not number_ids:
+        return
+    db.execute(
+        delete(CompanyDialQueue).where(
+            CompanyDialQueue.company_id == company_id,
+            CompanyDialQueue.number_id.in_(number_ids),
+        )
+    )
+
+
+def drain(db: Session, company_id: int, number_ids, attempted_at: datetime) -> None:
+    """
+    A company dialed these numbers: drop them from its queue and push every other
+    company's eligibility past the global cooldown.
+    """
+    if isinstance(number_ids, list) and not number_ids:
+        return
+    dequeue(db, company_id, number_ids)
+    cooldown_until = attempted_at + _cooldown()
+    db.execute(
+        update(CompanyDialQueue)
+        .where(
+            CompanyDialQueue.number_id.in_(number_ids),
+            CompanyDialQueue.eligible_at < cooldown_until,
+        )
+        .values(eligible_at=cooldown_until)
+    )
+
+
+def drain_many(db: Session, attempts: list[tuple[int, int, datetime]]) -> None:
+    """Set-based `drain` for many (company_id, number_id, attempted_at) reports at once."""
+    if not attempts:
+        return
+    dialed = values(column("company_id", Integer), column("number_id", Integer), name="dialed").data(
+        sorted({(company_id, number_id) for company_id, number_id, _ in attempts})
+    )
+    db.execute(
+        delete(CompanyDialQueue).where(
+            CompanyDialQueue.company_id == dialed.c.company_id,
+            CompanyDialQueue.number_id == dialed.c.number_id,
+        )
+    )
+    cooldown = _cooldown()
+    until_by_number: dict[int, datetime] = {}
+    for _, number_id, attempted_at in attempts:
+        until = attempted_at + cooldown
+        if number_id not in until_by_number or until > until_by_number[number_id]:
+            until_by_number[number_id] = until
+    cooldowns = values(
+        column("number_id", Integer), column("until", DateTime(timezone=True)), name="cooldowns"
+    ).data(sorted(until_by_number.items()))
+    until = cast(cooldowns.c.until, DateTime(timezone=True))
+    db.execute(
+        update(CompanyDialQueue)
+        .where(CompanyDialQueue.number_id == cooldowns.c.number_id, CompanyDialQueue.eligible_at < until)
+        .values(eligible_at=until)
+    )
+
+
+def rebuild(db: Session, company_id: int | None = None, truncate: bool = True) -> int:
+    """Recompute the queue from numbers + call_results (one company or all). Caller commits."""
+    if truncate:
+        stmt = delete(CompanyDialQueue)
+        if company_id is not None:
+            stmt = stmt.where(CompanyDialQueue.company_id == company_id)
+        db.execute(stmt)
+    result = db.execute(
+        text(REBUILD_SQL),
+        {
+            "company_id": company_id,
+            "cooldown_days": settings.call_cooldown_days,
+            "backfill_at": BACKFILL_ELIGIBLE_AT,
+        },
+    )
+    return result.rowcount or 0
@@ -0,0 +1,137 @@
+"""
+Per-company dialer profile (active scenarios, outbound lines, inbound/outbound agents) cached in process.
+
+Entries are keyed by `companies.profile_version`. Every write that changes the profile bumps
+that column in its own transaction and invalidates the company registry, which dialer requests
+read the version from, so all workers see the new version on their next poll.
+"""
+import threading
+from dataclasses import dataclass
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..core import events, metrics
+from ..models.company import Company
+from ..models.outbound_line import OutboundLine
+from ..models.scenario import Scenario
+from ..models.user import AdminUser, UserRole, AgentType
+from . import company_registry
+from .company_registry import CompanyEntry
+
+
+@dataclass(frozen=True)
+class DialerProfile:
+    version: int
+    active_scenarios: list[dict]
+    outbound_lines: list[dict]
+    inbound_agents: list[dict]
+    outbound_agents: list[dict]
+    # cost_per_connected of each active scenario (None = company default); not sent to dialers
+    scenario_costs: list[int | None]
+
+
+_cache_lock = threading.Lock()
+_cache: dict[int, DialerProfile] = {}
+
+
+def bump(db: Session, *company_ids: int | None) -> None:
+    """Invalidate the cached profile of these companies on every worker and wake their long-polls. Caller commits."""
+    ids = sorted({company_id for company_id in company_ids if company_id is not None})
+    if not ids:
+        return
+    db.execute(
+        update(Company)
+        .where(Company.id.in_(ids))
+        .values(profile_version=Company.profile_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    company_registry.invalidate(db)
+    for company_id in ids:
+        events.notify(db, company_id)
+
+
+def get_profile(db: Session, company: CompanyEntry) -> DialerProfile:
+    """Cached profile for `company` at its current profile_version; loads it on a version change."""
+    cached = _cache.get(company.id)
+    if cached is not None and cached.version == company.profile_version:
+        metrics.inc("dialer_profile.hits")
+        return cached
+    metrics.inc("dialer_profile.misses")
+    profile = _load(db, company)
+    with _cache_lock:
+        current = _cache.get(company.id)
+        if current is None or current.version <= profile.version:
+            _cache[company.id] = profile
+    return profile
+
+
+def etag(company: CompanyEntry) -> str:
+    """Strong validator for /api/dialer/config: the profile is fully determined by (company, version)."""
+    return f'"{company.id}-{company.profile_version}"'
+
+
+def config_payload(company: CompanyEntry, profile: DialerProfile) -> dict:
+    return {
+        "company": company.name,
+        "profile_version": profile.version,
+        "active_scenarios": profile.active_scenarios,
+        "outbound_lines": profile.outbound_lines,
+        "inbound_agents": profile.inbound_agents,
+        "outbound_agents": profile.outbound_agents,
+    }
+
+
+def clear() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _load(db: Session, company: CompanyEntry) -> DialerProfile:
+    lines = (
+        db.query(OutboundLine)
+        .filter(OutboundLine.company_id == company.id, OutboundLine.is_active == True)
+        .all()
+    )
+    agents = (
+        db.query(AdminUser)
+        .filter(
+            AdminUser.company_id == company.id,
+            AdminUser.is_active == True,
+            AdminUser.role == UserRole.AGENT,
+        )
+        .all()
+    )
+    scenarios = (
+        db.query(Scenario)
+        .filter(Scenario.company_id == company.id, Scenario.is_active == True)
+        .all()
+    )
+    return DialerProfile(
+        version=company.profile_version,
+        active_scenarios=[
+            {"id": s.id, "name": s.name, "display_name": s.display_name}
+            for s in scenarios
+        ],
+        outbound_lines=[
+            {"id": line.id, "phone_number": line.phone_number, "display_name": line.display_name}
+            for line in lines
+        ],
+        inbound_agents=[
+            _agent_entry(agent) for agent in agents
+            if agent.agent_type in (AgentType.INBOUND, AgentType.BOTH)
+        ],
+        outbound_agents=[
+            _agent_entry(agent) for agent in agents
+            if agent.agent_type in (AgentType.OUTBOUND, AgentType.BOTH)
+        ],
+        scenario_costs=[s.cost_per_connected for s in scenarios],
+    )
+
+
+def _agent_entry(agent: AdminUser) -> dict:
+    return {
+        "id": agent.id,
+        "full_name": " ".join(filter(None, [agent.first_name, agent.last_name])).strip() or agent.username,
+        "phone_number": agent.phone_number,
+    }
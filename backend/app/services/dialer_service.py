@@ -1,24 +1,41 @@
+import math
+import time
 from datetime import datetime, timezone, timedelta
 from uuid import uuid4
 
 from fastapi import HTTPException
-from sqlalchemy import select, or_
+from sqlalchemy import (
+    select, update, delete, exists, literal, literal_column, func, or_, case, tuple_, values, column, cast,
+    Integer, String, Text, DateTime,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 
 from ..core.config import get_settings
+from ..core import events, metrics
+from ..core.locks import advisory_lock
 from ..models.phone_number import PhoneNumber, CallStatus, GlobalStatus
 from ..models.dialer_batch import DialerBatch
 from ..models.call_result import CallResult, CallDirection
 from ..models.dialer_batch_item import DialerBatchItem
-from ..models.user import AdminUser, UserRole, AgentType
-from ..models.company import Company
-from ..models.scenario import Scenario
-from ..models.outbound_line import OutboundLine
+from ..models.user import AdminUser, UserRole
+from ..models.dial_queue import CompanyDialQueue
+from ..models.number_lease import NumberLease
 from ..schemas.dialer import DialerReport
-from .schedule_service import is_call_allowed, ensure_config, TEHRAN_TZ, charge_for_connected_call
-from .phone_service import normalize_phone, _sync_global_status_from_call_status
-from . import auth_service
+from .schedule_service import (
+    evaluate_schedule, ensure_config, available_balance, TEHRAN_TZ, set_call_allowed_stmt,
+    insert_default_config_stmt,
+)
+from .phone_service import normalize_phone, _global_status_for
+from . import (
+    auth_service,
+    company_registry,
+    dial_queue_service,
+    dialer_profile_service,
+    number_state_service,
+    wallet_charge_service,
+)
+from .company_registry import CompanyEntry
 
 settings = get_settings()
 
@@ -34,12 +51,28 @@ BILLABLE_STATUSES = {
 
 # NOT billable: MISSED, BUSY, POWER_OFF, INBOUND_CALL, IN_QUEUE, BANNED
 
+# Wallet-aware sizing: with fewer recent attempts than this, every call is assumed billable;
+# the ratio floor keeps a run of unanswered calls from lifting the cap entirely.
+BILLABLE_RATIO_MIN_SAMPLE = 50
+BILLABLE_RATIO_FLOOR = 0.05
+
+# company_id -> (expires_at monotonic, billable ratio)
+_billable_ratio_cache: dict[int, tuple[float, float]] = {}
+
+# Upper bound of SQL statements (excluding COMMIT) issued by one report_result call; see its docstring.
+REPORT_STATEMENT_BUDGET = 10
+
+# ON CONFLICT target of report inserts (ux_call_results_company_report_id). call_results is
+# partitioned on attempted_at, so the key includes it; a replay resends the same attempted_at.
+REPORT_KEY = [CallResult.company_id, CallResult.report_id, CallResult.attempted_at]
+
 
 def fetch_next_batch(
     db: Session,
-    company: Company,
+    company: CompanyEntry,
     size: int | None = None,
     active_lines_count: int | None = None,
+    slim: bool = False,
 ):
     """
     Fetch next batch for a company with:
@@ -49,27 +82,26 @@ def fetch_next_batch(
     """
     config = ensure_config(db, company_id=company.id)
     now = datetime.now(TEHRAN_TZ)
-    allowed, reason, retry_after = is_call_allowed(now, db, company_id=company.id)
+    decision = evaluate_schedule(now, db, company_id=company.id, config=config)
 
-    if not allowed:
+    if not decision.allowed:
         return {
             "call_allowed": False,
             "timezone": settings.timezone,
             "server_time": now,
             "schedule_version": config.version,
-            "reason": reason,
-            "retry_after_seconds": retry_after,
+            "profile_version": company.profile_version,
+            "reason": decision.reason,
+            "retry_after_seconds": decision.retry_after_seconds,
             "active_scenarios": [],
             "outbound_lines": [],
             "inbound_agents": [],
             "outbound_agents": [],
         }
 
-    active_outbound_lines = db.query(OutboundLine).filter(
-        OutboundLine.company_id == company.id,
-        OutboundLine.is_active == True
-    ).all()
-    company_active_lines_count = len(active_outbound_lines)
+    # Scenarios, lines and agents come from the version-keyed profile cache.
+    profile = dialer_profile_service.get_profile(db, company)
+    company_active_lines_count = len(profile.outbound_lines)
     if active_lines_count is None:
         effective_lines_count = company_active_lines_count
     else:
@@ -85,316 +117,779 @@ def fetch_next_batch(
     if settings.max_batch_size > 0:
         requested_size = min(requested_size, settings.max_batch_size)
 
-    unlock_stale_assignments(db)
+    # Do not lease numbers the wallet cannot pay for.
+    affordable_size = _affordable_batch_size(db, company.id, config, profile.scenario_costs)
+    if affordable_size is not None and affordable_size < requested_size:
+        requested_size = affordable_size
+        metrics.inc("dialer.batches_capped_by_wallet")
 
-    # Calculate cooldown cutoff
-    cooldown_cutoff = datetime.now(timezone.utc) - timedelta(days=settings.call_cooldown_days)
-
-    # OPTIMIZED: Use NOT EXISTS instead of NOT IN for better performance
-    # NOT EXISTS works with FOR UPDATE (unlike LEFT JOIN)
-    stmt = (
-        select(PhoneNumber)
-        .where(
-            # Global status must be ACTIVE
-            PhoneNumber.global_status == GlobalStatus.ACTIVE,
-            # Number not assigned to any batch currently
-            PhoneNumber.assigned_at.is_(None),
-            # Never called by this company - use NOT EXISTS with indexed lookup
-            ~select(CallResult.id)
-            .where(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == company.id
-            )
-            .exists(),
-            # Global 3-day cooldown (across all companies)
-            or_(
-                PhoneNumber.last_called_at.is_(None),
-                PhoneNumber.last_called_at < cooldown_cutoff
-            ),
-        )
-        .order_by(PhoneNumber.id)
-        .limit(requested_size)
-        .with_for_update(skip_locked=True)
-    )
-
-    numbers = db.execute(stmt).scalars().all()
     batch_id = uuid4().hex
     now_utc = datetime.now(timezone.utc)
-
-    for num in numbers:
-        num.assigned_at = now_utc
-        num.assigned_batch_id = batch_id
-        db.add(
-            DialerBatchItem(
-                batch_id=batch_id,
-                company_id=company.id,
-                phone_number_id=num.id,
-                assigned_at=now_utc,
-            )
-        )
-
-    db.add(
-        DialerBatch(
-            id=batch_id,
+    numbers = db.execute(
+        _build_reservation_stmt(
+            company_id=company.id,
+            batch_id=batch_id,
             requested_size=requested_size,
-            returned_size=len(numbers),
+            now_utc=now_utc,
         )
-    )
-    db.commit()
-
-    # Get split agent lists
-    inbound_agents = db.query(AdminUser).filter(
-        AdminUser.company_id == company.id,
-        AdminUser.is_active == True,
-        AdminUser.role == UserRole.AGENT,
-        AdminUser.agent_type.in_([AgentType.INBOUND, AgentType.BOTH])
-    ).all()
-
-    outbound_agents = db.query(AdminUser).filter(
-        AdminUser.company_id == company.id,
-        AdminUser.is_active == True,
-        AdminUser.role == UserRole.AGENT,
-        AdminUser.agent_type.in_([AgentType.OUTBOUND, AgentType.BOTH])
     ).all()
+    db.commit()
 
-    # Get active scenarios
-    active_scenarios = db.query(Scenario).filter(
-        Scenario.company_id == company.id,
-        Scenario.is_active == True
-    ).all()
+    batch = {
+        "batch_id": batch_id,
+        "size_requested": requested_size,
+        "size_returned": len(numbers),
+        "lease_expires_at": _lease_expiry(now_utc),
+        "numbers": [
+            {"id": num.id, "phone_number": num.phone_number}
+            for num in numbers
+        ],
+    }
+    if slim:
+        # Dialers fetch the lists from /api/dialer/config when profile_version changes.
+        return {
+            "call_allowed": True,
+            "schedule_version": config.version,
+            "profile_version": profile.version,
+            "window_closes_in_seconds": decision.window_closes_in_seconds,
+            "batch": batch,
+        }
     return {
         "call_allowed": True,
         "timezone": settings.timezone,
         "server_time": now,
         "schedule_version": config.version,
-        "active_scenarios": [
-            {"id": s.id, "name": s.name, "display_name": s.display_name}
-            for s in active_scenarios
-        ],
-        "outbound_lines": [
-            {"id": line.id, "phone_number": line.phone_number, "display_name": line.display_name}
-            for line in active_outbound_lines
-        ],
-        "inbound_agents": [
-            {
-                "id": agent.id,
-                "full_name": " ".join(filter(None, [agent.first_name, agent.last_name])).strip() or agent.username,
-                "phone_number": agent.phone_number,
-            }
-            for agent in inbound_agents
-        ],
-        "outbound_agents": [
-            {
-                "id": agent.id,
-                "full_name": " ".join(filter(None, [agent.first_name, agent.last_name])).strip() or agent.username,
-                "phone_number": agent.phone_number,
-            }
-            for agent in outbound_agents
-        ],
-        "batch": {
-            "batch_id": batch_id,
-            "size_requested": requested_size,
-            "size_returned": len(numbers),
-            "numbers": [
-                {"id": num.id, "phone_number": num.phone_number}
-                for num in numbers
-            ],
-        },
+        "profile_version": profile.version,
+        "window_closes_in_seconds": decision.window_closes_in_seconds,
+        "active_scenarios": profile.active_scenarios,
+        "outbound_lines": profile.outbound_lines,
+        "inbound_agents": profile.inbound_agents,
+        "outbound_agents": profile.outbound_agents,
+        "batch": batch,
     }
 
 
-def report_result(db: Session, report: DialerReport, company: Company):
+def _affordable_batch_size(db: Session, company_id: int, config, scenario_costs: list[int | None]) -> int | None:
+    """
+    Numbers the wallet can pay for: spendable balance / cost per billable call / recent billable ratio.
+
+    The dialer picks the scenario per call, so the most expensive active scenario (or the company
+    cost) is assumed. Returns None when calls cost nothing.
+    """
+    default_cost = config.cost_per_connected or 0
+    cost = max(
+        [cost if cost is not None else default_cost for cost in scenario_costs] or [default_cost]
+    )
+    if cost <= 0:
+        return None
+    balance = available_balance(db, company_id, config.wallet_balance)
+    if balance <= 0:
+        return 0
+    return max(math.ceil(balance / cost / _billable_ratio(db, company_id)), 1)
+
+
+def _billable_ratio(db: Session, company_id: int) -> float:
+    """Share of the company's attempts in the last BILLABLE_RATIO_WINDOW_HOURS that were billable (cached)."""
+    now = time.monotonic()
+    cached = _billable_ratio_cache.get(company_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    since = datetime.now(timezone.utc) - timedelta(hours=settings.billable_ratio_window_hours)
+    # Served by ix_call_results_company_status_attempted.
+    billable, total = db.execute(
+        select(
+            func.count().filter(CallResult.status.in_([status.value for status in BILLABLE_STATUSES])),
+            func.count(),
+        ).where(CallResult.company_id == company_id, CallResult.attempted_at >= since)
+    ).one()
+    ratio = max(billable / total, BILLABLE_RATIO_FLOOR) if total >= BILLABLE_RATIO_MIN_SAMPLE else 1.0
+    _billable_ratio_cache[company_id] = (now + settings.billable_ratio_cache_seconds, ratio)
+    return ratio
+
+
+def _lease_expiry(now_utc: datetime) -> datetime:
+    return now_utc + timedelta(minutes=settings.assignment_timeout_minutes)
+
+
+def _build_reservation_stmt(*, company_id: int, batch_id: str, requested_size: int, now_utc: datetime):
     """
-    Process call result:
-    1. Update number's global last_called fields
-    2. Set global_status if POWER_OFF or COMPLAINED
-    3. Create CallResult record with company, scenario, line
-    4. Charge billing if status is billable
+    Claim a whole batch in one round trip without touching the numbers table.
+
+    candidates: an index range scan over this company's dial queue, skipping numbers that
+                already hold a lease; queue rows are locked with SKIP LOCKED so concurrent
+                pollers of the same company never overlap
+    claimed:    INSERT INTO number_leases ... ON CONFLICT DO NOTHING RETURNING number_id
+                (the primary key settles races between different companies)
+    items:      one dialer_batch_items trace row per claimed number
+    batch:      the dialer_batches header with the real returned size
+    """
+    # Company dedup and the global cooldown are both encoded in company_dial_queue
+    # (row present = never called by this company, eligible_at = cooldown end).
+    candidates = (
+        select(CompanyDialQueue.number_id.label("id"))
+        .join(PhoneNumber, PhoneNumber.id == CompanyDialQueue.number_id)
+        .where(
+            CompanyDialQueue.company_id == company_id,
+            CompanyDialQueue.eligible_at <= now_utc,
+            # Global status must be ACTIVE
+            PhoneNumber.global_status == GlobalStatus.ACTIVE,
+            # Number not leased to any batch currently
+            ~exists().where(NumberLease.number_id == CompanyDialQueue.number_id),
+        )
+        .order_by(CompanyDialQueue.eligible_at, CompanyDialQueue.number_id)
+        .limit(requested_size)
+        .with_for_update(of=CompanyDialQueue, skip_locked=True)
+        .cte("candidates")
+    )
+    expires_at = _lease_expiry(now_utc)
+    claimed = (
+        insert(NumberLease)
+        .from_select(
+            ["number_id", "company_id", "batch_id", "leased_at", "expires_at"],
+            select(candidates.c.id, literal(company_id), literal(batch_id), literal(now_utc), literal(expires_at)),
+        )
+        .on_conflict_do_nothing(index_elements=[NumberLease.number_id])
+        .returning(NumberLease.number_id)
+        .cte("claimed")
+    )
+    items = (
+        insert(DialerBatchItem)
+        .from_select(
+            ["batch_id", "company_id", "phone_number_id", "assigned_at"],
+            select(literal(batch_id), literal(company_id), claimed.c.number_id, literal(now_utc)),
+        )
+        .cte("items")
+    )
+    batch = (
+        insert(DialerBatch)
+        .from_select(
+            ["id", "requested_size", "returned_size"],
+            select(literal(batch_id), literal(requested_size), func.count()).select_from(claimed),
+        )
+        .cte("batch")
+    )
+    return (
+        select(PhoneNumber.id, PhoneNumber.phone_number)
+        .join(claimed, claimed.c.number_id == PhoneNumber.id)
+        .add_cte(items)
+        .add_cte(batch)
+        .order_by(PhoneNumber.id)
+    )
+
+
+def report_result(db: Session, report: DialerReport, company: CompanyEntry):
+    """
+    Process call result in one transaction with at most REPORT_STATEMENT_BUDGET (10) statements:
+
+    1. agent lookup (only when agent_id/agent_phone is sent)
+    2. number upsert: INSERT ... ON CONFLICT (phone_number) DO UPDATE ... RETURNING, which also
+       writes last_called_* and the shared global_status (UPDATE by id when only number_id is usable)
+    3. call_results INSERT ... ON CONFLICT (company_id, report_id, attempted_at) DO NOTHING, run as
+       a CTE of the company_number_state upsert, RETURNING the call id
+       (a replayed report_id rolls everything back and returns the original response)
+    4. lease release: DELETE ... RETURNING batch_id
+    5-6. dial queue drain (delete + cooldown push); a number the upsert just created has no lease
+       or queue rows, so 4-6 become one INSERT queueing it for every other company instead
+    7. trace: UPDATE the best dialer_batch_items row, chosen by one ordered subquery
+       (reported batch, then leased batch, then latest), RETURNING id
+    8. trace INSERT when no row matched
+    9. call_allowed toggle (only when sent)
+    10. wallet_charges ledger INSERT (only for billable statuses; the settler applies it to the balance)
+    then COMMIT. A company without a schedule_configs row costs one extra INSERT ... ON CONFLICT
+    DO NOTHING for the toggle the first time.
     """
     normalized_phone = normalize_phone(report.phone_number) if report.phone_number else None
     if not normalized_phone and report.number_id is None:
         raise HTTPException(status_code=400, detail="phone_number or number_id is required")
 
-    number: PhoneNumber | None = None
-    if report.number_id is not None:
-        number = db.get(PhoneNumber, report.number_id)
-        if number and normalized_phone and number.phone_number != normalized_phone:
-            number = None
+    agent = _resolve_agent(db, report, company)
 
-    if not number:
-        if not normalized_phone:
-            raise HTTPException(status_code=404, detail="Number not found")
-        number = (
-            db.query(PhoneNumber)
-            .filter(PhoneNumber.phone_number == normalized_phone)
-            .with_for_update(skip_locked=True)
-            .first()
+    global_status = _global_status_for(report.status)
+    if normalized_phone:
+        stmt = insert(PhoneNumber).values(
+            phone_number=normalized_phone,
+            global_status=global_status,
+            last_called_at=report.attempted_at,
+            last_called_company_id=company.id,
         )
-
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PhoneNumber.phone_number],
+            set_={
+                "global_status": stmt.excluded.global_status,
+                "last_called_at": stmt.excluded.last_called_at,
+                "last_called_company_id": stmt.excluded.last_called_company_id,
+            },
+        )
+    else:
+        stmt = (
+            update(PhoneNumber)
+            .where(PhoneNumber.id == report.number_id)
+            .values(global_status=global_status, last_called_at=report.attempted_at, last_called_company_id=company.id)
+        )
+    # xmax is 0 only on a row version this statement inserted (not on one it updated).
+    inserted = literal_column("xmax = 0") if normalized_phone else literal(False)
+    number = db.execute(
+        stmt.returning(PhoneNumber.id, PhoneNumber.phone_number, PhoneNumber.global_status, inserted.label("inserted"))
+    ).one_or_none()
     if not number:
-        # Auto-create number if it doesn't exist
-        try:
-            number = PhoneNumber(
-                phone_number=normalized_phone,
-                global_status=GlobalStatus.ACTIVE,
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Number not found")
+    response = {
+        "id": number.id,
+        "global_status": number.global_status.value,
+        "phone_number": number.phone_number,
+    }
+
+    # Create call result (and its company_number_state row in the same statement); with a
+    # report_id, a replay conflicts here and nothing is kept.
+    call_direction = CallDirection.INBOUND if report.number_id is None else CallDirection.OUTBOUND
+    call_result_id = db.execute(
+        number_state_service.record_call_stmt(
+            insert(CallResult)
+            .values(
+                phone_number_id=number.id,
+                company_id=company.id,
+                scenario_id=report.scenario_id,
+                outbound_line_id=report.outbound_line_id,
+                call_direction=call_direction.value,
+                status=report.status.value,
+                reason=report.reason,
+                attempted_at=report.attempted_at,
+                agent_id=agent.id if agent else None,
+                user_message=report.user_message,
+                report_id=report.report_id,
             )
-            db.add(number)
-            db.commit()
-            db.refresh(number)
-        except IntegrityError:
-            db.rollback()
-            number = (
-                db.query(PhoneNumber)
-                .filter(PhoneNumber.phone_number == normalized_phone)
-                .with_for_update(skip_locked=True)
-                .first()
+            .on_conflict_do_nothing(
+                index_elements=REPORT_KEY,
+                index_where=CallResult.report_id.is_not(None),
             )
-        if not number:
-            raise HTTPException(status_code=404, detail="Number not found")
-
-    agent = _resolve_agent(db, report, company)
+        )
+    ).scalar_one_or_none()
+    if call_result_id is None:
+        # Replay of an applied report: answer like the original call without keeping any change.
+        db.rollback()
+        metrics.inc("dialer.report_replays")
+        return response
+
+    if number.inserted:
+        # First seen in this report: no lease to release, and the other companies' queues need it.
+        leased_batch_id = None
+        dial_queue_service.enqueue_reported(db, [number.id], [(company.id, number.id, report.attempted_at)])
+    else:
+        # Release the lease; its batch id is the fallback for locating the trace row.
+        leased_batch_id = db.execute(
+            delete(NumberLease).where(NumberLease.number_id == number.id).returning(NumberLease.batch_id)
+        ).scalar_one_or_none()
+        dial_queue_service.drain(db, company.id, [number.id], attempted_at=report.attempted_at)
+
+    report_fields = {
+        "reported_at": datetime.now(timezone.utc),
+        "report_batch_id": report.batch_id,
+        "report_call_result_id": call_result_id,
+        "report_attempted_at": report.attempted_at,
+        "report_status": report.status.value,
+        "report_scenario_id": report.scenario_id,
+        "report_outbound_line_id": report.outbound_line_id,
+        "report_reason": report.reason,
+    }
+    trace_id = db.execute(
+        update(DialerBatchItem)
+        .where(DialerBatchItem.id == _trace_item_subquery(company.id, number.id, report.batch_id, leased_batch_id))
+        .values(**report_fields)
+        .returning(DialerBatchItem.id)
+    ).scalar_one_or_none()
+    if trace_id is None:
+        db.execute(
+            insert(DialerBatchItem).values(
+                batch_id=report.batch_id or leased_batch_id or f"unknown-{uuid4().hex[:12]}",
+                company_id=company.id,
+                phone_number_id=number.id,
+                assigned_at=report.attempted_at,
+                **report_fields,
+            )
+        )
 
-    # Update schedule config if call_allowed changed
     if report.call_allowed is not None:
-        config = ensure_config(db, company_id=company.id)
-        if config.enabled != report.call_allowed:
-            config.enabled = report.call_allowed
-            config.version += 1
-        config.disabled_by_dialer = not report.call_allowed
+        _execute_on_config(db, company.id, set_call_allowed_stmt(company.id, report.call_allowed))
 
-    assigned_batch_snapshot = number.assigned_batch_id
+    # Charge billing only for billable statuses
+    if report.status in BILLABLE_STATUSES:
+        wallet_charge_service.record_charges(db, [(company.id, call_result_id, report.scenario_id)])
 
-    # Update global tracking on the number
-    number.last_called_at = report.attempted_at
-    number.last_called_company_id = company.id
-    number.assigned_at = None
-    number.assigned_batch_id = None
+    db.commit()
+    return response
 
-    # Set shared/global status on numbers table for statuses that apply to all companies
-    _sync_global_status_from_call_status(number, report.status)
 
-    # Create call result
-    call_direction = CallDirection.INBOUND if report.number_id is None else CallDirection.OUTBOUND
-    call_result = CallResult(
-        phone_number_id=number.id,
-        company_id=company.id,
-        scenario_id=report.scenario_id,
-        outbound_line_id=report.outbound_line_id,
-        call_direction=call_direction,
-        status=report.status.value,
-        reason=report.reason,
-        attempted_at=report.attempted_at,
-        agent_id=agent.id if agent else None,
-        user_message=report.user_message,
-    )
-    db.add(call_result)
-    db.flush()
+def _insert_call_results(db: Session, rows: dict[int, dict]) -> dict[int, int]:
+    """
+    Insert call_results rows keyed by report index and return {index: call_result_id}.
 
-    now_utc = datetime.now(timezone.utc)
-    batch_item = None
-    if report.batch_id:
-        batch_item = (
-            db.query(DialerBatchItem)
-            .filter(
-                DialerBatchItem.batch_id == report.batch_id,
-                DialerBatchItem.company_id == company.id,
-                DialerBatchItem.phone_number_id == number.id,
-            )
-            .order_by(DialerBatchItem.id.desc())
-            .first()
-        )
-    if not batch_item and assigned_batch_snapshot:
-        batch_item = (
-            db.query(DialerBatchItem)
-            .filter(
-                DialerBatchItem.batch_id == assigned_batch_snapshot,
-                DialerBatchItem.company_id == company.id,
-                DialerBatchItem.phone_number_id == number.id,
-            )
-            .order_by(DialerBatchItem.id.desc())
-            .first()
-        )
-    if not batch_item:
-        batch_item = (
-            db.query(DialerBatchItem)
-            .filter(
-                DialerBatchItem.company_id == company.id,
-                DialerBatchItem.phone_number_id == number.id,
+    Rows with a report_id go through ON CONFLICT (company_id, report_id, attempted_at) DO NOTHING
+    and are matched back by (company_id, report_id), unique within the request; an index missing
+    from the result was already applied. Rows without one cannot conflict and keep the
+    input-ordered multi-row insert.
+    """
+    ids: dict[int, int] = {}
+    plain = [i for i, row in rows.items() if row["report_id"] is None]
+    if plain:
+        inserted = db.execute(
+            insert(CallResult).returning(CallResult.id, sort_by_parameter_order=True),
+            [rows[i] for i in plain],
+        ).scalars().all()
+        ids.update(zip(plain, inserted))
+    index_by_key = {(row["company_id"], row["report_id"]): i for i, row in rows.items() if row["report_id"] is not None}
+    if index_by_key:
+        inserted = db.execute(
+            insert(CallResult)
+            .values([rows[i] for i in index_by_key.values()])
+            .on_conflict_do_nothing(
+                index_elements=REPORT_KEY,
+                index_where=CallResult.report_id.is_not(None),
             )
-            .order_by(DialerBatchItem.id.desc())
-            .first()
-        )
-    if not batch_item:
-        batch_item = DialerBatchItem(
-            batch_id=report.batch_id or assigned_batch_snapshot or f"unknown-{uuid4().hex[:12]}",
-            company_id=company.id,
-            phone_number_id=number.id,
-            assigned_at=report.attempted_at,
-        )
-        db.add(batch_item)
+            .returning(CallResult.id, CallResult.company_id, CallResult.report_id)
+        ).all()
+        for row in inserted:
+            ids[index_by_key[(row.company_id, row.report_id)]] = row.id
+    return ids
+
+
+def _trace_item_subquery(company_id: int, number_id: int, report_batch_id: str | None, leased_batch_id: str | None):
+    """Scalar subquery picking the trace row to report on: reported batch, then leased batch, then latest."""
+    priority = []
+    if report_batch_id:
+        priority.append(case((DialerBatchItem.batch_id == report_batch_id, 0), else_=1))
+    if leased_batch_id:
+        priority.append(case((DialerBatchItem.batch_id == leased_batch_id, 0), else_=1))
+    return (
+        select(DialerBatchItem.id)
+        .where(DialerBatchItem.company_id == company_id, DialerBatchItem.phone_number_id == number_id)
+        .order_by(*priority, DialerBatchItem.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
 
-    batch_item.reported_at = now_utc
-    batch_item.report_batch_id = report.batch_id
-    batch_item.report_call_result_id = call_result.id
-    batch_item.report_attempted_at = report.attempted_at
-    batch_item.report_status = report.status.value
-    batch_item.report_scenario_id = report.scenario_id
-    batch_item.report_outbound_line_id = report.outbound_line_id
-    batch_item.report_reason = report.reason
 
-    db.commit()
+def _execute_on_config(db: Session, company_id: int, stmt) -> None:
+    """Run an UPDATE against the company's schedule config, creating the default row first if missing."""
+    if db.execute(stmt).first() is None:
+        db.execute(insert_default_config_stmt(company_id))
+        db.execute(stmt)
 
-    # Charge billing only for billable statuses
-    if report.status in BILLABLE_STATUSES:
-        charge_for_connected_call(db, company_id=company.id, scenario_id=report.scenario_id)
 
-    db.refresh(number)
-    return {
-        "id": number.id,
-        "global_status": number.global_status.value,
-        "phone_number": number.phone_number,
+def report_results(db: Session, reports: list[DialerReport]) -> list[dict]:
+    """
+    Set-based variant of `report_result` for many reports in one request.
+
+    Per-item problems (unknown company, bad phone, inactive agent) are returned in that item's
+    result and the item is skipped; everything else is written with a fixed number of statements:
+    one IN lookup per key type, one multi-row insert per table (two for call_results when some
+    reports carry a report_id and some do not) and UPDATE ... FROM (VALUES ...) for numbers and
+    dialer_batch_items. Wallet charges go to the ledger in one insert.
+    """
+    if len(reports) > settings.max_report_batch_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.max_report_batch_size} reports per request",
+        )
+    results: list[dict] = [{"index": i, "ok": False} for i in range(len(reports))]
+    if not reports:
+        return results
+
+    def fail(i: int, detail: str) -> None:
+        results[i]["error"] = detail
+
+    # Companies (from the in-process registry)
+    companies = {
+        name: entry
+        for name in {r.company for r in reports}
+        if (entry := company_registry.get_by_name(db, name)) is not None
     }
+    pending: list[int] = []
+    phones: dict[int, str | None] = {}
+    for i, report in enumerate(reports):
+        if report.company not in companies:
+            fail(i, "Company not found")
+            continue
+        phones[i] = normalize_phone(report.phone_number) if report.phone_number else None
+        if not phones[i] and report.number_id is None:
+            fail(i, "phone_number or number_id is required")
+            continue
+        pending.append(i)
+
+    # Numbers: by normalized phone, falling back to number_id when the phone is unusable
+    wanted_phones = {phones[i] for i in pending if phones[i]}
+    by_phone = {
+        n.phone_number: n for n in db.query(PhoneNumber).filter(PhoneNumber.phone_number.in_(sorted(wanted_phones))).all()
+    } if wanted_phones else {}
+    missing_phones = sorted(p for p in wanted_phones if p not in by_phone)
+    new_number_ids: list[int] = []
+    if missing_phones:
+        # Auto-create numbers that do not exist yet (same as the single report path)
+        new_number_ids = db.execute(
+            insert(PhoneNumber)
+            .values([{"phone_number": p, "global_status": GlobalStatus.ACTIVE} for p in missing_phones])
+            .on_conflict_do_nothing(index_elements=[PhoneNumber.phone_number])
+            .returning(PhoneNumber.id)
+        ).scalars().all()
+        for n in db.query(PhoneNumber).filter(PhoneNumber.phone_number.in_(missing_phones)).all():
+            by_phone[n.phone_number] = n
+    wanted_ids = {reports[i].number_id for i in pending if not phones[i]}
+    by_id = {
+        n.id: n for n in db.query(PhoneNumber).filter(PhoneNumber.id.in_(sorted(wanted_ids))).all()
+    } if wanted_ids else {}
+
+    numbers: dict[int, PhoneNumber] = {}
+    for i in list(pending):
+        number = by_phone.get(phones[i]) if phones[i] else by_id.get(reports[i].number_id)
+        if not number:
+            fail(i, "Number not found")
+            pending.remove(i)
+            continue
+        numbers[i] = number
+
+    # Agents (one lookup covering ids and phones)
+    agent_ids = {reports[i].agent_id for i in pending if reports[i].agent_id is not None}
+    agent_phones = {
+        normalize_phone(reports[i].agent_phone) for i in pending if reports[i].agent_phone
+    } - {None}
+    agents_by_id: dict[int, AdminUser] = {}
+    agents_by_phone: dict[tuple[int | None, str], AdminUser] = {}
+    if agent_ids or agent_phones:
+        for agent in db.query(AdminUser).filter(
+            or_(AdminUser.id.in_(sorted(agent_ids)), AdminUser.phone_number.in_(sorted(agent_phones)))
+        ).all():
+            agents_by_id[agent.id] = agent
+            if agent.phone_number:
+                agents_by_phone[(agent.company_id, agent.phone_number)] = agent
+    agents: dict[int, AdminUser | None] = {}
+    for i in list(pending):
+        report, company = reports[i], companies[reports[i].company]
+        agent = agents_by_id.get(report.agent_id) if report.agent_id is not None else None
+        if agent and agent.company_id != company.id:
+            agent = None
+        agent_phone = normalize_phone(report.agent_phone) if report.agent_phone else None
+        if not agent and agent_phone:
+            agent = agents_by_phone.get((company.id, agent_phone))
+        if agent and agent.role != UserRole.AGENT:
+            agent = None
+        if agent and not agent.is_active:
+            fail(i, "Agent is inactive")
+            pending.remove(i)
+            continue
+        agents[i] = agent
+
+    def replayed(i: int) -> None:
+        pending.remove(i)
+        metrics.inc("dialer.report_replays")
+        results[i].update({
+            "ok": True,
+            "id": numbers[i].id,
+            "global_status": numbers[i].global_status.value,
+            "phone_number": numbers[i].phone_number,
+        })
+
+    # Idempotency: reports whose report_id was already applied (or repeated within this request)
+    # are answered from the recorded number without any side effects.
+    keys = {(companies[reports[i].company].id, reports[i].report_id) for i in pending if reports[i].report_id}
+    applied: set[tuple[int, str]] = set()
+    if keys:
+        applied = set(
+            db.query(CallResult.company_id, CallResult.report_id)
+            .filter(tuple_(CallResult.company_id, CallResult.report_id).in_(sorted(keys)))
+            .all()
+        )
+    for i in list(pending):
+        if not reports[i].report_id:
+            continue
+        key = (companies[reports[i].company].id, reports[i].report_id)
+        if key in applied:
+            replayed(i)
+        else:
+            applied.add(key)
+
+    # call_results go first: a report_id applied by a request still in flight when the check above
+    # ran (a dialer retrying after a timeout) conflicts here, and that report becomes a replay
+    # before anything else is written for it.
+    call_result_by_index = _insert_call_results(
+        db,
+        {
+            i: {
+                "phone_number_id": numbers[i].id,
+                "company_id": companies[reports[i].company].id,
+                "scenario_id": reports[i].scenario_id,
+                "outbound_line_id": reports[i].outbound_line_id,
+                "call_direction": (
+                    CallDirection.INBOUND if reports[i].number_id is None else CallDirection.OUTBOUND
+                ).value,
+                "status": reports[i].status.value,
+                "reason": reports[i].reason,
+                "attempted_at": reports[i].attempted_at,
+                "agent_id": agents[i].id if agents[i] else None,
+                "user_message": reports[i].user_message,
+                "report_id": reports[i].report_id,
+            }
+            for i in pending
+        },
+    )
+    for i in list(pending):
+        if i not in call_result_by_index:
+            replayed(i)
+    number_state_service.record_calls(
+        db,
+        [
+            (
+                companies[reports[i].company].id,
+                numbers[i].id,
+                call_result_by_index[i],
+                reports[i].status.value,
+                reports[i].attempted_at,
+                agents[i].id if agents[i] else None,
+            )
+            for i in pending
+        ],
+    )
 
+    if not pending:
+        dial_queue_service.enqueue_reported(db, new_number_ids, [])
+        db.commit()
+        return results
+
+    # call_allowed toggles: the last report per company wins
+    toggles: dict[int, bool] = {}
+    for i in pending:
+        if reports[i].call_allowed is not None:
+            toggles[companies[reports[i].company].id] = reports[i].call_allowed
+    for company_id, call_allowed in sorted(toggles.items()):
+        _execute_on_config(db, company_id, set_call_allowed_stmt(company_id, call_allowed))
+
+    # Release leases; their batch ids are the fallback for locating trace rows
+    lease_batches = dict(
+        db.execute(
+            delete(NumberLease)
+            .where(NumberLease.number_id.in_(sorted({numbers[i].id for i in pending})))
+            .returning(NumberLease.number_id, NumberLease.batch_id)
+        ).all()
+    )
 
-def unlock_stale_assignments(db: Session) -> int:
-    """Unlock numbers that have been assigned for too long"""
-    cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.assignment_timeout_minutes)
-    stale = (
-        db.query(PhoneNumber)
-        .filter(
-            PhoneNumber.assigned_at.is_not(None),
-            PhoneNumber.assigned_at <= cutoff,
+    # numbers: last report per number wins (reports arrive in dialing order)
+    final_status: dict[int, GlobalStatus] = {}
+    number_rows: dict[int, tuple] = {}
+    for i in pending:
+        report, number = reports[i], numbers[i]
+        final_status[number.id] = _global_status_for(report.status)
+        number_rows[number.id] = (
+            number.id,
+            report.attempted_at,
+            companies[report.company].id,
+            final_status[number.id].value,
         )
-        .all()
+    number_values = values(
+        column("id", Integer),
+        column("attempted_at", DateTime(timezone=True)),
+        column("company_id", Integer),
+        column("global_status", String),
+        name="reported",
+    ).data(list(number_rows.values()))
+    db.execute(
+        update(PhoneNumber)
+        .where(PhoneNumber.id == number_values.c.id)
+        .values(
+            last_called_at=cast(number_values.c.attempted_at, DateTime(timezone=True)),
+            last_called_company_id=number_values.c.company_id,
+            global_status=cast(number_values.c.global_status, PhoneNumber.__table__.c.global_status.type),
+        )
+        .execution_options(synchronize_session=False)
     )
-    for num in stale:
-        num.assigned_at = None
-        num.assigned_batch_id = None
-    if stale:
-        db.commit()
-    return len(stale)
 
+    attempts = [(companies[reports[i].company].id, numbers[i].id, reports[i].attempted_at) for i in pending]
+    dial_queue_service.drain_many(db, attempts)
+    # Numbers created above are in no queue yet; the companies that did not just call them get them.
+    dial_queue_service.enqueue_reported(db, new_number_ids, attempts)
+
+    # dialer_batch_items: same lookup order as the single path, resolved from one query
+    pairs = {(companies[reports[i].company].id, numbers[i].id) for i in pending}
+    items_by_pair: dict[tuple[int, int], list[tuple[int, str]]] = {}
+    for item_id, batch_id, company_id, number_id in (
+        db.query(
+            DialerBatchItem.id,
+            DialerBatchItem.batch_id,
+            DialerBatchItem.company_id,
+            DialerBatchItem.phone_number_id,
+        )
+        .filter(tuple_(DialerBatchItem.company_id, DialerBatchItem.phone_number_id).in_(sorted(pairs)))
+        .order_by(DialerBatchItem.id.desc())
+        .all()
+    ):
+        items_by_pair.setdefault((company_id, number_id), []).append((item_id, batch_id))
 
-def _resolve_agent(db: Session, report: DialerReport, company: Company) -> AdminUser | None:
-    """Resolve agent from report, ensuring they belong to the company"""
-    agent: AdminUser | None = None
+    now_utc = datetime.now(timezone.utc)
+    item_updates: dict[int, tuple] = {}
+    new_items: list[dict] = []
+    for i in pending:
+        report = reports[i]
+        company_id, number_id = companies[report.company].id, numbers[i].id
+        candidates = items_by_pair.get((company_id, number_id), [])
+        lease_batch = lease_batches.get(number_id)
+        item_id = next((iid for iid, bid in candidates if report.batch_id and bid == report.batch_id), None)
+        if item_id is None:
+            item_id = next((iid for iid, bid in candidates if lease_batch and bid == lease_batch), None)
+        if item_id is None and candidates:
+            item_id = candidates[0][0]
+        report_fields = {
+            "reported_at": now_utc,
+            "report_batch_id": report.batch_id,
+            "report_call_result_id": call_result_by_index[i],
+            "report_attempted_at": report.attempted_at,
+            "report_status": report.status.value,
+            "report_scenario_id": report.scenario_id,
+            "report_outbound_line_id": report.outbound_line_id,
+            "report_reason": report.reason,
+        }
+        if item_id is None:
+            new_items.append({
+                "batch_id": report.batch_id or lease_batch or f"unknown-{uuid4().hex[:12]}",
+                "company_id": company_id,
+                "phone_number_id": number_id,
+                "assigned_at": report.attempted_at,
+                **report_fields,
+            })
+        else:
+            item_updates[item_id] = (item_id, *report_fields.values())
+    if item_updates:
+        item_values = values(
+            column("id", Integer),
+            column("reported_at", DateTime(timezone=True)),
+            column("report_batch_id", String),
+            column("report_call_result_id", Integer),
+            column("report_attempted_at", DateTime(timezone=True)),
+            column("report_status", String),
+            column("report_scenario_id", Integer),
+            column("report_outbound_line_id", Integer),
+            column("report_reason", Text),
+            name="reported_items",
+        ).data(list(item_updates.values()))
+        db.execute(
+            update(DialerBatchItem)
+            .where(DialerBatchItem.id == item_values.c.id)
+            .values(
+                reported_at=cast(item_values.c.reported_at, DateTime(timezone=True)),
+                report_batch_id=cast(item_values.c.report_batch_id, String),
+                report_call_result_id=cast(item_values.c.report_call_result_id, Integer),
+                report_attempted_at=cast(item_values.c.report_attempted_at, DateTime(timezone=True)),
+                report_status=cast(item_values.c.report_status, String),
+                report_scenario_id=cast(item_values.c.report_scenario_id, Integer),
+                report_outbound_line_id=cast(item_values.c.report_outbound_line_id, Integer),
+                report_reason=cast(item_values.c.report_reason, Text),
+            )
+            .execution_options(synchronize_session=False)
+        )
+    if new_items:
+        db.execute(insert(DialerBatchItem), new_items)
+
+    # Charge billing only for billable reports: one ledger insert for the whole request
+    wallet_charge_service.record_charges(
+        db,
+        [
+            (companies[reports[i].company].id, call_result_by_index[i], reports[i].scenario_id)
+            for i in pending
+            if reports[i].status in BILLABLE_STATUSES
+        ],
+    )
 
-    if report.agent_id is not None:
-        agent = db.get(AdminUser, report.agent_id)
-        # Verify agent belongs to this company
-        if agent and agent.company_id != company.id:
-            agent = None
+    db.commit()
 
+    for i in pending:
+        number = numbers[i]
+        results[i].update({
+            "ok": True,
+            "id": number.id,
+            "global_status": final_status[number.id].value,
+            "phone_number": number.phone_number,
+        })
+    return results
+
+
+def heartbeat_batch(db: Session, batch_id: str, company: CompanyEntry) -> dict:
+    """Extend every outstanding lease of a batch by a full lease period."""
+    expires_at = _lease_expiry(datetime.now(timezone.utc))
+    result = db.execute(
+        update(NumberLease)
+        .where(NumberLease.batch_id == batch_id, NumberLease.company_id == company.id)
+        .values(expires_at=expires_at)
+    )
+    db.commit()
+    return {"batch_id": batch_id, "extended": result.rowcount or 0, "lease_expires_at": expires_at}
+
+
+def release_batch(db: Session, batch_id: str, company: CompanyEntry, number_ids: list[int] | None = None) -> dict:
+    """Return unused numbers of a batch to the queue (all outstanding ones when `number_ids` is omitted)."""
+    stmt = delete(NumberLease).where(NumberLease.batch_id == batch_id, NumberLease.company_id == company.id)
+    if number_ids is not None:
+        if not number_ids:
+            return {"batch_id": batch_id, "released": 0}
+        stmt = stmt.where(NumberLease.number_id.in_(number_ids))
+    result = db.execute(stmt)
+    if result.rowcount:
+        events.notify(db, company.id)
+    db.commit()
+    return {"batch_id": batch_id, "released": result.rowcount or 0}
+
+
+def release_expired_leases(db: Session, chunk_size: int | None = None) -> int:
+    """Delete expired leases in bounded chunks (one commit per chunk) so numbers return to the queue."""
+    chunk_size = chunk_size or settings.lease_sweep_chunk_size
+    released = 0
+    while True:
+        expired = (
+            select(NumberLease.number_id)
+            .where(NumberLease.expires_at <= datetime.now(timezone.utc))
+            .order_by(NumberLease.expires_at)
+            .limit(chunk_size)
+            .with_for_update(skip_locked=True)
+        )
+        result = db.execute(delete(NumberLease).where(NumberLease.number_id.in_(expired)))
+        db.commit()
+        count = result.rowcount or 0
+        released += count
+        if count < chunk_size:
+            return released
+
+
+def sweep_expired_leases() -> None:
+    """Background job: release expired leases on one worker at a time (advisory lock)."""
+    with advisory_lock("lease_sweeper") as conn:
+        if conn is None:
+            metrics.inc("lease_sweeper.skipped_locked")
+            return
+        with Session(bind=conn) as db, metrics.timed("lease_sweeper.duration_seconds"):
+            released = release_expired_leases(db)
+            if released:
+                # Wake long-polling dialers: numbers are back in the pool.
+                events.notify(db)
+                db.commit()
+        metrics.inc("lease_sweeper.rows_released", released)
+        metrics.set_gauge("lease_sweeper.last_released", released)
+
+
+def _resolve_agent(db: Session, report: DialerReport, company: CompanyEntry) -> AdminUser | None:
+    """Resolve agent from report (one query), ensuring they belong to the company"""
     normalized_agent_phone = normalize_phone(report.agent_phone) if report.agent_phone else None
+    if report.agent_id is None and not normalized_agent_phone:
+        return None
+
+    matches = []
+    if report.agent_id is not None:
+        matches.append(AdminUser.id == report.agent_id)
+    if normalized_agent_phone:
+        matches.append(AdminUser.phone_number == normalized_agent_phone)
+    candidates = db.execute(
+        select(AdminUser).where(AdminUser.company_id == company.id, or_(*matches))
+    ).scalars().all()
+
+    # An id match wins over a phone match, as before.
+    agent = next((a for a in candidates if a.id == report.agent_id), None)
     if not agent and normalized_agent_phone:
-        agent = (
-            db.query(AdminUser)
-            .filter(
-                AdminUser.phone_number == normalized_agent_phone,
-                AdminUser.company_id == company.id
-            )
-            .first()
-        )
+        agent = next((a for a in candidates if a.phone_number == normalized_agent_phone), None)
 
     if agent and agent.role != UserRole.AGENT:
         agent = None
@@ -0,0 +1,86 @@
+"""
+Reads of number_counters (exact numbers totals without count(*)) and planner row estimates.
+
+The counters are written only by the triggers from migration 0022, so every writer of numbers
+and company_number_state keeps them exact in its own transaction. `rebuild` recounts them
+after anything the triggers do not see (TRUNCATE, a restore with triggers disabled).
+"""
+import json
+
+from sqlalchemy import cast, delete, func, insert, literal, select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from ..models.company_number_state import CompanyNumberState
+from ..models.number_counter import NumberCounter
+from ..models.phone_number import GlobalStatus, PhoneNumber
+
+GLOBAL = 0
+CALLED = "CALLED"
+
+
+def total(db: Session, global_status: GlobalStatus | None = None) -> int:
+    """Numbers, optionally with one global_status."""
+    query = select(func.coalesce(func.sum(NumberCounter.count), 0)).where(NumberCounter.company_id == GLOBAL)
+    if global_status is not None:
+        query = query.where(NumberCounter.name == global_status.value)
+    return int(db.execute(query).scalar())
+
+
+def called(db: Session, company_id: int) -> int:
+    """Numbers the company has a call result for (its company_number_state rows)."""
+    return int(
+        db.execute(
+            select(func.coalesce(func.sum(NumberCounter.count), 0)).where(
+                NumberCounter.company_id == company_id, NumberCounter.name == CALLED
+            )
+        ).scalar()
+    )
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, compiled with it so binds keep their types and IN lists expand."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def planner_rows(db: Session, stmt) -> int:
+    """Rows the planner expects `stmt` to return; reads statistics only, never the table."""
+    plan = db.execute(_Explain(stmt)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def rebuild(db: Session) -> None:
+    """Recount from the tables; blocks their writers until the caller commits."""
+    db.execute(text("LOCK TABLE numbers, company_number_state IN SHARE MODE"))
+    db.execute(delete(NumberCounter))
+    db.execute(
+        insert(NumberCounter).from_select(
+            ["company_id", "name", "slot", "count"],
+            select(
+                literal(GLOBAL),
+                cast(PhoneNumber.global_status, NumberCounter.name.type),
+                literal(0),
+                func.count(),
+            ).group_by(PhoneNumber.global_status),
+        )
+    )
+    db.execute(
+        insert(NumberCounter).from_select(
+            ["company_id", "name", "slot", "count"],
+            select(CompanyNumberState.company_id, literal(CALLED), literal(0), func.count()).group_by(
+                CompanyNumberState.company_id
+            ),
+        )
+    )
@@ -0,0 +1,159 @@
+"""
+Maintenance of company_number_state: the latest call per (company, number).
+
+Everything that writes call_results keeps the state row in the same transaction: report
+ingestion upserts it, a manual status change rewrites it and a reset deletes it (numbers and
+companies cascade). Read paths join one row per number instead of ranking call_results.
+"""
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models.call_result import CallResult
+from ..models.company_number_state import CompanyNumberState
+from . import call_stats_service
+
+_COLUMNS = [
+    "company_id",
+    "number_id",
+    "latest_call_id",
+    "latest_status",
+    "last_attempt_at",
+    "total_attempts",
+    "latest_agent_id",
+]
+
+
+def _upsert(stmt):
+    """Fold new calls into an existing row: counts add up, the highest call id stays latest."""
+    excluded = stmt.excluded
+    newer = excluded.latest_call_id > CompanyNumberState.latest_call_id
+
+    def latest(name: str):
+        return case((newer, getattr(excluded, name)), else_=getattr(CompanyNumberState, name))
+
+    return stmt.on_conflict_do_update(
+        index_elements=[CompanyNumberState.company_id, CompanyNumberState.number_id],
+        set_={
+            "latest_call_id": func.greatest(CompanyNumberState.latest_call_id, excluded.latest_call_id),
+            "latest_status": latest("latest_status"),
+            "last_attempt_at": latest("last_attempt_at"),
+            "latest_agent_id": latest("latest_agent_id"),
+            "total_attempts": CompanyNumberState.total_attempts + excluded.total_attempts,
+        },
+    )
+
+
+def _from_inserted(call_insert, name: str):
+    """INSERT INTO company_number_state fed by `call_insert` running as a data-modifying CTE."""
+    inserted = call_insert.returning(
+        CallResult.id,
+        CallResult.company_id,
+        CallResult.phone_number_id,
+        CallResult.status,
+        CallResult.attempted_at,
+        CallResult.agent_id,
+    ).cte(name)
+    stmt = insert(CompanyNumberState).from_select(
+        _COLUMNS,
+        select(
+            inserted.c.company_id,
+            inserted.c.phone_number_id,
+            inserted.c.id,
+            inserted.c.status,
+            inserted.c.attempted_at,
+            literal(1),
+            inserted.c.agent_id,
+        ),
+    )
+    return _upsert(stmt), inserted
+
+
+def record_call_stmt(call_insert):
+    """
+    Wrap a single-row INSERT INTO call_results so the same statement upserts its state.
+
+    A row the insert skips (ON CONFLICT DO NOTHING) records nothing and returns no row;
+    otherwise the statement returns the new call_results id.
+    """
+    stmt, inserted = _from_inserted(call_insert, "inserted_call")
+    return stmt.returning(select(inserted.c.id).scalar_subquery())
+
+
+def record_calls_stmt(call_insert):
+    """Multi-row variant of `record_call_stmt`; each (company, number) may appear once."""
+    stmt, _ = _from_inserted(call_insert, "inserted_calls")
+    return stmt
+
+
+def record_calls(
+    db: Session,
+    calls: list[tuple[int, int, int, str | None, datetime | None, int | None]],
+) -> None:
+    """
+    Upsert state for call_results rows already inserted:
+    (company_id, number_id, call_result_id, status, attempted_at, agent_id).
+
+    Calls of one pair are folded first (ON CONFLICT cannot touch a row twice). Caller commits.
+    """
+    rows: dict[tuple[int, int], dict] = {}
+    for company_id, number_id, call_id, status, attempted_at, agent_id in calls:
+        row = rows.get((company_id, number_id))
+        if row is None:
+            rows[(company_id, number_id)] = row = {
+                "company_id": company_id,
+                "number_id": number_id,
+                "latest_call_id": call_id,
+                "total_attempts": 0,
+            }
+        row["total_attempts"] += 1
+        if call_id >= row["latest_call_id"]:
+            row.update(
+                latest_call_id=call_id,
+                latest_status=status,
+                last_attempt_at=attempted_at,
+                latest_agent_id=agent_id,
+            )
+    if rows:
+        db.execute(_upsert(insert(CompanyNumberState).values(list(rows.values()))))
+
+
+def set_status_stmt(company_id: int, number_ids, status: str, folded: int):
+    """
+    UPDATE the state's latest_status and the latest call_results row it points at, in one statement.
+
+    `number_ids` may be a list or a select; it is evaluated once, before either table changes.
+    The same statement moves calls the rollup already holds to the new status; `folded` comes
+    from `call_stats_service.lock_folded`.
+    """
+    changed = (
+        update(CompanyNumberState)
+        .where(
+            CompanyNumberState.company_id == company_id,
+            CompanyNumberState.number_id.in_(number_ids),
+        )
+        .values(latest_status=status)
+        .returning(CompanyNumberState.latest_call_id)
+        .cte("changed_state")
+    )
+    return (
+        update(CallResult)
+        .where(CallResult.id.in_(select(changed.c.latest_call_id)))
+        .values(status=status)
+        .add_cte(call_stats_service.restatus(select(changed.c.latest_call_id), status, folded))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def clear_stmt(company_id: int, number_ids):
+    """DELETE the state of numbers whose call_results for the company are being removed."""
+    return (
+        delete(CompanyNumberState)
+        .where(
+            CompanyNumberState.company_id == company_id,
+            CompanyNumberState.number_id.in_(number_ids),
+        )
+        .execution_options(synchronize_session=False)
+    )
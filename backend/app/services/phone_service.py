@@ -5,16 +5,18 @@ from typing import Iterable, Sequence
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, status
-from sqlalchemy import select, func, or_, literal
+from sqlalchemy import select, delete, func, or_, literal
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.dialects.postgresql import insert
 
 from ..models.phone_number import PhoneNumber, CallStatus, GlobalStatus
 from ..models.call_result import CallResult
+from ..models.company_number_state import CompanyNumberState
 from ..models.dialer_batch_item import DialerBatchItem
+from ..models.number_lease import NumberLease
 from ..models.user import AdminUser, UserRole
-from ..models.company import Company
 from ..core.config import get_settings
+from ..core import events
 from ..schemas.phone_number import (
     PhoneNumberCreate,
     PhoneNumberStatusUpdate,
@@ -22,7 +24,14 @@ from ..schemas.phone_number import (
     PhoneNumberBulkResult,
     PhoneNumberExportRequest,
 )
-from openpyxl import Workbook
+from . import (
+    call_stats_service,
+    company_registry,
+    dial_queue_service,
+    number_counter_service,
+    number_state_service,
+    stats_cache,
+)
 
 PHONE_PATTERN = re.compile(r"^09\d{9}$")
 settings = get_settings()
@@ -36,16 +45,20 @@ MUTABLE_STATUSES = {
 }
 
 
+def _global_status_for(status: CallStatus) -> GlobalStatus:
+    """Shared/global status implied by a per-company call status."""
+    if status == CallStatus.POWER_OFF:
+        return GlobalStatus.POWER_OFF
+    if status == CallStatus.COMPLAINED:
+        return GlobalStatus.COMPLAINED
+    return GlobalStatus.ACTIVE
+
+
 def _sync_global_status_from_call_status(number: PhoneNumber, status: CallStatus) -> None:
     """
     Sync shared/global status on numbers table for statuses that must apply to all companies.
     """
-    if status == CallStatus.POWER_OFF:
-        number.global_status = GlobalStatus.POWER_OFF
-    elif status == CallStatus.COMPLAINED:
-        number.global_status = GlobalStatus.COMPLAINED
-    else:
-        number.global_status = GlobalStatus.ACTIVE
+    number.global_status = _global_status_for(status)
 
 
 def _require_admin(user: AdminUser):
@@ -57,7 +70,7 @@ def _resolve_company_id(db: Session, current_user: AdminUser, company_name: str
     """Return the target company_id based on user context and optional company_name override."""
     target = current_user.company_id
     if company_name:
-        company_obj = db.query(Company).filter(Company.name == company_name).first()
+        company_obj = company_registry.get_by_name(db, company_name, active_only=False)
         if not company_obj:
             raise HTTPException(status_code=404, detail="Company not found")
         if not current_user.is_superuser and current_user.company_id != company_obj.id:
@@ -69,15 +82,14 @@ def _resolve_company_id(db: Session, current_user: AdminUser, company_name: str
 
 
 def _latest_status_for_company(db: Session, number_id: int, company_id: int) -> CallStatus:
-    latest_call = (
-        db.query(CallResult)
-        .filter(CallResult.phone_number_id == number_id, CallResult.company_id == company_id)
-        .order_by(CallResult.id.desc())
-        .first()
+    latest_status = (
+        db.query(CompanyNumberState.latest_status)
+        .filter(CompanyNumberState.number_id == number_id, CompanyNumberState.company_id == company_id)
+        .scalar()
     )
-    if not latest_call or not latest_call.status:
+    if not latest_status:
         return CallStatus.IN_QUEUE
-    return CallStatus(latest_call.status)
+    return CallStatus(latest_status)
 
 
 def _ensure_mutable_for_user(db: Session, number_id: int, company_id: int, current_user: AdminUser) -> None:
@@ -127,9 +139,14 @@ def add_numbers(db: Session, payload: PhoneNumberCreate, current_user: AdminUser
             insert(PhoneNumber)
             .values([{"phone_number": n} for n in unique_valid])
             .on_conflict_do_nothing(index_elements=[PhoneNumber.phone_number])
+            .returning(PhoneNumber.id)
         )
-        result = db.execute(stmt)
-        inserted = result.rowcount or 0
+        inserted_ids = list(db.execute(stmt).scalars())
+        inserted = len(inserted_ids)
+        dial_queue_service.enqueue_for_all_companies(db, inserted_ids)
+        if inserted_ids:
+            events.notify(db)
+            stats_cache.invalidate(db)
         db.commit()
 
     return {
@@ -147,46 +164,49 @@ def _apply_latest_call_filters(
     target_company_id: int | None,
     agent_id: int | None,
     db: Session,
+    join_state: bool = False,
 ):
-    """Apply latest-call-based filters (status and agent) in one set-based join."""
-    if not target_company_id:
-        return query
+    """
+    Apply latest-call-based filters (status and agent) from company_number_state.
 
-    if status == CallStatus.IN_QUEUE:
-        # IN_QUEUE = no call record for this company yet
-        query = query.filter(
-            ~db.query(CallResult.id).filter(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-            ).correlate(PhoneNumber).exists()
-        )
-        # A latest assigned agent cannot exist when there are no call rows.
-        if agent_id is not None:
-            query = query.filter(False)
+    The state row is outer-joined once, when a filter needs it or the caller asks for it
+    (state-based sorting, the mutability check); its columns are then usable on the query.
+    """
+    if not target_company_id:
         return query
-
-    if status is None and agent_id is None:
+    if not join_state and status is None and agent_id is None:
         return query
 
-    latest_per_number_subq = (
-        db.query(
-            CallResult.phone_number_id.label("phone_number_id"),
-            func.max(CallResult.id).label("latest_id"),
-        )
-        .filter(CallResult.company_id == target_company_id)
-        .group_by(CallResult.phone_number_id)
-        .subquery()
-    )
-    query = query.join(latest_per_number_subq, latest_per_number_subq.c.phone_number_id == PhoneNumber.id).join(
-        CallResult, CallResult.id == latest_per_number_subq.c.latest_id
+    query = query.outerjoin(
+        CompanyNumberState,
+        (CompanyNumberState.number_id == PhoneNumber.id) & (CompanyNumberState.company_id == target_company_id),
     )
-    if status is not None:
-        query = query.filter(CallResult.status == status.value)
+    if status == CallStatus.IN_QUEUE:
+        # IN_QUEUE = no call record for this company yet
+        query = query.filter(CompanyNumberState.number_id.is_(None))
+    elif status is not None:
+        query = query.filter(CompanyNumberState.latest_status == status.value)
     if agent_id is not None:
-        query = query.filter(CallResult.agent_id == agent_id)
+        # Never matches IN_QUEUE: a latest assigned agent cannot exist without call rows.
+        query = query.filter(CompanyNumberState.latest_agent_id == agent_id)
     return query
 
 
+# Sort keys served by company_number_state (only when a company is selected).
+_STATE_SORT_COLUMNS = {
+    "last_attempt_at": CompanyNumberState.last_attempt_at,
+    "total_attempts": func.coalesce(CompanyNumberState.total_attempts, 0),
+    "status": CompanyNumberState.latest_status,
+}
+
+
+def _sort_column(sort_by: str, target_company_id: int | None):
+    if target_company_id and sort_by in _STATE_SORT_COLUMNS:
+        return _STATE_SORT_COLUMNS[sort_by]
+    sort_map = {"created_at": PhoneNumber.id, "id": PhoneNumber.id, "last_called_at": PhoneNumber.last_called_at}
+    return sort_map.get(sort_by, PhoneNumber.id)
+
+
 def _local_date_start_utc(value: date) -> datetime:
     local_start = datetime(value.year, value.month, value.day, 0, 0, 0, tzinfo=LOCAL_TZ)
     return local_start.astimezone(timezone.utc)
@@ -259,52 +279,10 @@ def list_numbers(
         target_company_id=target_company_id,
         agent_id=agent_id,
         db=db,
+        join_state=sort_by in _STATE_SORT_COLUMNS,
     )
 
-    # Build sort column — last_attempt_at and status live in call_results
-    if sort_by == "last_attempt_at" and target_company_id:
-        column = (
-            select(func.max(CallResult.attempted_at))
-            .where(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-            )
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    elif sort_by == "total_attempts" and target_company_id:
-        column = (
-            select(func.count(CallResult.id))
-            .where(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-            )
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    elif sort_by == "status" and target_company_id:
-        column = (
-            select(CallResult.status)
-            .where(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-                CallResult.id == (
-                    select(func.max(CallResult.id))
-                    .where(
-                        CallResult.phone_number_id == PhoneNumber.id,
-                        CallResult.company_id == target_company_id,
-                    )
-                    .correlate(PhoneNumber)
-                    .scalar_subquery()
-                ),
-            )
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    else:
-        sort_map = {"created_at": PhoneNumber.id, "id": PhoneNumber.id, "last_called_at": PhoneNumber.last_called_at}
-        column = sort_map.get(sort_by, PhoneNumber.id)
-
+    column = _sort_column(sort_by, target_company_id)
     numbers = numbers.order_by(column.desc().nulls_last() if sort_order == "desc" else column.asc().nulls_last())
 
     number_list = numbers.offset(skip).limit(limit).all()
@@ -390,42 +368,43 @@ def list_number_history(
 
 
 def _enrich_with_call_data(db: Session, number_list: list, target_company_id: int):
-    """Populate virtual fields on PhoneNumber objects from call_results.
-    Orders by id DESC so that when timestamps tie, the most recently inserted row wins.
-    """
+    """Populate virtual fields on PhoneNumber objects from company_number_state and its latest call."""
     number_ids = [n.id for n in number_list]
-    all_calls = (
-        db.query(CallResult)
+    rows = (
+        db.query(CompanyNumberState, CallResult)
+        .outerjoin(CallResult, CallResult.id == CompanyNumberState.latest_call_id)
         .options(
             joinedload(CallResult.scenario),
             joinedload(CallResult.outbound_line),
         )
         .filter(
-            CallResult.phone_number_id.in_(number_ids),
-            CallResult.company_id == target_company_id,
+            CompanyNumberState.number_id.in_(number_ids),
+            CompanyNumberState.company_id == target_company_id,
         )
-        .order_by(CallResult.id.desc())
         .all()
     )
-    call_data_map: dict = {}
-    call_counts: dict = {}
-    for call in all_calls:
-        call_counts[call.phone_number_id] = call_counts.get(call.phone_number_id, 0) + 1
-        if call.phone_number_id not in call_data_map:
-            call_data_map[call.phone_number_id] = call
+    state_map = {state.number_id: (state, latest_call) for state, latest_call in rows}
 
     for number in number_list:
-        latest_call = call_data_map.get(number.id)
+        state, latest_call = state_map.get(number.id, (None, None))
+        if state:
+            number.status = state.latest_status
+            number.last_attempt_at = state.last_attempt_at
+            number.assigned_agent_id = state.latest_agent_id
+            number.total_attempts = state.total_attempts
         if latest_call:
-            number.status = latest_call.status
-            number.last_attempt_at = latest_call.attempted_at
             number.last_user_message = latest_call.user_message
-            number.assigned_agent_id = latest_call.agent_id
-            number.total_attempts = call_counts.get(number.id, 0)
             number.scenario_display_name = latest_call.scenario.display_name if latest_call.scenario else None
             number.outbound_line_display_name = latest_call.outbound_line.display_name if latest_call.outbound_line else None
             number.call_direction = latest_call.call_direction
 
+    leases = db.query(NumberLease).filter(NumberLease.number_id.in_(number_ids)).all()
+    lease_map = {lease.number_id: lease for lease in leases}
+    for number in number_list:
+        lease = lease_map.get(number.id)
+        number.assigned_at = lease.leased_at if lease else None
+        number.assigned_batch_id = lease.batch_id if lease else None
+
 
 def count_numbers(
     db: Session,
@@ -437,10 +416,25 @@ def count_numbers(
     agent_id: int | None = None,
     start_date: date | None = None,
     end_date: date | None = None,
-) -> int:
+    estimate: bool = False,
+) -> tuple[int, bool]:
+    """
+    Numbers matching the filters as (total, estimated).
+
+    Views without search or dates that number_counters covers are exact and never count rows.
+    With `estimate`, other views without search or dates take the planner's row estimate when
+    it is at least NUMBERS_COUNT_ESTIMATE_MIN_ROWS; everything else is counted.
+    """
     target_company_id = _resolve_company_id(db, current_user, company_name)
 
-    query = db.query(func.count(PhoneNumber.id))
+    if not search and not start_date and not end_date:
+        if not target_company_id or (status is None and agent_id is None):
+            return number_counter_service.total(db, global_status), False
+        if status == CallStatus.IN_QUEUE and agent_id is None and global_status is None:
+            queued = number_counter_service.total(db) - number_counter_service.called(db, target_company_id)
+            return queued, False
+
+    query = db.query(PhoneNumber.id)
 
     if search:
         query = query.filter(PhoneNumber.phone_number.ilike(f"%{search}%"))
@@ -457,7 +451,12 @@ def count_numbers(
         db=db,
     )
 
-    return query.scalar() or 0
+    if estimate and not search and not start_date and not end_date:
+        rows = number_counter_service.planner_rows(db, query.statement)
+        if rows >= settings.numbers_count_estimate_min_rows:
+            return rows, True
+
+    return query.with_entities(func.count(PhoneNumber.id)).scalar() or 0, False
 
 
 def update_number_status(db: Session, number_id: int, data: PhoneNumberStatusUpdate, current_user: AdminUser, company_name: str | None = None) -> PhoneNumber:
@@ -472,24 +471,24 @@ def update_number_status(db: Session, number_id: int, data: PhoneNumberStatusUpd
 
     if target_company_id:
         _ensure_mutable_for_user(db, number_id, target_company_id, current_user)
-        latest_call = (
-            db.query(CallResult)
-            .filter(
-                CallResult.phone_number_id == number_id,
-                CallResult.company_id == target_company_id,
-            )
-            .order_by(CallResult.id.desc())
-            .first()
+        folded = call_stats_service.lock_folded(db)
+        changed = db.execute(
+            number_state_service.set_status_stmt(target_company_id, [number_id], data.status.value, folded)
         )
-        if latest_call:
-            latest_call.status = data.status
-        else:
-            db.add(CallResult(
+        if not changed.rowcount:
+            call = CallResult(
                 phone_number_id=number_id,
                 company_id=target_company_id,
                 status=data.status,
                 attempted_at=datetime.now(timezone.utc),
-            ))
+            )
+            db.add(call)
+            db.flush()
+            number_state_service.record_calls(
+                db, [(target_company_id, number_id, call.id, data.status.value, call.attempted_at, None)]
+            )
+            dial_queue_service.dequeue(db, target_company_id, [number_id])
+        stats_cache.invalidate(db, {target_company_id})
         db.commit()
 
     # Refresh virtual fields
@@ -500,12 +499,9 @@ def update_number_status(db: Session, number_id: int, data: PhoneNumberStatusUpd
 
 
 def bulk_reset(db: Session, ids: Iterable[int], status: CallStatus = CallStatus.IN_QUEUE) -> int:
-    numbers = db.query(PhoneNumber).filter(PhoneNumber.id.in_(list(ids))).all()
-    for num in numbers:
-        num.assigned_at = None
-        num.assigned_batch_id = None
+    result = db.execute(delete(NumberLease).where(NumberLease.number_id.in_(list(ids))))
     db.commit()
-    return len(numbers)
+    return result.rowcount or 0
 
 
 def delete_number(db: Session, number_id: int, current_user: AdminUser, company_name: str | None = None) -> None:
@@ -527,8 +523,10 @@ def delete_number(db: Session, number_id: int, current_user: AdminUser, company_
         {DialerBatchItem.report_call_result_id: None},
         synchronize_session=False,
     )
+    call_stats_service.retract(db, call_stats_service.lock_folded(db), CallResult.phone_number_id == number_id)
     db.query(CallResult).filter(CallResult.phone_number_id == number_id).delete(synchronize_session=False)
     db.delete(number)
+    stats_cache.invalidate(db)
     db.commit()
 
 
@@ -558,13 +556,22 @@ def reset_number(db: Session, number_id: int, current_user: AdminUser, company_n
             {DialerBatchItem.report_call_result_id: None},
             synchronize_session=False,
         )
+        call_stats_service.retract(
+            db,
+            call_stats_service.lock_folded(db),
+            CallResult.phone_number_id == number_id,
+            CallResult.company_id == target_company_id,
+        )
         db.query(CallResult).filter(
             CallResult.phone_number_id == number_id,
             CallResult.company_id == target_company_id,
         ).delete(synchronize_session=False)
+        db.execute(number_state_service.clear_stmt(target_company_id, [number_id]))
+        dial_queue_service.enqueue_for_company(db, target_company_id, [number_id])
+        events.notify(db, target_company_id)
+        stats_cache.invalidate(db, {target_company_id})
 
-    number.assigned_at = None
-    number.assigned_batch_id = None
+    db.execute(delete(NumberLease).where(NumberLease.number_id == number_id))
     db.commit()
     db.refresh(number)
     return number
@@ -584,6 +591,7 @@ def _build_query(
     require_mutable: bool = False,
     start_date: date | None = None,
     end_date: date | None = None,
+    join_state: bool = False,
 ):
     query = db.query(PhoneNumber)
 
@@ -592,37 +600,27 @@ def _build_query(
 
     query = _apply_date_filter(query, db, target_company_id, start_date, end_date)
 
+    check_mutable = require_mutable and target_company_id and not current_user.is_superuser
     query = _apply_latest_call_filters(
         query,
         status=filter_status,
         target_company_id=target_company_id,
         agent_id=agent_id,
         db=db,
+        join_state=join_state or check_mutable,
     )
     if filter_global_status is not None:
         query = query.filter(PhoneNumber.global_status == filter_global_status)
-    if require_mutable and target_company_id and not current_user.is_superuser:
+    if check_mutable:
         # For non-superusers, bulk actions can only touch mutable statuses.
-        latest_id_subq = (
-            db.query(func.max(CallResult.id))
-            .filter(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-            )
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-        has_any_call = db.query(CallResult.id).filter(
-            CallResult.phone_number_id == PhoneNumber.id,
-            CallResult.company_id == target_company_id,
-        ).correlate(PhoneNumber).exists()
         mutable_real_statuses = [s.value for s in MUTABLE_STATUSES if s != CallStatus.IN_QUEUE]
-        has_mutable_latest = db.query(CallResult.id).filter(
-            CallResult.id == latest_id_subq,
-            CallResult.status.in_(mutable_real_statuses),
-        ).correlate(PhoneNumber).exists()
         # IN_QUEUE means no call record for this company yet.
-        query = query.filter(or_(~has_any_call, has_mutable_latest))
+        query = query.filter(
+            or_(
+                CompanyNumberState.number_id.is_(None),
+                CompanyNumberState.latest_status.in_(mutable_real_statuses),
+            )
+        )
 
     if select_all:
         if excluded_ids:
@@ -675,16 +673,23 @@ def bulk_action(db: Session, payload: PhoneNumberBulkAction, current_user: Admin
             {DialerBatchItem.report_call_result_id: None},
             synchronize_session=False,
         )
+        call_stats_service.retract(
+            db, call_stats_service.lock_folded(db), CallResult.phone_number_id.in_(select(target_ids_subq.c.id))
+        )
         db.query(CallResult).filter(
             CallResult.phone_number_id.in_(select(target_ids_subq.c.id))
         ).delete(synchronize_session=False)
         result.deleted = db.query(PhoneNumber).filter(
             PhoneNumber.id.in_(select(target_ids_subq.c.id))
         ).delete(synchronize_session=False)
+        stats_cache.invalidate(db)
         db.commit()
         return result
 
     if payload.action == "reset":
+        # Count and release up front: the target set may be defined by the call results deleted below.
+        result.reset = total_selected
+        db.execute(delete(NumberLease).where(NumberLease.number_id.in_(select(target_ids_subq.c.id))))
         # Delete call_results for this company → dialer will re-call these numbers
         if target_company_id:
             call_result_ids_subq = (
@@ -699,16 +704,29 @@ def bulk_action(db: Session, payload: PhoneNumberBulkAction, current_user: Admin
                 {DialerBatchItem.report_call_result_id: None},
                 synchronize_session=False,
             )
-            db.query(CallResult).filter(
+            # Re-queue and retract before deleting: the target set may be defined by the rows being removed.
+            dial_queue_service.enqueue_for_company(db, target_company_id, select(target_ids_subq.c.id))
+            call_stats_service.retract(
+                db,
+                call_stats_service.lock_folded(db),
                 CallResult.phone_number_id.in_(select(target_ids_subq.c.id)),
                 CallResult.company_id == target_company_id,
-            ).delete(synchronize_session=False)
-        result.reset = db.query(PhoneNumber).filter(
-            PhoneNumber.id.in_(select(target_ids_subq.c.id))
-        ).update(
-            {PhoneNumber.assigned_at: None, PhoneNumber.assigned_batch_id: None},
-            synchronize_session=False,
-        ) or 0
+            )
+            # One statement clears call_results and their state, so both see the same target set.
+            cleared_state = number_state_service.clear_stmt(
+                target_company_id, select(target_ids_subq.c.id)
+            ).cte("cleared_state")
+            db.execute(
+                delete(CallResult)
+                .where(
+                    CallResult.phone_number_id.in_(select(target_ids_subq.c.id)),
+                    CallResult.company_id == target_company_id,
+                )
+                .add_cte(cleared_state)
+                .execution_options(synchronize_session=False)
+            )
+            events.notify(db, target_company_id)
+            stats_cache.invalidate(db, {target_company_id})
         db.commit()
         return result
 
@@ -721,47 +739,47 @@ def bulk_action(db: Session, payload: PhoneNumberBulkAction, current_user: Admin
                 if payload.status == CallStatus.COMPLAINED
                 else GlobalStatus.ACTIVE
             )
+            # Every target ends up with a call result for this company, so none stay queued.
+            dial_queue_service.dequeue(db, target_company_id, select(target_ids_subq.c.id))
             db.query(PhoneNumber).filter(PhoneNumber.id.in_(select(target_ids_subq.c.id))).update(
                 {PhoneNumber.global_status: shared_status},
                 synchronize_session=False,
             )
 
-            latest_call_ids_subq = (
-                db.query(func.max(CallResult.id).label("id"))
-                .join(target_ids_subq, CallResult.phone_number_id == target_ids_subq.c.id)
-                .filter(CallResult.company_id == target_company_id)
-                .group_by(CallResult.phone_number_id)
-                .subquery()
-            )
-
-            updated_existing = db.query(CallResult).filter(
-                CallResult.id.in_(select(latest_call_ids_subq.c.id))
-            ).update(
-                {CallResult.status: payload.status},
-                synchronize_session=False,
-            )
+            updated_existing = db.execute(
+                number_state_service.set_status_stmt(
+                    target_company_id,
+                    select(target_ids_subq.c.id),
+                    payload.status.value,
+                    call_stats_service.lock_folded(db),
+                )
+            ).rowcount
 
+            # Targets still without a state row have no call result for this company yet.
             missing_ids_subq = (
                 select(target_ids_subq.c.id)
                 .where(
-                    ~select(CallResult.id).where(
-                        CallResult.phone_number_id == target_ids_subq.c.id,
-                        CallResult.company_id == target_company_id,
+                    ~select(CompanyNumberState.number_id).where(
+                        CompanyNumberState.number_id == target_ids_subq.c.id,
+                        CompanyNumberState.company_id == target_company_id,
                     ).exists()
                 )
                 .subquery()
             )
             insert_result = db.execute(
-                insert(CallResult).from_select(
-                    ["phone_number_id", "company_id", "status", "attempted_at"],
-                    select(
-                        missing_ids_subq.c.id,
-                        literal(target_company_id),
-                        literal(payload.status.value),
-                        literal(datetime.now(timezone.utc)),
-                    ),
+                number_state_service.record_calls_stmt(
+                    insert(CallResult).from_select(
+                        ["phone_number_id", "company_id", "status", "attempted_at"],
+                        select(
+                            missing_ids_subq.c.id,
+                            literal(target_company_id),
+                            literal(payload.status.value),
+                            literal(datetime.now(timezone.utc)),
+                        ),
+                    )
                 )
             )
+            stats_cache.invalidate(db, {target_company_id})
             db.commit()
             result.updated = (updated_existing or 0) + (insert_result.rowcount or 0)
         return result
@@ -791,45 +809,10 @@ def export_numbers(db: Session, payload: PhoneNumberExportRequest, current_user:
         agent_id=payload.agent_id,
         start_date=start,
         end_date=end,
+        join_state=payload.sort_by in _STATE_SORT_COLUMNS,
     )
 
-    # Sort
-    if payload.sort_by == "last_attempt_at" and target_company_id:
-        sort_col = (
-            select(func.max(CallResult.attempted_at))
-            .where(CallResult.phone_number_id == PhoneNumber.id, CallResult.company_id == target_company_id)
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    elif payload.sort_by == "total_attempts" and target_company_id:
-        sort_col = (
-            select(func.count(CallResult.id))
-            .where(CallResult.phone_number_id == PhoneNumber.id, CallResult.company_id == target_company_id)
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    elif payload.sort_by == "status" and target_company_id:
-        sort_col = (
-            select(CallResult.status)
-            .where(
-                CallResult.phone_number_id == PhoneNumber.id,
-                CallResult.company_id == target_company_id,
-                CallResult.id == (
-                    select(func.max(CallResult.id))
-                    .where(
-                        CallResult.phone_number_id == PhoneNumber.id,
-                        CallResult.company_id == target_company_id,
-                    )
-                    .correlate(PhoneNumber)
-                    .scalar_subquery()
-                ),
-            )
-            .correlate(PhoneNumber)
-            .scalar_subquery()
-        )
-    else:
-        sort_map = {"created_at": PhoneNumber.id, "id": PhoneNumber.id, "last_called_at": PhoneNumber.last_called_at}
-        sort_col = sort_map.get(payload.sort_by, PhoneNumber.id)
+    sort_col = _sort_column(payload.sort_by, target_company_id)
 
     if payload.sort_order == "asc":
         query = query.order_by(sort_col.asc().nulls_last())
@@ -842,6 +825,8 @@ def export_numbers(db: Session, payload: PhoneNumberExportRequest, current_user:
     if target_company_id and numbers:
         _enrich_with_call_data(db, numbers, target_company_id)
 
+    from openpyxl import Workbook  # lazy: heavy import only needed for exports
+
     wb = Workbook()
     ws = wb.active
     ws.title = "numbers"
@@ -0,0 +1,147 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, insert, update, delete, func, case
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.config import get_settings
+from ..core.db import SessionLocal
+from ..core.locks import advisory_lock
+from ..models.report_inbox import DialerReportInbox
+from ..schemas.dialer import DialerReport
+from . import dialer_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def is_async() -> bool:
+    return settings.report_ingest_mode == "async"
+
+
+def enqueue(db: Session, reports: list[DialerReport]) -> list[int]:
+    """Append raw reports to the inbox (one multi-row insert) and return their inbox ids."""
+    if not reports:
+        return []
+    ids = db.execute(
+        insert(DialerReportInbox).returning(DialerReportInbox.id, sort_by_parameter_order=True),
+        [{"company": r.company, "payload": r.model_dump(mode="json")} for r in reports],
+    ).scalars().all()
+    db.commit()
+    metrics.inc("report_inbox.enqueued", len(ids))
+    return list(ids)
+
+
+def process_company(db: Session, company: str, batch_size: int | None = None) -> int:
+    """
+    Apply the oldest pending reports of one company, in arrival order, through the bulk report path.
+
+    Rows are marked processed in the same transaction as the writes they produce. A failing
+    micro-batch is rolled back and retried on the next pass until REPORT_INBOX_MAX_ATTEMPTS,
+    after which it is parked with its error (processed_at set, error kept).
+    """
+    batch_size = batch_size or settings.report_inbox_batch_size
+    rows = (
+        db.query(DialerReportInbox)
+        .filter(DialerReportInbox.company == company, DialerReportInbox.processed_at.is_(None))
+        .order_by(DialerReportInbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not rows:
+        return 0
+
+    now_utc = datetime.now(timezone.utc)
+    row_ids = [row.id for row in rows]
+    for row in rows:
+        row.processed_at = now_utc
+        row.attempts += 1
+    try:
+        results = dialer_service.report_results(db, [DialerReport.model_validate(row.payload) for row in rows])
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Report inbox batch failed for company=%s", company)
+        attempts = DialerReportInbox.attempts + 1
+        db.execute(
+            update(DialerReportInbox)
+            .where(DialerReportInbox.id.in_(row_ids))
+            .values(
+                attempts=attempts,
+                error=str(exc)[:1000],
+                processed_at=case(
+                    # Rows report_results already committed must never be re-applied.
+                    (DialerReportInbox.processed_at.is_not(None), DialerReportInbox.processed_at),
+                    (attempts >= settings.report_inbox_max_attempts, now_utc),
+                    else_=None,
+                ),
+            )
+        )
+        db.commit()
+        metrics.inc("report_inbox.failed_batches")
+        return 0
+
+    # Item-level rejections (unknown company, inactive agent, ...) are final; keep the reason.
+    failed = {row_ids[r["index"]]: r["error"] for r in results if not r["ok"]}
+    if failed:
+        for row in rows:
+            if row.id in failed:
+                row.error = failed[row.id]
+        db.commit()
+        metrics.inc("report_inbox.rejected", len(failed))
+    metrics.inc("report_inbox.applied", len(rows) - len(failed))
+    return len(rows)
+
+
+def lag(db: Session) -> dict:
+    """Pending inbox rows and the age of the oldest one (seconds)."""
+    pending, oldest = db.execute(
+        select(func.count(), func.min(DialerReportInbox.received_at)).where(DialerReportInbox.processed_at.is_(None))
+    ).one()
+    lag_seconds = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+    return {"pending": pending, "lag_seconds": max(lag_seconds, 0.0)}
+
+
+def run_worker() -> None:
+    """Background job: drain the inbox company by company; a per-company advisory lock keeps order."""
+    with SessionLocal() as db:
+        companies = db.execute(
+            select(DialerReportInbox.company).where(DialerReportInbox.processed_at.is_(None)).distinct()
+        ).scalars().all()
+        current = lag(db)
+    metrics.set_gauge("report_inbox.pending", current["pending"])
+    metrics.set_gauge("report_inbox.lag_seconds", current["lag_seconds"])
+
+    batch_size = settings.report_inbox_batch_size
+    for company in companies:
+        with advisory_lock(f"report_inbox:{company}") as conn:
+            if conn is None:
+                continue
+            with Session(bind=conn) as db, metrics.timed("report_inbox.company_drain_seconds"):
+                # Bounded so one busy company cannot starve the others in this pass.
+                for _ in range(settings.report_inbox_max_batches_per_pass):
+                    if process_company(db, company, batch_size) < batch_size:
+                        break
+
+
+def purge_processed(chunk_size: int = 5000) -> None:
+    """Background job: delete applied inbox rows older than REPORT_INBOX_RETENTION_HOURS in chunks."""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.report_inbox_retention_hours)
+    with advisory_lock("report_inbox_purge") as conn:
+        if conn is None:
+            return
+        with Session(bind=conn) as db:
+            purged = 0
+            while True:
+                chunk = (
+                    select(DialerReportInbox.id)
+                    .where(DialerReportInbox.processed_at < cutoff)
+                    .limit(chunk_size)
+                )
+                result = db.execute(delete(DialerReportInbox).where(DialerReportInbox.id.in_(chunk)))
+                db.commit()
+                purged += result.rowcount or 0
+                if (result.rowcount or 0) < chunk_size:
+                    break
+    metrics.inc("report_inbox.purged", purged)
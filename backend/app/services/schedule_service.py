@@ -1,41 +1,68 @@
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
 from typing import Iterable
-import jdatetime
 
 from fastapi import HTTPException
-from sqlalchemy import delete, text, inspect
+from sqlalchemy import update, case
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from ..core.config import get_settings
-from ..models.scenario import Scenario
+from ..core import events
 from ..models.schedule import ScheduleConfig, ScheduleWindow
 from ..schemas.schedule import ScheduleConfigUpdate
+from .wallet_charge_service import DEFAULT_COST_PER_CONNECTED, pending_total, settle_company
 
 settings = get_settings()
 TEHRAN_TZ = ZoneInfo(settings.timezone)
 
 
-def ensure_config(db: Session, company_id: int | None = None) -> ScheduleConfig:
-    """Get or create schedule config for a company"""
-    _ensure_enabled_column(db)
-    _ensure_disabled_by_dialer_column(db)
-    _ensure_billing_columns(db)
-    _ensure_scenario_billing_column(db)
+def default_config_values(company_id: int | None) -> dict:
+    return {
+        "company_id": company_id,
+        "skip_holidays": settings.skip_holidays_default,
+        "enabled": True,
+        "disabled_by_dialer": False,
+        "wallet_balance": 0,
+        "cost_per_connected": DEFAULT_COST_PER_CONNECTED,
+        "version": 1,
+    }
+
+
+def insert_default_config_stmt(company_id: int):
+    """INSERT of a default config that is a no-op when the company already has one."""
+    return (
+        insert(ScheduleConfig)
+        .values(**default_config_values(company_id))
+        .on_conflict_do_nothing(index_elements=[ScheduleConfig.company_id])
+    )
+
+
+def set_call_allowed_stmt(company_id: int, call_allowed: bool):
+    """Dialer-driven enable/disable toggle as one UPDATE; bumps `version` only when `enabled` changes."""
+    return (
+        update(ScheduleConfig)
+        .where(ScheduleConfig.company_id == company_id)
+        .values(
+            enabled=call_allowed,
+            disabled_by_dialer=not call_allowed,
+            version=ScheduleConfig.version
+            + case((ScheduleConfig.enabled.is_distinct_from(call_allowed), 1), else_=0),
+        )
+        .returning(ScheduleConfig.id)
+    )
+
 
+def ensure_config(db: Session, company_id: int | None = None) -> ScheduleConfig:
+    """Get or create schedule config for a company (columns come from migrations, see 0018)"""
     # Find config by company_id
     config = db.query(ScheduleConfig).filter_by(company_id=company_id).first()
 
     if not config:
-        config = ScheduleConfig(
-            company_id=company_id,
-            skip_holidays=settings.skip_holidays_default,
-            enabled=True,
-            disabled_by_dialer=False,
-            wallet_balance=0,
-            cost_per_connected=150,
-            version=1,
-        )
+        config = ScheduleConfig(**default_config_values(company_id))
         db.add(config)
         db.commit()
         db.refresh(config)
@@ -44,7 +71,7 @@ def ensure_config(db: Session, company_id: int | None = None) -> ScheduleConfig:
         db.commit()
         db.refresh(config)
     if config.cost_per_connected is None:
-        config.cost_per_connected = 150
+        config.cost_per_connected = DEFAULT_COST_PER_CONNECTED
         db.commit()
         db.refresh(config)
     if config.wallet_balance is None:
@@ -54,46 +81,6 @@ def ensure_config(db: Session, company_id: int | None = None) -> ScheduleConfig:
     return config
 
 
-def _ensure_enabled_column(db: Session) -> None:
-    # Backward-compat: add enabled column if missing (for existing deployments)
-    conn = db.connection()
-    inspector = inspect(conn)
-    cols = [c["name"] for c in inspector.get_columns("schedule_configs")]
-    if "enabled" not in cols:
-        conn.execute(text("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS enabled BOOLEAN DEFAULT TRUE"))
-        db.commit()
-
-
-def _ensure_disabled_by_dialer_column(db: Session) -> None:
-    conn = db.connection()
-    inspector = inspect(conn)
-    cols = [c["name"] for c in inspector.get_columns("schedule_configs")]
-    if "disabled_by_dialer" not in cols:
-        conn.execute(text("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS disabled_by_dialer BOOLEAN DEFAULT FALSE"))
-        db.commit()
-
-
-def _ensure_billing_columns(db: Session) -> None:
-    conn = db.connection()
-    inspector = inspect(conn)
-    cols = [c["name"] for c in inspector.get_columns("schedule_configs")]
-    if "wallet_balance" not in cols:
-        conn.execute(text("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS wallet_balance INTEGER DEFAULT 0"))
-        db.commit()
-    if "cost_per_connected" not in cols:
-        conn.execute(text("ALTER TABLE schedule_configs ADD COLUMN IF NOT EXISTS cost_per_connected INTEGER DEFAULT 150"))
-        db.commit()
-
-
-def _ensure_scenario_billing_column(db: Session) -> None:
-    conn = db.connection()
-    inspector = inspect(conn)
-    cols = [c["name"] for c in inspector.get_columns("scenarios")]
-    if "cost_per_connected" not in cols:
-        conn.execute(text("ALTER TABLE scenarios ADD COLUMN IF NOT EXISTS cost_per_connected INTEGER"))
-        db.commit()
-
-
 def get_config(db: Session, company_id: int | None = None) -> ScheduleConfig:
     return ensure_config(db, company_id=company_id)
 
@@ -124,7 +111,7 @@ def update_schedule(db: Session, data: ScheduleConfigUpdate, company_id: int | N
         config.skip_holidays = data.skip_holidays
         changed = True
     if data.enabled is not None:
-        if data.enabled and config.wallet_balance is not None and config.wallet_balance <= 0:
+        if data.enabled and config.wallet_balance is not None and available_balance(db, company_id, config.wallet_balance) <= 0:
             raise HTTPException(status_code=400, detail="Wallet balance is zero. Please recharge before enabling.")
         config.enabled = data.enabled
         # manual toggle clears dialer error flag
@@ -132,57 +119,21 @@ def update_schedule(db: Session, data: ScheduleConfigUpdate, company_id: int | N
         changed = True
     if changed:
         config.version += 1
+        events.notify(db, company_id)
     db.commit()
     db.refresh(config)
     return config
 
 
-def charge_for_connected_call(db: Session, company_id: int | None = None, scenario_id: int | None = None) -> int:
-    """
-    Deducts cost per connected call from wallet. Returns remaining balance.
-    Automatically disables dialing if balance hits zero.
-    """
-    cfg = ensure_config(db, company_id=company_id)
-    # Lock the config row for update
-    cfg = db.query(ScheduleConfig).filter_by(company_id=company_id).with_for_update().first()
-    if not cfg:
-        raise HTTPException(status_code=500, detail="Billing config missing")
-    cost = cfg.cost_per_connected or 0
-    if company_id is not None and scenario_id is not None:
-        scenario = db.query(Scenario).filter(
-            Scenario.id == scenario_id,
-            Scenario.company_id == company_id,
-        ).first()
-        if scenario and scenario.cost_per_connected is not None:
-            cost = scenario.cost_per_connected
-    if cost <= 0:
-        return cfg.wallet_balance or 0
-
-    current_balance = cfg.wallet_balance or 0
-    if current_balance <= 0:
-        cfg.enabled = False
-        cfg.disabled_by_dialer = True
-        cfg.version += 1
-        db.commit()
-        return 0
-
-    new_balance = current_balance - cost
-    if new_balance < 0:
-        new_balance = 0
-    cfg.wallet_balance = new_balance
-    if new_balance == 0:
-        cfg.enabled = False
-        cfg.disabled_by_dialer = True
-        cfg.version += 1
-    db.commit()
-    db.refresh(cfg)
-    return new_balance
+def available_balance(db: Session, company_id: int | None, wallet_balance: int | None) -> int:
+    """Wallet balance minus charges the settler has not folded in yet."""
+    return (wallet_balance or 0) - pending_total(db, company_id)
 
 
 def get_billing_info(db: Session, company_id: int | None = None) -> dict:
     cfg = ensure_config(db, company_id=company_id)
     return {
-        "wallet_balance": cfg.wallet_balance or 0,
+        "wallet_balance": max(available_balance(db, company_id, cfg.wallet_balance), 0),
         "cost_per_connected": cfg.cost_per_connected or 0,
         "currency": "Toman",
         "disabled_by_dialer": cfg.disabled_by_dialer,
@@ -193,6 +144,10 @@ def update_billing(db: Session, wallet_balance: int | None = None, cost_per_conn
     cfg = ensure_config(db, company_id=company_id)
     changed = False
     if wallet_balance is not None:
+        # Fold pending charges first so they are not deducted again from the new balance.
+        if company_id is not None:
+            settle_company(db, company_id)
+            db.refresh(cfg)
         cfg.wallet_balance = wallet_balance
         changed = True
     if cost_per_connected is not None:
@@ -203,6 +158,7 @@ def update_billing(db: Session, wallet_balance: int | None = None, cost_per_conn
         # If balance now > 0, allow manual enabling later (do not force enable automatically)
         if cfg.wallet_balance and cfg.wallet_balance > 0:
             cfg.disabled_by_dialer = False if cfg.enabled else cfg.disabled_by_dialer
+        events.notify(db, company_id)
         db.commit()
         db.refresh(cfg)
     return cfg
@@ -212,6 +168,8 @@ def is_holiday(date_value: datetime) -> bool:
     """
     Shared Iran holidays based on Jalali calendar (applies equally to all companies).
     """
+    import jdatetime  # lazy: keeps it off the import path of every worker
+
     jalali = jdatetime.date.fromgregorian(date=date_value.astimezone(TEHRAN_TZ).date())
     mm_dd = (jalali.month, jalali.day)
     # Fixed Jalali public holidays (shared nationwide)
@@ -225,48 +183,137 @@ def is_holiday(date_value: datetime) -> bool:
     return mm_dd in fixed_jalali_holidays
 
 
-def is_call_allowed(now: datetime | None, db: Session, company_id: int | None = None) -> tuple[bool, str | None, int]:
-    config = ensure_config(db, company_id=company_id)
+DAY_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class CompiledSchedule:
+    """
+    A company's weekly windows as sorted, merged [start, end] offsets in seconds from Saturday 00:00.
+
+    Windows of one day that overlap or touch are merged, so the lists are disjoint and a
+    bisect over `starts` finds the only window that can contain a given instant.
+    """
+    starts: tuple[int, ...]
+    ends: tuple[int, ...]
+
+    @classmethod
+    def from_windows(cls, windows: Iterable[ScheduleWindow]) -> "CompiledSchedule":
+        spans = sorted(
+            (w.day_of_week * DAY_SECONDS + _seconds(w.start_time), w.day_of_week * DAY_SECONDS + _seconds(w.end_time))
+            for w in windows
+        )
+        merged: list[list[int]] = []
+        for start, end in spans:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return cls(tuple(s for s, _ in merged), tuple(e for _, e in merged))
+
+    def window_at(self, offset: float) -> int | None:
+        """Index of the window containing `offset` (end inclusive), if any."""
+        i = bisect_right(self.starts, offset) - 1
+        if i >= 0 and offset <= self.ends[i]:
+            return i
+        return None
+
+    def has_window_on(self, day_of_week: int) -> bool:
+        day_start = day_of_week * DAY_SECONDS
+        i = bisect_left(self.starts, day_start)
+        return i < len(self.starts) and self.starts[i] < day_start + DAY_SECONDS
+
+    def next_opening(self, now: datetime, skip_holidays: bool = False) -> datetime | None:
+        """First window start after `now`; with skip_holidays, starts falling on a holiday are passed over."""
+        if not self.starts:
+            return None
+        week_start = _week_start(now)
+        first = bisect_right(self.starts, (now - week_start).total_seconds())
+        count = len(self.starts)
+        # Three weeks of occurrences is more than the longest run of holidays.
+        for k in range(first, first + 3 * count):
+            week, i = divmod(k, count)
+            candidate = week_start + timedelta(weeks=week, seconds=self.starts[i])
+            if skip_holidays and is_holiday(candidate):
+                continue
+            return candidate
+        return None
+
+
+@dataclass(frozen=True)
+class CallDecision:
+    allowed: bool
+    reason: str | None = None
+    retry_after_seconds: int = 0
+    # Seconds until the current window closes; only set when allowed.
+    window_closes_in_seconds: int | None = None
+
+
+# company_id -> (schedule version, compiled windows)
+_compiled_cache: dict[int | None, tuple[int, CompiledSchedule]] = {}
+
+
+def compiled_schedule(db: Session, config: ScheduleConfig, company_id: int | None = None) -> CompiledSchedule:
+    """
+    The company's windows compiled for bisect lookups, cached per process by schedule version.
+
+    update_schedule bumps `version` whenever windows change, so a poll only queries
+    schedule_windows again after an edit.
+    """
+    cached = _compiled_cache.get(company_id)
+    if cached and cached[0] == config.version:
+        return cached[1]
+    compiled = CompiledSchedule.from_windows(list_intervals(db, company_id=company_id))
+    _compiled_cache[company_id] = (config.version, compiled)
+    return compiled
+
+
+def evaluate_schedule(
+    now: datetime | None, db: Session, company_id: int | None = None, config: ScheduleConfig | None = None
+) -> CallDecision:
+    """Pass `config` when the caller already loaded it, so the poll reads the row once."""
+    config = config or ensure_config(db, company_id=company_id)
     now = (now or datetime.now(TEHRAN_TZ)).astimezone(TEHRAN_TZ)
-    if config.wallet_balance is not None and config.wallet_balance <= 0:
+    if config.wallet_balance is not None and available_balance(db, company_id, config.wallet_balance) <= 0:
         if config.enabled:
             config.enabled = False
             config.disabled_by_dialer = True
             config.version += 1
             db.commit()
             db.refresh(config)
-        return False, "insufficient_funds", settings.short_retry_seconds
+        return CallDecision(False, "insufficient_funds", settings.short_retry_seconds)
     if not config.enabled:
-        return False, "disabled", settings.short_retry_seconds
+        return CallDecision(False, "disabled", settings.short_retry_seconds)
     if config.skip_holidays and is_holiday(now):
-        return False, "holiday", settings.long_retry_seconds
-
-    intervals = list_intervals(db, company_id=company_id)
-    todays_intervals = [i for i in intervals if i.day_of_week == _iran_weekday(now)]
-    if not todays_intervals:
-        return False, "no_window", settings.long_retry_seconds
-    current_time = now.time()
-    for interval in todays_intervals:
-        if interval.start_time <= current_time <= interval.end_time:
-            return True, None, 0
-    # outside windows: fixed polling interval
-    return False, "outside_allowed_time_window", settings.long_retry_seconds
-
-
-def _next_start(now: datetime, intervals: Iterable[ScheduleWindow]) -> datetime | None:
-    # compute next start time from now, considering weekly repetition
-    now_date = now.date()
-    for day_offset in range(0, 8):
-        check_date = now_date + timedelta(days=day_offset)
-        weekday = _iran_weekday(datetime.combine(check_date, time(0, 0), tzinfo=TEHRAN_TZ))
-        candidates = [i for i in intervals if i.day_of_week == weekday]
-        if not candidates:
-            continue
-        for interval in sorted(candidates, key=lambda i: i.start_time):
-            candidate_dt = datetime.combine(check_date, interval.start_time, tzinfo=TEHRAN_TZ)
-            if candidate_dt > now:
-                return candidate_dt
-    return None
+        return CallDecision(False, "holiday", settings.long_retry_seconds)
+
+    compiled = compiled_schedule(db, config, company_id=company_id)
+    offset = (now - _week_start(now)).total_seconds()
+    window = compiled.window_at(offset)
+    if window is not None:
+        return CallDecision(True, window_closes_in_seconds=math.ceil(compiled.ends[window] - offset))
+
+    reason = "no_window" if not compiled.has_window_on(_iran_weekday(now)) else "outside_allowed_time_window"
+    # Exact wait until the next window opens, still capped so schedule edits are picked up.
+    retry_after = settings.long_retry_seconds
+    opening = compiled.next_opening(now, skip_holidays=bool(config.skip_holidays))
+    if opening is not None:
+        retry_after = min(retry_after, max(math.ceil((opening - now).total_seconds()), 1))
+    return CallDecision(False, reason, retry_after)
+
+
+def is_call_allowed(now: datetime | None, db: Session, company_id: int | None = None) -> tuple[bool, str | None, int]:
+    decision = evaluate_schedule(now, db, company_id=company_id)
+    return decision.allowed, decision.reason, decision.retry_after_seconds
+
+
+def _seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _week_start(now: datetime) -> datetime:
+    """Saturday 00:00 (Tehran) of the week containing `now`."""
+    return datetime.combine(now.date() - timedelta(days=_iran_weekday(now)), time(0, 0), tzinfo=TEHRAN_TZ)
 
 
 def _iran_weekday(current: datetime) -> int:
@@ -0,0 +1,130 @@
+"""
+Per-process cache of stats responses, keyed by (endpoint, company, params, time bucket).
+
+Live results (ranges that end now) are kept for STATS_CACHE_TTL_SECONDS and keyed by the
+current Tehran date, so "today" never outlives its day. A result that only covers a finished
+Tehran day ("yesterday") is kept for STATS_CACHE_CLOSED_TTL_SECONDS; a report for that day
+arriving late drops it: the call_stats rollup job publishes the affected companies on
+`stats_events` when it folds such rows. Concurrent misses on one key are coalesced so only
+one request computes the result.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..core import events, metrics
+from ..core.config import get_settings
+from .schedule_service import TEHRAN_TZ
+
+settings = get_settings()
+
+CHANNEL = "stats_events"
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+_lock = threading.Lock()
+# key -> (expires_at monotonic seconds, value), least recently used first
+_entries: "OrderedDict[tuple, tuple[float, Any]]" = OrderedDict()
+_inflight: dict[tuple, _Flight] = {}
+# Bumped by every invalidation so a result computed before it is not cached after it.
+_generation = 0
+
+
+def get(
+    endpoint: str,
+    company_id: int | None,
+    params: dict,
+    compute: Callable[[], T],
+    *,
+    closed_day: date | None = None,
+) -> T:
+    """
+    Cached `compute()` for this endpoint, company and params.
+
+    Pass `closed_day` when the result only covers that finished Tehran day.
+    """
+    if settings.stats_cache_ttl_seconds <= 0:
+        return compute()
+    bucket = ("closed", closed_day) if closed_day else ("live", datetime.now(TEHRAN_TZ).date())
+    key = (endpoint, company_id, tuple(sorted(params.items())), bucket)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del _entries[key]
+            entry = None
+        if entry is not None:
+            _entries.move_to_end(key)
+            metrics.inc("stats_cache.hits")
+            return entry[1]
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+            generation = _generation
+    if not leader:
+        metrics.inc("stats_cache.coalesced")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    metrics.inc("stats_cache.misses")
+    try:
+        flight.value = compute()
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _lock:
+            del _inflight[key]
+            if flight.error is None and generation == _generation:
+                ttl = settings.stats_cache_closed_ttl_seconds if closed_day else settings.stats_cache_ttl_seconds
+                _entries[key] = (time.monotonic() + ttl, flight.value)
+                while len(_entries) > settings.stats_cache_size:
+                    _entries.popitem(last=False)
+        flight.done.set()
+    return flight.value
+
+
+def _drop(payload: str) -> None:
+    """Payload is comma-separated company ids or "*" (everything); all-company results always go."""
+    global _generation
+    metrics.inc("stats_cache.invalidations")
+    with _lock:
+        _generation += 1
+        if payload == events.ALL_COMPANIES:
+            _entries.clear()
+            return
+        targets = {int(raw) for raw in payload.split(",") if raw.isdigit()}
+        for key in [k for k in _entries if k[1] is None or k[1] in targets]:
+            del _entries[key]
+
+
+def invalidate(db: Session, company_ids: set[int | None] | None = None) -> None:
+    """Drop these companies' results (None = everything) here now and in every worker when the caller commits."""
+    if company_ids is None or None in company_ids:
+        payload = events.ALL_COMPANIES
+    else:
+        payload = ",".join(str(company_id) for company_id in sorted(company_ids))
+    _drop(payload)
+    events.publish(db, CHANNEL, payload)
+
+
+def clear() -> None:
+    _drop(events.ALL_COMPANIES)
+
+
+events.on_notify(CHANNEL, _drop)
@@ -5,12 +5,12 @@ from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 
 from ..core.config import get_settings
-from ..models.phone_number import PhoneNumber, CallStatus
-from ..models.call_result import CallResult
+from ..models.phone_number import CallStatus
+from ..models.company_number_state import CompanyNumberState
 from ..models.scenario import Scenario
 from ..models.outbound_line import OutboundLine
-from ..models.company import Company
 from ..schemas.stats import NumbersSummary, StatusShare, AttemptTrendResponse, TimeBucketBreakdown, AttemptSummary
+from . import call_stats_service, company_registry, number_counter_service
 from .schedule_service import TEHRAN_TZ, ensure_config
 
 settings = get_settings()
@@ -37,29 +37,16 @@ CONNECTED_STATUSES = {
 
 
 def numbers_summary(db: Session, company_id: int | None = None) -> NumbersSummary:
-    total = db.query(func.count(PhoneNumber.id)).scalar() or 0
+    total = number_counter_service.total(db)
 
     status_counts: dict[str, int] = {status.value: 0 for status in CallStatus}
 
     if company_id is not None:
-        # Latest call result per number for this company using window function
-        from sqlalchemy import over
-        inner = (
-            db.query(
-                CallResult.phone_number_id,
-                CallResult.status,
-                func.row_number().over(
-                    partition_by=CallResult.phone_number_id,
-                    order_by=CallResult.attempted_at.desc(),
-                ).label("rn"),
-            )
-            .filter(CallResult.company_id == company_id)
-            .subquery()
-        )
+        # Latest status per number for this company, one row per called number
         rows = (
-            db.query(inner.c.status, func.count(inner.c.phone_number_id))
-            .filter(inner.c.rn == 1)
-            .group_by(inner.c.status)
+            db.query(CompanyNumberState.latest_status, func.count(CompanyNumberState.number_id))
+            .filter(CompanyNumberState.company_id == company_id)
+            .group_by(CompanyNumberState.latest_status)
             .all()
         )
         called_total = 0
@@ -92,10 +79,7 @@ def attempt_summary(db: Session, days: int | None = None, hours: int | None = No
         start_tehran = _tehran_start_of_day(days - 1)
         start_utc = start_tehran.astimezone(timezone.utc)
 
-    query = db.query(CallResult.status, func.count(CallResult.id))
-    if start_utc:
-        query = query.filter(CallResult.attempted_at >= start_utc)
-    rows = query.group_by(CallResult.status).all()
+    rows = [(status, count) for _, status, count in call_stats_service.counts(db, start_utc=start_utc)]
     total = sum(count for _, count in rows)
     status_shares: list[StatusShare] = []
     for status, count in rows:
@@ -142,25 +126,8 @@ def attempt_trend(db: Session, span: int = 14, granularity: str = "day", company
 
     start_utc = start_tehran.astimezone(timezone.utc)
 
-    # Use SQL-level date_trunc with timezone for fast aggregation
-    bucket_expr = func.date_trunc(
-        granularity,
-        func.timezone(tz_name, CallResult.attempted_at),
-    ).label("bucket")
-
-    query = (
-        db.query(
-            bucket_expr,
-            CallResult.status,
-            func.count(CallResult.id).label("cnt"),
-        )
-        .filter(CallResult.attempted_at >= start_utc)
-    )
-
-    if company_id is not None:
-        query = query.filter(CallResult.company_id == company_id)
-
-    rows = query.group_by(bucket_expr, CallResult.status).all()
+    # Hourly rollup plus the raw rows it does not cover yet, bucketed in Tehran wall-clock time
+    rows = call_stats_service.counts(db, start_utc=start_utc, company_id=company_id, group=granularity)
 
     # Build bucket dict from SQL results
     buckets: dict[datetime, dict[CallStatus, int]] = defaultdict(lambda: defaultdict(int))
@@ -205,32 +172,26 @@ def attempt_trend(db: Session, span: int = 14, granularity: str = "day", company
 
 def cost_summary(db: Session, company_id: int) -> dict:
     # Get company billing config from settings
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = company_registry.get(db, company_id)
     if not company or not company.settings:
         rate = 0
     else:
         rate = company.settings.get("cost_per_connected", 0)
 
     now_tehran = datetime.now(TEHRAN_TZ)
-    start_of_day = datetime.combine(now_tehran.date(), time(0, 0), tzinfo=TEHRAN_TZ).astimezone(timezone.utc)
     start_of_month = datetime.combine(now_tehran.date().replace(day=1), time(0, 0), tzinfo=TEHRAN_TZ).astimezone(timezone.utc)
 
-    daily_count = (
-        db.query(func.count(CallResult.id))
-        .filter(CallResult.company_id == company_id)
-        .filter(CallResult.status.in_([status.value for status in CONNECTED_STATUSES]))
-        .filter(CallResult.attempted_at >= start_of_day)
-        .scalar()
-        or 0
-    )
-    monthly_count = (
-        db.query(func.count(CallResult.id))
-        .filter(CallResult.company_id == company_id)
-        .filter(CallResult.status.in_([status.value for status in CONNECTED_STATUSES]))
-        .filter(CallResult.attempted_at >= start_of_month)
-        .scalar()
-        or 0
+    # One read for the month, bucketed per day; today's count is the buckets from today on.
+    per_day = call_stats_service.counts(
+        db,
+        start_utc=start_of_month,
+        company_id=company_id,
+        statuses=[status.value for status in CONNECTED_STATUSES],
+        group="day",
     )
+    today = datetime.combine(now_tehran.date(), time(0, 0))
+    monthly_count = sum(count for _, _, count in per_day)
+    daily_count = sum(count for day, _, count in per_day if day >= today)
     return {
         "currency": "Toman",
         "cost_per_connected": rate,
@@ -266,6 +227,13 @@ def _resolve_time_filter(time_filter: str) -> tuple[datetime | None, datetime |
     return None, None
 
 
+def closed_day(time_filter: str) -> date | None:
+    """The finished Tehran day a dashboard time filter covers, if it covers only that day."""
+    if time_filter == "yesterday":
+        return datetime.now(TEHRAN_TZ).date() - timedelta(days=1)
+    return None
+
+
 def dashboard_stats(
     db: Session,
     company_id: int,
@@ -306,31 +274,15 @@ def dashboard_stats(
     """
     start_utc, end_utc = _resolve_time_filter(time_filter)
 
-    # Determine grouping column and label model
-    if group_by == "scenario":
-        group_col = CallResult.scenario_id
-        label_model = Scenario
-    else:
-        group_col = CallResult.outbound_line_id
-        label_model = OutboundLine
-
-    # Query call results grouped by scenario/line and status
-    query = (
-        db.query(
-            group_col.label("group_id"),
-            CallResult.status,
-            func.count(CallResult.id).label("count")
-        )
-        .filter(CallResult.company_id == company_id)
+    # Call counts per scenario/line and status, from the hourly rollup
+    rows = call_stats_service.counts(
+        db,
+        start_utc=start_utc,
+        end_utc=end_utc,
+        company_id=company_id,
+        group="scenario" if group_by == "scenario" else "line",
     )
 
-    if start_utc:
-        query = query.filter(CallResult.attempted_at >= start_utc)
-    if end_utc:
-        query = query.filter(CallResult.attempted_at <= end_utc)
-
-    rows = query.group_by(group_col, CallResult.status).all()
-
     # Build matrix
     groups_dict = defaultdict(lambda: defaultdict(int))
     for group_id, status, count in rows:
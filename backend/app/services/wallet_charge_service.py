@@ -0,0 +1,155 @@
+import logging
+import threading
+
+from sqlalchemy import select, update, exists, func, case, values, column, cast, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..core import jobs, metrics
+from ..core.config import get_settings
+from ..core.locks import advisory_lock
+from ..models.scenario import Scenario
+from ..models.schedule import ScheduleConfig
+from ..models.wallet import WalletCharge
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SETTLER_JOB = "wallet_settler"
+# Same fallback ensure_config writes when a company has no cost configured.
+DEFAULT_COST_PER_CONNECTED = 150
+
+_recorded_lock = threading.Lock()
+_recorded_since_settle = 0
+
+
+def record_charges(db: Session, charges: list[tuple[int, int | None, int | None]]) -> int:
+    """
+    Append one pending ledger row per billable call: (company_id, call_result_id, scenario_id).
+
+    A single INSERT ... SELECT resolves each amount (scenario cost, else company cost) without
+    touching schedule_configs rows, so concurrent reports of one company never wait on each other.
+    Zero-cost calls are not recorded. Caller commits.
+    """
+    if not charges:
+        return 0
+    charged = values(
+        column("company_id", Integer),
+        column("call_result_id", Integer),
+        column("scenario_id", Integer),
+        name="charged",
+    ).data(charges)
+    company_id = cast(charged.c.company_id, Integer)
+    scenario_id = cast(charged.c.scenario_id, Integer)
+    amount = func.coalesce(
+        Scenario.cost_per_connected, ScheduleConfig.cost_per_connected, DEFAULT_COST_PER_CONNECTED
+    )
+    result = db.execute(
+        insert(WalletCharge).from_select(
+            ["company_id", "call_result_id", "scenario_id", "amount_toman"],
+            select(company_id, cast(charged.c.call_result_id, Integer), scenario_id, amount)
+            .select_from(charged)
+            .outerjoin(Scenario, (Scenario.id == scenario_id) & (Scenario.company_id == company_id))
+            .outerjoin(ScheduleConfig, ScheduleConfig.company_id == company_id)
+            .where(amount > 0),
+        )
+    )
+    recorded = result.rowcount or 0
+    metrics.inc("wallet.charges_recorded", recorded)
+    _note_recorded(recorded)
+    return recorded
+
+
+def _note_recorded(count: int) -> None:
+    """Wake the settler early once WALLET_SETTLE_MAX_PENDING charges were recorded by this process."""
+    global _recorded_since_settle
+    with _recorded_lock:
+        _recorded_since_settle += count
+        due = _recorded_since_settle >= settings.wallet_settle_max_pending
+        if due:
+            _recorded_since_settle = 0
+    if due:
+        jobs.wake_job(SETTLER_JOB)
+
+
+def pending_total_subquery(company_id: int | None):
+    return (
+        select(func.coalesce(func.sum(WalletCharge.amount_toman), 0))
+        .where(WalletCharge.company_id == company_id, WalletCharge.settled_at.is_(None))
+        .scalar_subquery()
+    )
+
+
+def pending_total(db: Session, company_id: int | None) -> int:
+    """Sum of charges not folded into wallet_balance yet."""
+    if company_id is None:
+        return 0
+    return int(db.execute(select(pending_total_subquery(company_id))).scalar() or 0)
+
+
+def settle_company(db: Session, company_id: int, chunk_size: int = 5000) -> int:
+    """
+    Fold up to `chunk_size` pending charges of one company into its wallet_balance in one statement.
+
+    Balance floors at zero; when a positive total leaves nothing, dialing is disabled
+    (disabled_by_dialer, version bumped) exactly like the former per-call charge did.
+    Charges of a company without a schedule_configs row wait until it has one. Caller commits.
+    Returns the number of charges settled.
+    """
+    batch = (
+        select(WalletCharge.id)
+        .where(
+            WalletCharge.company_id == company_id,
+            WalletCharge.settled_at.is_(None),
+            exists().where(ScheduleConfig.company_id == company_id),
+        )
+        .order_by(WalletCharge.id)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    settled = (
+        update(WalletCharge)
+        .where(WalletCharge.id.in_(batch))
+        .values(settled_at=func.now())
+        .returning(WalletCharge.amount_toman)
+        .cte("settled")
+    )
+    total = select(func.coalesce(func.sum(settled.c.amount_toman), 0)).scalar_subquery()
+    count = select(func.count()).select_from(settled).scalar_subquery()
+    balance = func.coalesce(ScheduleConfig.wallet_balance, 0)
+    exhausted = balance - total <= 0
+    row = db.execute(
+        update(ScheduleConfig)
+        .where(ScheduleConfig.company_id == company_id, total > 0)
+        .values(
+            wallet_balance=case((balance <= 0, ScheduleConfig.wallet_balance), else_=func.greatest(balance - total, 0)),
+            enabled=case((exhausted, False), else_=ScheduleConfig.enabled),
+            disabled_by_dialer=case((exhausted, True), else_=ScheduleConfig.disabled_by_dialer),
+            version=ScheduleConfig.version + case((exhausted, 1), else_=0),
+        )
+        .returning(count)
+        .add_cte(settled)
+    ).first()
+    return row[0] if row else 0
+
+
+def settle_pending(chunk_size: int = 5000) -> None:
+    """Background job: settle every company with pending charges; single runner across processes."""
+    with advisory_lock("wallet_settle") as conn:
+        if conn is None:
+            metrics.inc("wallet.settle_skipped_locked")
+            return
+        with Session(bind=conn) as db:
+            companies = db.execute(
+                select(WalletCharge.company_id).where(WalletCharge.settled_at.is_(None)).distinct()
+            ).scalars().all()
+            settled = 0
+            for company_id in companies:
+                while True:
+                    count = settle_company(db, company_id, chunk_size)
+                    db.commit()
+                    settled += count
+                    if count < chunk_size:
+                        break
+    metrics.inc("wallet.charges_settled", settled)
+    metrics.set_gauge("wallet.pending_companies", len(companies))
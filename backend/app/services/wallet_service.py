@@ -6,16 +6,17 @@ from urllib import request
 import logging
 import json
 import re
-import jdatetime
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from ..core.config import get_settings
+from ..core.config import get_settings, on_reload
+from ..core import events
 from ..models.schedule import ScheduleConfig
 from ..models.user import AdminUser
 from ..models.wallet import BankIncomingSms, WalletTransaction
 from .schedule_service import TEHRAN_TZ, ensure_config
+from .wallet_charge_service import settle_company
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -84,6 +85,8 @@ def build_utc_datetime_from_jalali_minute(jalali_date: str, hour: int, minute: i
         raise ValueError("invalid_jalali_date")
     if not (0 <= hour <= 23 and 0 <= minute <= 59):
         raise ValueError("invalid_time")
+    import jdatetime  # lazy: only wallet date filters and SMS texts need it
+
     jy, jm, jd = map(int, date_match.groups())
     g_date = jdatetime.date(jy, jm, jd).togregorian()
     tehran_dt = datetime.combine(g_date, time(hour=hour, minute=minute), tzinfo=TEHRAN_TZ)
@@ -150,11 +153,28 @@ def _build_bank_profiles() -> list[BankSmsProfile]:
     return profiles
 
 
+_bank_profiles: list[BankSmsProfile] | None = None
+
+
+def _get_bank_profiles() -> list[BankSmsProfile]:
+    """Built from settings once per process; rebuilt after a settings reload."""
+    global _bank_profiles
+    if _bank_profiles is None:
+        _bank_profiles = _build_bank_profiles()
+    return _bank_profiles
+
+
+@on_reload
+def _reset_bank_profiles(_settings) -> None:
+    global _bank_profiles
+    _bank_profiles = None
+
+
 def _resolve_profile_by_sender(sender: str) -> BankSmsProfile | None:
     normalized_sender = _normalize_sender(sender)
     if not normalized_sender:
         return None
-    for profile in _build_bank_profiles():
+    for profile in _get_bank_profiles():
         if normalized_sender in profile.sms_senders:
             return profile
     return None
@@ -238,6 +258,8 @@ def _format_amount_toman(amount_toman: int) -> str:
 
 def _to_jalali_datetime_text(dt: datetime) -> str:
     tx_dt = dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    import jdatetime
+
     tehran_dt = tx_dt.astimezone(TEHRAN_TZ)
     jdt = jdatetime.datetime.fromgregorian(datetime=tehran_dt)
     return f"{jdt.year:04d}/{jdt.month:02d}/{jdt.day:02d}-{jdt.hour:02d}:{jdt.minute:02d}"
@@ -328,10 +350,13 @@ def _apply_wallet_delta(
         raise HTTPException(status_code=400, detail="Transaction amount cannot be zero")
 
     cfg = ensure_config(db, company_id=company_id)
+    # Fold pending call charges in first so the check and balance_after see the real balance.
+    settle_company(db, company_id)
     cfg = (
         db.query(ScheduleConfig)
         .filter(ScheduleConfig.id == cfg.id)
         .with_for_update()
+        .populate_existing()
         .first()
     )
     if not cfg:
@@ -372,6 +397,7 @@ def _apply_wallet_delta(
         bank_sms_id=bank_sms_id,
     )
     db.add(tx)
+    events.notify(db, company_id)
     db.commit()
     db.refresh(tx)
     return tx
@@ -0,0 +1,64 @@
+"""
+Measure worker cold start: time from process spawn to the first successful /health response.
+
+Each run starts a fresh `uvicorn app.main:app` process (same environment as this one, so point
+DATABASE_URL at the real database to include the startup schema check), polls /health until it
+answers 200, then stops it. Import time of `app.main` alone is reported separately.
+
+    python -m app.utils.bench_cold_start [--runs N --port P]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+def _import_seconds() -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True, env=os.environ.copy())
+    return time.perf_counter() - started
+
+
+def _first_request_seconds(port: int, timeout: float) -> float:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"worker exited with code {proc.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"no /health response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark worker cold start (spawn to first /health response)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    imports = [_import_seconds() for _ in range(args.runs)]
+    first = [_first_request_seconds(args.port, args.timeout) for _ in range(args.runs)]
+    for label, samples in (("import app.main", imports), ("time to first request", first)):
+        print(
+            f"{label:>22}: median {statistics.median(samples) * 1000:.0f} ms, "
+            f"best {min(samples) * 1000:.0f} ms, worst {max(samples) * 1000:.0f} ms over {args.runs} runs"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Compare the legacy NOT EXISTS next-batch query with the company_dial_queue range scan.
+
+Seeds an isolated schema (default 5M numbers / 30M call results) so production tables
+are never touched, then times both selections with EXPLAIN ANALYZE. Numbers are dialed in id
+order, so every company has called the first --called-share of them (several results each) and
+never the rest; a few of the uncalled ones are leased. Both queries skip leased numbers the way
+production does (NOT EXISTS on number_leases).
+
+    python -m app.utils.bench_dial_queue --database-url postgresql://... [--numbers N --results N --called-share F]
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_dial_queue"
+
+SETUP_SQL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.numbers (
+        id INTEGER PRIMARY KEY,
+        phone_number VARCHAR(32) NOT NULL,
+        global_status VARCHAR(32) NOT NULL DEFAULT 'ACTIVE',
+        last_called_at TIMESTAMPTZ
+    )
+    """,
+    f"CREATE TABLE {SCHEMA}.number_leases (number_id INTEGER PRIMARY KEY)",
+    f"""
+    CREATE TABLE {SCHEMA}.call_results (
+        id BIGSERIAL PRIMARY KEY,
+        phone_number_id INTEGER NOT NULL,
+        company_id INTEGER NOT NULL,
+        attempted_at TIMESTAMPTZ NOT NULL
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.company_dial_queue (
+        company_id INTEGER NOT NULL,
+        number_id INTEGER NOT NULL,
+        eligible_at TIMESTAMPTZ NOT NULL,
+        PRIMARY KEY (company_id, number_id)
+    )
+    """,
+]
+
+SEED_SQL = [
+    f"""
+    INSERT INTO {SCHEMA}.numbers (id, phone_number, last_called_at)
+    SELECT g, '09' || lpad(g::text, 9, '0'),
+           CASE WHEN g % 4 = 0 THEN now() - (g % 10) * interval '1 day' END
+    FROM generate_series(1, :numbers) g
+    """,
+    # Each company has called numbers 1..:called (round-robin over companies, several results
+    # per pair); numbers above :called were never called by anyone and are what the queue holds.
+    f"""
+    INSERT INTO {SCHEMA}.call_results (phone_number_id, company_id, attempted_at)
+    SELECT 1 + (g / :companies) % :called, 1 + g % :companies, now() - (g % 30) * interval '1 day'
+    FROM generate_series(0, :results - 1) g
+    """,
+    f"""
+    INSERT INTO {SCHEMA}.number_leases (number_id)
+    SELECT g FROM generate_series(:called + 1, LEAST(:called + :leased, :numbers)) g
+    """,
+    f"CREATE INDEX ON {SCHEMA}.call_results (phone_number_id, company_id)",
+    f"CREATE INDEX ON {SCHEMA}.numbers (global_status, last_called_at)",
+    f"""
+    INSERT INTO {SCHEMA}.company_dial_queue (company_id, number_id, eligible_at)
+    SELECT c, n.id, COALESCE(n.last_called_at + interval '3 days', TIMESTAMPTZ '1970-01-01 00:00:00+00')
+    FROM generate_series(1, :companies) c
+    CROSS JOIN {SCHEMA}.numbers n
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {SCHEMA}.call_results cr WHERE cr.phone_number_id = n.id AND cr.company_id = c
+    )
+    """,
+    f"CREATE INDEX ON {SCHEMA}.company_dial_queue (company_id, eligible_at, number_id)",
+    f"ANALYZE {SCHEMA}.numbers",
+    f"ANALYZE {SCHEMA}.number_leases",
+    f"ANALYZE {SCHEMA}.call_results",
+    f"ANALYZE {SCHEMA}.company_dial_queue",
+]
+
+LEGACY_SQL = f"""
+    SELECT n.id FROM {SCHEMA}.numbers n
+    WHERE n.global_status = 'ACTIVE'
+      AND NOT EXISTS (SELECT 1 FROM {SCHEMA}.number_leases l WHERE l.number_id = n.id)
+      AND (n.last_called_at IS NULL OR n.last_called_at <= now() - interval '3 days')
+      AND NOT EXISTS (
+          SELECT 1 FROM {SCHEMA}.call_results cr
+          WHERE cr.phone_number_id = n.id AND cr.company_id = :company_id
+      )
+    ORDER BY n.id
+    LIMIT :size
+"""
+
+QUEUE_SQL = f"""
+    SELECT n.id FROM {SCHEMA}.company_dial_queue q
+    JOIN {SCHEMA}.numbers n ON n.id = q.number_id
+    WHERE q.company_id = :company_id
+      AND q.eligible_at <= now()
+      AND n.global_status = 'ACTIVE'
+      AND NOT EXISTS (SELECT 1 FROM {SCHEMA}.number_leases l WHERE l.number_id = q.number_id)
+    ORDER BY q.eligible_at, q.number_id
+    LIMIT :size
+"""
+
+
+def _time(conn, sql: str, params: dict, runs: int) -> tuple[float, str]:
+    best = None
+    plan = ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params).scalars().all()
+        elapsed = (time.perf_counter() - started) * 1000
+        if best is None or elapsed < best:
+            best, plan = elapsed, "\n".join(rows)
+    return best, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark next-batch selection: NOT EXISTS vs company_dial_queue")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--numbers", type=int, default=5_000_000)
+    parser.add_argument("--results", type=int, default=30_000_000)
+    parser.add_argument("--companies", type=int, default=3)
+    parser.add_argument("--called-share", type=float, default=0.6, help="Share of numbers every company has called")
+    parser.add_argument("--leased", type=int, default=1000, help="Uncalled numbers currently leased")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded schema for inspection")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    params = {
+        "numbers": args.numbers,
+        "results": args.results,
+        "companies": args.companies,
+        "called": max(1, min(args.numbers, int(args.numbers * args.called_share))),
+        "leased": args.leased,
+    }
+    try:
+        with engine.begin() as conn:
+            started = time.perf_counter()
+            for stmt in SETUP_SQL:
+                conn.execute(text(stmt))
+            for stmt in SEED_SQL:
+                conn.execute(text(stmt), params)
+            print(f"Seeded {args.numbers} numbers / {args.results} results in {time.perf_counter() - started:.1f}s")
+            queued = conn.execute(text(f"SELECT count(*) FROM {SCHEMA}.company_dial_queue WHERE company_id = 1")).scalar()
+            print(f"Company 1 has {queued} never-called numbers queued")
+
+        with engine.connect() as conn:
+            query_params = {"company_id": 1, "size": args.batch_size}
+            for label, sql in (("legacy NOT EXISTS", LEGACY_SQL), ("company_dial_queue", QUEUE_SQL)):
+                best, plan = _time(conn, sql, query_params, args.runs)
+                print(f"\n== {label}: best of {args.runs} = {best:.1f} ms\n{plan}")
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
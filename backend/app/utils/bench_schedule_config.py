@@ -0,0 +1,64 @@
+"""
+Count the SQL a next-batch schedule check issues, with and without the former per-call column checks.
+
+"legacy" replays the four `inspect(conn).get_columns(...)` calls ensure_config used to make
+before every read; "current" is the check as it runs now. Runs inside a transaction that is
+rolled back, so a config row created for the company is not kept.
+
+    python -m app.utils.bench_schedule_config --database-url postgresql://... --company-id 1 [--calls N]
+"""
+import argparse
+import time
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.orm import Session
+
+from ..services import schedule_service
+
+CATALOG_MARKERS = ("pg_catalog", "pg_attribute", "pg_class", "information_schema")
+
+
+def _legacy_column_checks(db: Session) -> None:
+    for table in ("schedule_configs", "schedule_configs", "schedule_configs", "scenarios"):
+        inspect(db.connection()).get_columns(table)
+
+
+def _run(db: Session, company_id: int, calls: int, legacy: bool, statements: list[str]) -> tuple[float, int, int]:
+    statements.clear()
+    started = time.perf_counter()
+    for _ in range(calls):
+        if legacy:
+            _legacy_column_checks(db)
+        config = schedule_service.ensure_config(db, company_id=company_id)
+        schedule_service.evaluate_schedule(None, db, company_id=company_id, config=config)
+    elapsed = (time.perf_counter() - started) * 1000 / calls
+    catalog = sum(1 for sql in statements if any(marker in sql for marker in CATALOG_MARKERS))
+    return elapsed, len(statements) / calls, catalog / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request SQL of the next-batch schedule check")
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--company-id", type=int, required=True)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda _c, _cur, sql, *_: statements.append(sql))
+    try:
+        with engine.connect() as conn:
+            transaction = conn.begin()
+            # Commits inside ensure_config become savepoint releases; the outer transaction is rolled back.
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+                _run(db, args.company_id, 1, False, statements)  # warm the compiled-schedule cache
+                for label, legacy in (("legacy column checks", True), ("current", False)):
+                    ms, per_call, catalog = _run(db, args.company_id, args.calls, legacy, statements)
+                    print(f"{label:>22}: {ms:.2f} ms/call, {per_call:.1f} statements/call, {catalog:.1f} catalog queries/call")
+            transaction.rollback()
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import argparse
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.services import call_stats_service
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drop call_stats_hourly; the call_stats_rollup job refolds it from call_results"
+    )
+    parser.parse_args()
+
+    db: Session = SessionLocal()
+    try:
+        call_stats_service.reset(db)
+        db.commit()
+        print("Rollup reset; stats read call_results until the call_stats_rollup job catches up")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import argparse
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.models.company import Company
+from app.services import dial_queue_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the per-company dial queue from numbers and call results")
+    parser.add_argument("--company", help="Company name to rebuild (default: all companies)")
+    args = parser.parse_args()
+
+    db: Session = SessionLocal()
+    try:
+        company_id = None
+        if args.company:
+            company = db.query(Company).filter(Company.name == args.company).first()
+            if not company:
+                print(f"Company {args.company} not found")
+                return
+            company_id = company.id
+        queued = dial_queue_service.rebuild(db, company_id=company_id)
+        db.commit()
+        print(f"Queued {queued} numbers")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
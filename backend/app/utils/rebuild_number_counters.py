@@ -0,0 +1,24 @@
+import argparse
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.services import number_counter_service
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recount number_counters from numbers and company_number_state (blocks their writers briefly)"
+    )
+    parser.parse_args()
+
+    db: Session = SessionLocal()
+    try:
+        number_counter_service.rebuild(db)
+        db.commit()
+        print("number_counters rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import os
+import uuid
+
+import pytest
 
 # Minimal settings so Pydantic config resolves during imports
 os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
@@ -7,3 +10,41 @@ os.environ.setdefault("DIALER_TOKEN", "test-token")
 os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "1440")
 os.environ.setdefault("DEFAULT_BATCH_SIZE", "100")
 os.environ.setdefault("TIMEZONE", "Asia/Tehran")
+
+
+@pytest.fixture
+def pg_engine():
+    """
+    Engine on a throwaway schema of TEST_DATABASE_URL (Postgres) with every table created.
+    Tests that use it are skipped when the variable is not set.
+    """
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import create_engine, text
+
+    from app import models  # noqa: F401  (registers every table)
+    from app.core.db import Base
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    engine = create_engine(url, connect_args={"options": f"-csearch_path={schema}"})
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+    try:
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE call_results_default PARTITION OF call_results DEFAULT"))
+        yield engine
+    finally:
+        engine.dispose()
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        engine.dispose()
+
+
+@pytest.fixture
+def pg_db(pg_engine):
+    from sqlalchemy.orm import Session
+
+    with Session(pg_engine) as db:
+        yield db
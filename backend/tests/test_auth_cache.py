@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import principals, security
+from app.models.user import UserRole
+
+
+class UserDB:
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+        self.statements = []
+
+    def query(self, _model):
+        self.queries += 1
+        return SimpleNamespace(filter=lambda *_a: SimpleNamespace(first=lambda: self.user))
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def make_user(user_id=1, company_id=3, username="ali"):
+    return SimpleNamespace(
+        id=user_id, username=username, role=UserRole.ADMIN, company_id=company_id, is_active=True, is_superuser=False
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(principals, "_entries", OrderedDict())
+    monkeypatch.setattr(principals.settings, "auth_cache_ttl_seconds", 60)
+    monkeypatch.setattr(principals.settings, "auth_cache_size", 1024)
+
+
+def token_for(username="ali"):
+    return security.create_access_token({"sub": username})
+
+
+def test_repeated_requests_with_one_token_query_admin_users_once():
+    db = UserDB(make_user())
+    token = token_for()
+
+    first = security.get_current_user(db, token)
+    second = security.get_current_user(db, token)
+
+    assert db.queries == 1
+    assert first is second
+    assert first == principals.Principal(1, "ali", UserRole.ADMIN, 3, True, False)
+
+
+def test_user_change_drops_the_entry_and_notifies_other_workers():
+    db = UserDB(make_user())
+    token = token_for()
+    security.get_current_user(db, token)
+
+    principals.invalidate_user(db, 1)
+    security.get_current_user(db, token)
+
+    assert db.queries == 2
+    assert [str(stmt) for stmt in db.statements] == ["SELECT pg_notify(:channel, :payload)"]
+
+
+def test_a_row_loaded_before_an_invalidation_is_not_cached():
+    generation = principals.generation()
+    principals._drop("user:1")
+    principals.put("t", principals.Principal.from_user(make_user()), float("inf"), generation)
+
+    assert principals.get("t") is None
+
+
+def test_company_event_only_drops_that_company_and_reconnect_drops_all():
+    for token, user in (("a", make_user(1, 3)), ("b", make_user(2, 4))):
+        principals.put(token, principals.Principal.from_user(user), float("inf"), principals.generation())
+
+    principals._drop("company:3")
+    assert principals.get("a") is None and principals.get("b") is not None
+
+    principals._drop("*")
+    assert principals.get("b") is None
+
+
+def test_cache_is_bounded_and_never_outlives_the_token(monkeypatch):
+    monkeypatch.setattr(principals.settings, "auth_cache_size", 2)
+    principal = principals.Principal.from_user(make_user())
+    for token in ("a", "b", "c"):
+        principals.put(token, principal, float("inf"), principals.generation())
+    principals.put("expired", principal, 0, principals.generation())
+
+    assert principals.get("a") is None
+    assert principals.get("c") is principal
+    assert principals.get("expired") is None
@@ -0,0 +1,102 @@
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+from app.models import CallResult, Company, PhoneNumber
+from app.services import call_partition_service
+
+
+class PartitionDB:
+    def __init__(self, names, fail_on=None):
+        self.names = names
+        self.fail_on = fail_on
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, stmt):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            return SimpleNamespace(scalars=lambda: list(self.names))
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError("lock timeout")
+        self.statements.append(sql)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.statements.append("ROLLBACK")
+
+
+def test_missing_months_are_created_ahead_across_the_year_end(monkeypatch):
+    monkeypatch.setattr(call_partition_service.settings, "call_results_partition_months_ahead", 2)
+    db = PartitionDB(["call_results_y2026m11", "call_results_default"])
+
+    created = call_partition_service.ensure_ahead(db, today=date(2026, 11, 20))
+
+    assert created == ["call_results_y2026m12", "call_results_y2027m01"]
+    assert db.commits == 2  # one transaction per partition
+    assert (
+        "ALTER TABLE call_results ATTACH PARTITION call_results_y2027m01 "
+        "FOR VALUES FROM ('2027-01-01 00:00:00 Asia/Tehran') TO ('2027-02-01 00:00:00 Asia/Tehran')"
+    ) in db.statements
+    assert db.statements[0] == "SET LOCAL lock_timeout = '5s'"
+
+
+def test_rows_already_in_the_default_partition_move_into_the_new_month():
+    statements = call_partition_service.create_partition_sql(date(2027, 3, 1))
+    in_range = (
+        "attempted_at >= '2027-03-01 00:00:00 Asia/Tehran' AND attempted_at < '2027-04-01 00:00:00 Asia/Tehran'"
+    )
+
+    assert statements == [
+        "LOCK TABLE call_results_default IN ACCESS EXCLUSIVE MODE",
+        "CREATE TABLE call_results_y2027m03 (LIKE call_results INCLUDING DEFAULTS)",
+        f"INSERT INTO call_results_y2027m03 SELECT * FROM call_results_default WHERE {in_range}",
+        f"DELETE FROM call_results_default WHERE {in_range}",
+        "ALTER TABLE call_results ATTACH PARTITION call_results_y2027m03 "
+        "FOR VALUES FROM ('2027-03-01 00:00:00 Asia/Tehran') TO ('2027-04-01 00:00:00 Asia/Tehran')",
+    ]
+
+
+def test_retention_drops_whole_months_and_a_failure_is_retried_next_pass(monkeypatch):
+    monkeypatch.setattr(call_partition_service.settings, "call_results_retention_months", 1)
+    names = ["call_results_default", "call_results_y2026m07", "call_results_y2026m08", "call_results_y2026m09"]
+    db = PartitionDB(names, fail_on="DETACH PARTITION call_results_y2026m07")
+
+    dropped = call_partition_service.drop_expired(db, today=date(2026, 10, 17))
+
+    assert dropped == ["call_results_y2026m08"]
+    assert "DROP TABLE call_results_y2026m08" in db.statements
+    assert "ROLLBACK" in db.statements
+    assert not any("call_results_y2026m09" in sql or "call_results_default" in sql for sql in db.statements)
+
+
+def test_model_matches_the_partitioned_table():
+    ddl = str(CreateTable(CallResult.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "PRIMARY KEY (id, attempted_at)" in ddl
+    assert ddl.rstrip().endswith("PARTITION BY RANGE (attempted_at)")
+
+
+def test_a_month_with_early_reports_in_the_default_partition_can_still_be_created(pg_db, monkeypatch):
+    """Against Postgres (TEST_DATABASE_URL)."""
+    monkeypatch.setattr(call_partition_service.settings, "call_results_partition_months_ahead", 1)
+    db = pg_db
+    company, number = Company(name="a", display_name="A"), PhoneNumber(phone_number="09120000000")
+    db.add_all([company, number])
+    db.flush()
+    for day in (1, 28):  # both in Tehran's March 2027, months ahead of the dialer's real clock
+        attempted_at = datetime(2027, 3, day, 12, tzinfo=timezone.utc)
+        db.add(CallResult(company_id=company.id, phone_number_id=number.id, status="MISSED", attempted_at=attempted_at))
+    db.commit()
+
+    created = call_partition_service.ensure_ahead(db, today=date(2027, 2, 10))
+
+    assert created == ["call_results_y2027m02", "call_results_y2027m03"]
+    assert db.execute(text("SELECT count(*) FROM call_results_y2027m03")).scalar() == 2
+    assert db.execute(text("SELECT count(*) FROM call_results_default")).scalar() == 0
+    assert db.execute(select(func.count()).select_from(CallResult)).scalar() == 2
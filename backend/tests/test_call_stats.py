@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.api import companies
+from app.models import CallResult, CallStatsHourly, Company, PhoneNumber, UserRole
+from app.models.phone_number import CallStatus
+from app.schemas.company import CompanyDeleteRequest
+from app.schemas.phone_number import PhoneNumberBulkAction, PhoneNumberStatusUpdate
+from app.services import call_stats_service, number_state_service, phone_service
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+class RollupDB:
+    def __init__(self, mark, latest_id, now):
+        self.mark = mark
+        self.latest_id = latest_id
+        self.now = now
+        self.open_since = None  # xact_start of the oldest other open transaction
+        self.folds = []
+        self.commits = 0
+
+    def get(self, _model, _name, with_for_update=None):
+        assert with_for_update
+        return self.mark
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_stat_activity" in sql:
+            open_before = self.open_since is not None and self.open_since <= params["at"]
+            return SimpleNamespace(scalar=lambda: open_before)
+        if sql.startswith("SELECT max(call_results.id) AS max_1, clock_timestamp()"):
+            return SimpleNamespace(one=lambda: (self.latest_id, self.now))
+        assert sql.startswith("INSERT INTO call_stats_hourly")
+        params = stmt.compile().params
+        self.folds.append((params["id_1"], params["id_2"]))
+        return SimpleNamespace(all=lambda: [])
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_an_id_range_is_folded_only_after_transactions_older_than_its_marker_ended():
+    t0 = utc(2026, 1, 1, 8)
+    mark = SimpleNamespace(last_id=0, pending_id=None, pending_at=None)
+    db = RollupDB(mark, latest_id=100, now=t0)
+
+    assert call_stats_service.fold_settled(db, chunk_size=40) == 0
+    assert (mark.pending_id, mark.pending_at) == (100, t0)
+
+    # A transaction that began before the marker may still commit an id below 100, however long it takes.
+    db.now, db.latest_id, db.open_since = t0 + timedelta(hours=1), 120, t0 - timedelta(seconds=1)
+    call_stats_service.fold_settled(db, chunk_size=40)
+    assert db.folds == [] and mark.pending_id == 100  # not folded, not replaced either
+
+    db.open_since = t0 + timedelta(seconds=1)  # only newer transactions are open now
+    assert call_stats_service.fold_settled(db, chunk_size=40) == 100
+    assert db.folds == [(0, 40), (40, 80), (80, 100)]
+    assert (mark.pending_id, mark.pending_at) == (120, db.now)
+
+
+def test_whole_hours_come_from_the_rollup_and_the_rest_from_call_results():
+    captured = []
+
+    class DB:
+        def execute(self, stmt):
+            captured.append(stmt)
+            return SimpleNamespace(all=lambda: [(3, "CONNECTED", Decimal(7))])
+
+    # 10:45 to 14:29:59.999999 Tehran (UTC+03:30)
+    rows = call_stats_service.counts(
+        DB(),
+        start_utc=utc(2026, 1, 1, 7, 15),
+        end_utc=utc(2026, 1, 1, 10, 59, 59, 999999),
+        company_id=3,
+        group="scenario",
+    )
+
+    assert rows == [(3, "CONNECTED", 7)]
+    sql = str(captured[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    rolled, raw = sql.split("UNION ALL")
+    assert "call_stats_hourly.hour_tehran >= '2026-01-01 11:00:00'" in rolled
+    assert "call_stats_hourly.hour_tehran < '2026-01-01 14:00:00'" in rolled
+    # Rows the job has not folded yet, plus the partial hours at both ends.
+    assert "call_results.id > coalesce((SELECT rollup_watermarks.last_id" in raw
+    assert "call_results.attempted_at >= '2026-01-01 07:15:00+00:00' AND call_results.attempted_at < '2026-01-01 07:30:00+00:00'" in raw
+    assert "call_results.attempted_at >= '2026-01-01 10:30:00+00:00' AND call_results.attempted_at < '2026-01-01 11:00:00+00:00'" in raw
+
+
+def test_a_range_inside_one_hour_reads_only_call_results():
+    first, after_last = call_stats_service._hour_bounds(utc(2026, 1, 1, 7, 35), utc(2026, 1, 1, 7, 50))
+
+    assert first == after_last  # no whole hour in between: the rollup range is empty
+
+
+# Against Postgres (TEST_DATABASE_URL): the rollup must equal a scan of call_results.
+
+
+def rollup_counts(db) -> dict:
+    key = [CallStatsHourly.company_id, CallStatsHourly.hour_tehran, CallStatsHourly.status]
+    rows = db.execute(select(*key, func.sum(CallStatsHourly.count)).group_by(*key)).all()
+    return {tuple(row[:3]): row[3] for row in rows if row[3]}
+
+
+def raw_counts(db) -> dict:
+    key = [CallResult.company_id, call_stats_service._local("hour", CallResult.attempted_at), CallResult.status]
+    return {tuple(row[:3]): row[3] for row in db.execute(select(*key, func.count()).group_by(*key)).all()}
+
+
+def add_calls(db, calls) -> None:
+    """calls: (company, number, status, attempted_at); keeps company_number_state like a report does."""
+    rows = [CallResult(company_id=c.id, phone_number_id=n.id, status=s, attempted_at=at) for c, n, s, at in calls]
+    db.add_all(rows)
+    db.flush()
+    number_state_service.record_calls(
+        db, [(r.company_id, r.phone_number_id, r.id, r.status, r.attempted_at, None) for r in rows]
+    )
+    db.commit()
+
+
+def fold_everything(db) -> None:
+    call_stats_service.fold_settled(db)  # takes the marker
+    last_id = call_stats_service.fold_settled(db)
+    assert last_id == db.execute(select(func.max(CallResult.id))).scalar()
+
+
+def test_admin_edits_and_deletes_keep_the_rollup_equal_to_call_results(pg_db, monkeypatch):
+    db = pg_db
+    a, b = Company(name="a", display_name="A"), Company(name="b", display_name="B")
+    numbers = [PhoneNumber(phone_number=f"0912000000{i}") for i in range(6)]
+    db.add_all([a, b, *numbers])
+    db.flush()
+    at = utc(2026, 1, 1, 6)
+    add_calls(db, [(a, n, "MISSED", at + timedelta(hours=i)) for i, n in enumerate(numbers)])
+    add_calls(db, [(a, n, "BUSY", at + timedelta(days=1)) for n in numbers[:3]])
+    add_calls(db, [(b, n, "CONNECTED", at + timedelta(minutes=i)) for i, n in enumerate(numbers)])
+    fold_everything(db)
+    # Not folded yet: edits leave these to the job.
+    add_calls(db, [(a, numbers[4], "HANGUP", at + timedelta(days=2))])
+    assert rollup_counts(db) != raw_counts(db)
+
+    admin = SimpleNamespace(role=UserRole.ADMIN, is_superuser=True, company_id=a.id)
+    monkeypatch.setattr(phone_service, "_resolve_company_id", lambda db, user, name: a.id)
+    steps = [
+        lambda: phone_service.update_number_status(
+            db, numbers[0].id, PhoneNumberStatusUpdate(status=CallStatus.CONNECTED), admin
+        ),
+        lambda: phone_service.update_number_status(
+            db, numbers[4].id, PhoneNumberStatusUpdate(status=CallStatus.NOT_INTERESTED), admin
+        ),
+        lambda: phone_service.bulk_action(
+            db,
+            PhoneNumberBulkAction(
+                action="update_status", ids=[n.id for n in numbers[1:4]], status=CallStatus.NOT_INTERESTED
+            ),
+            admin,
+        ),
+        lambda: phone_service.reset_number(db, numbers[1].id, admin),
+        lambda: phone_service.bulk_action(db, PhoneNumberBulkAction(action="reset", ids=[numbers[2].id]), admin),
+        lambda: phone_service.delete_number(db, numbers[3].id, admin),
+        lambda: phone_service.bulk_action(db, PhoneNumberBulkAction(action="delete", ids=[numbers[5].id]), admin),
+        lambda: companies.delete_company(b.id, CompanyDeleteRequest(confirm_name="b"), db, admin),
+    ]
+    for step in steps:
+        step()
+        fold_everything(db)
+        assert rollup_counts(db) == raw_counts(db)
+
+
+def test_a_lower_id_that_commits_late_is_still_folded(pg_engine):
+    with Session(pg_engine) as setup:
+        company, number = Company(name="a", display_name="A"), PhoneNumber(phone_number="09120000000")
+        setup.add_all([company, number])
+        setup.commit()
+        company_id, number_id = company.id, number.id
+
+    def call(status):
+        return CallResult(company_id=company_id, phone_number_id=number_id, status=status, attempted_at=utc(2026, 1, 1))
+
+    with Session(pg_engine) as slow, Session(pg_engine) as fast, Session(pg_engine) as job:
+        slow.add(call("MISSED"))
+        slow.flush()  # holds the lower id, uncommitted
+        fast.add(call("BUSY"))
+        fast.commit()
+
+        call_stats_service.fold_settled(job)  # marker: the higher id
+        assert call_stats_service.fold_settled(job) == 0  # the slow transaction is older than the marker
+
+        slow.commit()
+        assert call_stats_service.fold_settled(job) == 2
+        assert rollup_counts(job) == raw_counts(job)
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.core import events
+from app.services import company_registry
+
+
+class CompaniesDB:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.loads = 0
+
+    def execute(self, _stmt):
+        self.loads += 1
+        return SimpleNamespace(all=lambda: list(self.rows))
+
+
+def row(company_id, name, is_active=True, profile_version=1):
+    return SimpleNamespace(
+        id=company_id,
+        name=name,
+        display_name=name.title(),
+        is_active=is_active,
+        settings={"cost_per_connected": 100},
+        profile_version=profile_version,
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(company_registry, "_snapshot", None)
+    monkeypatch.setattr(company_registry.settings, "company_registry_max_age_seconds", 300)
+    monkeypatch.setattr(events, "publish", lambda db, channel, payload: None)
+
+
+def test_lookups_are_served_from_one_load():
+    db = CompaniesDB(row(1, "acme"), row(2, "old", is_active=False))
+
+    assert company_registry.require_active(db, "acme").id == 1
+    assert company_registry.get(db, 2).display_name == "Old"
+    assert company_registry.get_by_name(db, "old") is None
+    assert company_registry.get_by_name(db, "old", active_only=False).id == 2
+    with pytest.raises(HTTPException) as exc:
+        company_registry.require_active(db, "missing")
+    assert exc.value.status_code == 404
+    assert db.loads == 1
+
+
+def test_invalidation_applies_only_once_the_writer_commits():
+    db = CompaniesDB(row(1, "acme", profile_version=4))
+    company_registry.load(db)
+    writer = Session(create_engine("sqlite://"))
+
+    writer.execute(text("SELECT 1"))
+    company_registry.invalidate(writer)
+    db.rows = [row(1, "acme", profile_version=5)]
+    assert company_registry.require_active(db, "acme").profile_version == 4  # not committed yet
+    writer.rollback()
+    assert company_registry._PENDING not in writer.info
+    assert company_registry.require_active(db, "acme").profile_version == 4
+
+    writer.execute(text("SELECT 1"))
+    company_registry.invalidate(writer)
+    writer.commit()
+    assert company_registry.require_active(db, "acme").profile_version == 5
+    assert db.loads == 2
+
+
+def test_notify_from_another_worker_drops_the_snapshot():
+    db = CompaniesDB(row(1, "acme"))
+    company_registry.load(db)
+
+    events._handle(company_registry.CHANNEL, events.ALL_COMPANIES)
+    company_registry.get(db, 1)
+
+    assert db.loads == 2
+
+
+def test_a_snapshot_read_across_an_invalidation_is_not_kept():
+    class RacingDB(CompaniesDB):
+        def execute(self, stmt):
+            company_registry._drop()  # another worker's change lands while this load runs
+            return super().execute(stmt)
+
+    db = RacingDB(row(1, "acme"))
+    company_registry.get(db, 1)
+    company_registry.get(db, 1)
+
+    assert db.loads == 2
+
+
+def test_old_snapshots_are_reloaded(monkeypatch):
+    db = CompaniesDB(row(1, "acme"))
+    company_registry.load(db)
+    monkeypatch.setattr(company_registry.settings, "company_registry_max_age_seconds", 0)
+
+    company_registry.get(db, 1)
+
+    assert db.loads == 2
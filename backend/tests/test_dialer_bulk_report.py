@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.sql import Insert, Update
+
+from app.models.phone_number import CallStatus, GlobalStatus, PhoneNumber
+from app.schemas.dialer import DialerReport
+from app.services import dialer_service
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDB:
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+
+    def query(self, *entities):
+        return FakeQuery([])
+
+    def execute(self, *args, **kwargs):
+        self.executed.append(args)
+
+    def commit(self):
+        self.commits += 1
+
+
+def _report(**overrides):
+    data = {
+        "phone_number": "09123456789",
+        "company": "acme",
+        "status": CallStatus.CONNECTED,
+        "attempted_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    }
+    data.update(overrides)
+    return DialerReport(**data)
+
+
+def test_bulk_report_returns_per_item_errors_without_writing(monkeypatch):
+    monkeypatch.setattr(dialer_service.company_registry, "get_by_name", lambda db, name: None)
+    db = FakeDB()
+    results = dialer_service.report_results(db, [_report(), _report(company="other")])
+    assert [r["index"] for r in results] == [0, 1]
+    assert all(not r["ok"] and r["error"] == "Company not found" for r in results)
+    assert db.executed == []
+
+
+def test_bulk_report_rejects_oversized_requests(monkeypatch):
+    monkeypatch.setattr(dialer_service.settings, "max_report_batch_size", 1)
+    with pytest.raises(HTTPException) as exc:
+        dialer_service.report_results(FakeDB(), [_report(), _report()])
+    assert exc.value.status_code == 400
+
+
+class RacedReplayDB(FakeDB):
+    """The report_id is not recorded yet when checked, but a request in flight commits it first."""
+
+    def __init__(self, number):
+        super().__init__()
+        self.number = number
+
+    def query(self, *entities):
+        return FakeQuery([self.number] if entities[0] is PhoneNumber else [])
+
+    def execute(self, stmt, *args):
+        self.executed.append(stmt)
+        return SimpleNamespace(all=lambda: [])  # ON CONFLICT DO NOTHING returned no row
+
+
+def test_bulk_report_losing_a_report_id_race_is_answered_as_a_replay(monkeypatch):
+    monkeypatch.setattr(
+        dialer_service.company_registry, "get_by_name", lambda db, name: SimpleNamespace(id=1, name=name)
+    )
+    number = SimpleNamespace(id=7, phone_number="09123456789", global_status=GlobalStatus.ACTIVE)
+    db = RacedReplayDB(number)
+
+    results = dialer_service.report_results(db, [_report(report_id="r-1")])
+
+    assert results == [{"index": 0, "ok": True, "id": 7, "global_status": "ACTIVE", "phone_number": "09123456789"}]
+    call_insert = db.executed[0]
+    assert isinstance(call_insert, Insert) and call_insert.table.name == "call_results"
+    conflict = call_insert._post_values_clause
+    assert [column.key for column in conflict.inferred_target_elements] == ["company_id", "report_id", "attempted_at"]
+    assert str(conflict.inferred_target_whereclause) == "call_results.report_id IS NOT NULL"
+    assert len(db.executed) == 1  # nothing else is written for it
+    assert db.commits == 1
+
+
+class ToggleDB(RacedReplayDB):
+    def execute(self, stmt, *args):
+        self.executed.append(stmt)
+        return SimpleNamespace(all=lambda: [], first=lambda: (1,))
+
+
+def test_bulk_call_allowed_toggles_stay_in_the_request_transaction(monkeypatch):
+    monkeypatch.setattr(
+        dialer_service.company_registry, "get_by_name", lambda db, name: SimpleNamespace(id=1, name=name)
+    )
+    monkeypatch.setattr(dialer_service, "_insert_call_results", lambda db, rows: {i: 100 + i for i in rows})
+    monkeypatch.setattr(dialer_service.number_state_service, "record_calls", lambda db, calls: None)
+    monkeypatch.setattr(dialer_service.dial_queue_service, "drain_many", lambda db, attempts: None)
+    monkeypatch.setattr(dialer_service.dial_queue_service, "enqueue_reported", lambda db, ids, attempts: None)
+    monkeypatch.setattr(dialer_service.wallet_charge_service, "record_charges", lambda db, charges: 0)
+    monkeypatch.setattr(dialer_service, "ensure_config", lambda *a, **k: pytest.fail("ORM config path commits"))
+    number = SimpleNamespace(id=7, phone_number="09123456789", global_status=GlobalStatus.ACTIVE)
+    db = ToggleDB(number)
+
+    dialer_service.report_results(db, [_report(call_allowed=True), _report(call_allowed=False)])
+
+    toggles = [stmt for stmt in db.executed if isinstance(stmt, Update) and stmt.table.name == "schedule_configs"]
+    assert len(toggles) == 1  # the last report per company wins
+    assert db.commits == 1
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Response
+
+from app.api import dialer as dialer_api
+from app.services import dialer_profile_service
+
+
+class ConfigDB:
+    def __init__(self, company):
+        self.company = company
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # the company comes from the fake session rather than the process-wide registry
+    monkeypatch.setattr(dialer_api.company_registry, "require_active", lambda db, name: db.company)
+
+
+def test_etag_matching_follows_if_none_match_rules():
+    assert dialer_api._etag_matches('"1-4"', '"1-4"')
+    assert dialer_api._etag_matches('"0-1", W/"1-4"', '"1-4"')
+    assert dialer_api._etag_matches("*", '"1-4"')
+    assert not dialer_api._etag_matches('"1-3"', '"1-4"')
+    assert not dialer_api._etag_matches(None, '"1-4"')
+
+
+def test_config_returns_304_while_the_profile_version_is_unchanged(monkeypatch):
+    company = SimpleNamespace(id=1, name="acme", profile_version=4)
+    loads = []
+    profile = dialer_profile_service.DialerProfile(
+        version=4, active_scenarios=[], outbound_lines=[], inbound_agents=[], outbound_agents=[], scenario_costs=[]
+    )
+    monkeypatch.setattr(dialer_profile_service, "get_profile", lambda db, c: loads.append(c) or profile)
+
+    response = Response()
+    body = dialer_api.dialer_config(response, company="acme", if_none_match=None, db=ConfigDB(company))
+    assert body["profile_version"] == 4
+    assert response.headers["etag"] == '"1-4"'
+
+    cached = dialer_api.dialer_config(Response(), company="acme", if_none_match='"1-4"', db=ConfigDB(company))
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == '"1-4"'
+    assert len(loads) == 1
+
+    company.profile_version = 5
+    body = dialer_api.dialer_config(Response(), company="acme", if_none_match='"1-4"', db=ConfigDB(company))
+    assert isinstance(body, dict)
+    assert len(loads) == 2
@@ -0,0 +1,92 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import Insert, visitors
+
+from app.models import CallResult, Company
+from app.models.phone_number import CallStatus, GlobalStatus
+from app.schemas.dialer import DialerReport
+from app.services import dialer_service
+
+
+def conflict_target(stmt, table: str) -> tuple[list[str], str]:
+    """ON CONFLICT columns and WHERE of the INSERT INTO `table` inside `stmt`."""
+    insert = next(e for e in visitors.iterate(stmt) if isinstance(e, Insert) and e.table.name == table)
+    clause = insert._post_values_clause
+    return [column.key for column in clause.inferred_target_elements], str(clause.inferred_target_whereclause)
+
+
+class ReplayDB:
+    """Session double where the call_results insert hits the report_id unique index."""
+
+    def __init__(self, number_row):
+        self.number_row = number_row
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        if len(self.statements) == 1:  # number upsert
+            return SimpleNamespace(one_or_none=lambda: self.number_row)
+        return SimpleNamespace(scalar_one_or_none=lambda: None)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_replayed_report_returns_original_response_without_side_effects():
+    number_row = SimpleNamespace(id=7, phone_number="09123456789", global_status=GlobalStatus.ACTIVE)
+    db = ReplayDB(number_row)
+    report = DialerReport(
+        number_id=7,
+        phone_number="09123456789",
+        company="acme",
+        status=CallStatus.CONNECTED,
+        attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        report_id="r-1",
+    )
+
+    result = dialer_service.report_result(db, report, company=SimpleNamespace(id=1))
+
+    assert result == {"id": 7, "global_status": "ACTIVE", "phone_number": "09123456789"}
+    assert len(db.statements) == 2
+    assert conflict_target(db.statements[1], "call_results") == (
+        ["company_id", "report_id", "attempted_at"],
+        "call_results.report_id IS NOT NULL",
+    )
+    # Nothing is kept: the number upsert is rolled back and no charge/trace statement runs.
+    assert db.commits == 0 and db.rollbacks == 1
+
+
+# Against Postgres (TEST_DATABASE_URL).
+
+
+def test_a_report_id_is_applied_once_by_either_endpoint(pg_db, monkeypatch):
+    db = pg_db
+    company = Company(name="acme", display_name="Acme")
+    db.add(company)
+    db.commit()
+    entry = SimpleNamespace(id=company.id, name=company.name)
+    monkeypatch.setattr(dialer_service.company_registry, "get_by_name", lambda db, name: entry)
+
+    def report(report_id):
+        return DialerReport(
+            phone_number="09123456789",
+            company="acme",
+            status=CallStatus.MISSED,
+            attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            report_id=report_id,
+        )
+
+    first = dialer_service.report_result(db, report("r-1"), company=entry)
+    assert dialer_service.report_result(db, report("r-1"), company=entry) == first
+    bulk = dialer_service.report_results(db, [report("r-2"), report("r-1"), report("r-2")])
+
+    assert [r["ok"] for r in bulk] == [True, True, True]
+    calls = db.execute(select(CallResult.report_id, func.count()).group_by(CallResult.report_id)).all()
+    assert sorted(calls) == [("r-1", 1), ("r-2", 1)]
@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import dialer as dialer_api
+from app.core import events
+
+
+class PollDB:
+    def __init__(self, company):
+        self.company = company
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # the company comes from the fake session rather than the process-wide registry
+    monkeypatch.setattr(dialer_api.company_registry, "require_active", lambda db, name: db.company)
+
+
+def _payload(size_returned):
+    return {
+        "call_allowed": True,
+        "schedule_version": 1,
+        "profile_version": 1,
+        "batch": {"batch_id": "b", "size_requested": 10, "size_returned": size_returned, "numbers": []},
+    }
+
+
+def _call(db, wait):
+    return dialer_api.next_batch(
+        company="acme", size=None, active_lines_count=None, slim=True, wait=wait, db=db
+    )
+
+
+def test_waiter_is_woken_by_an_event_for_its_company():
+    async def scenario():
+        with events.subscribe(1) as waiter:
+            events.dispatch("2")
+            assert await waiter.wait(0.05) is False
+            events.dispatch("1")
+            assert await waiter.wait(1) is True
+            events.dispatch(events.ALL_COMPANIES)
+            assert await waiter.wait(1) is True
+        assert 1 not in events._waiters
+
+    asyncio.run(scenario())
+
+
+def test_long_poll_returns_once_an_event_makes_a_batch_possible(monkeypatch):
+    results = [_payload(0), _payload(5)]
+    monkeypatch.setattr(dialer_api.dialer_service, "fetch_next_batch", lambda db, **kwargs: results.pop(0))
+    db = PollDB(SimpleNamespace(id=1))
+
+    async def scenario():
+        task = asyncio.create_task(_call(db, wait=30))
+
+        async def parked():
+            while 1 not in events._waiters and not task.done():
+                await asyncio.sleep(0.01)
+
+        await asyncio.wait_for(parked(), 5)
+        if task.done():
+            task.result()  # surface the failure instead of waiting for a wake-up
+        events.dispatch("1")
+        return await asyncio.wait_for(task, 5)
+
+    response = asyncio.run(scenario())
+    assert response.batch.size_returned == 5
+    assert db.closed == 2  # the connection is released before parking
+
+
+def test_without_wait_the_first_answer_is_returned(monkeypatch):
+    monkeypatch.setattr(dialer_api.dialer_service, "fetch_next_batch", lambda db, **kwargs: _payload(0))
+    response = asyncio.run(_call(PollDB(SimpleNamespace(id=1)), wait=None))
+    assert response.batch.size_returned == 0
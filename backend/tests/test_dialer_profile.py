@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+from app.api import dialer as dialer_api
+from app.models.user import AgentType
+from app.schemas.scenario import RegisterScenariosRequest
+from app.services import company_registry, dialer_profile_service
+
+
+class ProfileQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class ProfileDB:
+    def __init__(self):
+        self.queries = 0
+        self.statements = []
+        self.info = {}
+
+    def query(self, entity):
+        self.queries += 1
+        rows = {
+            "OutboundLine": [SimpleNamespace(id=1, phone_number="02100000000", display_name="Line 1")],
+            "AdminUser": [
+                SimpleNamespace(id=5, first_name="Ali", last_name=None, username="ali", phone_number="0912", agent_type=AgentType.INBOUND),
+                SimpleNamespace(id=6, first_name=None, last_name=None, username="sara", phone_number=None, agent_type=AgentType.BOTH),
+            ],
+            "Scenario": [SimpleNamespace(id=3, name="sales", display_name="Sales", cost_per_connected=200)],
+        }[entity.__name__]
+        return ProfileQuery(rows)
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def test_profile_is_served_from_cache_until_the_version_changes():
+    dialer_profile_service.clear()
+    db = ProfileDB()
+    company = SimpleNamespace(id=1, profile_version=4)
+
+    profile = dialer_profile_service.get_profile(db, company)
+    assert db.queries == 3
+    assert [a["full_name"] for a in profile.inbound_agents] == ["Ali", "sara"]
+    assert [a["id"] for a in profile.outbound_agents] == [6]
+    assert profile.scenario_costs == [200]
+
+    assert dialer_profile_service.get_profile(db, company) is profile
+    assert db.queries == 3
+
+    company.profile_version = 5
+    assert dialer_profile_service.get_profile(db, company).version == 5
+    assert db.queries == 6
+
+
+def test_bump_increments_each_company_once():
+    db = ProfileDB()
+    dialer_profile_service.bump(db, 2, None, 2, 7)
+    sql = str(db.statements[0])
+    assert sql.startswith("UPDATE companies SET profile_version=(companies.profile_version +")
+    # the company registry reloads the new versions after commit, and each company's long-polls re-check
+    assert [str(stmt) for stmt in db.statements[1:]] == ["SELECT pg_notify(:channel, :payload)"] * 3
+    assert db.info == {company_registry._PENDING: True}
+
+    empty = ProfileDB()
+    dialer_profile_service.bump(empty, None)
+    assert empty.statements == []
+
+
+def test_register_scenarios_counts_each_scenario_once_and_bumps_for_cost_backfills(monkeypatch):
+    bumped = []
+    monkeypatch.setattr(dialer_api.company_registry, "require_active", lambda db, name: SimpleNamespace(id=1))
+    monkeypatch.setattr(
+        dialer_api.schedule_service, "ensure_config", lambda db, company_id: SimpleNamespace(cost_per_connected=150)
+    )
+    monkeypatch.setattr(dialer_api.dialer_profile_service, "bump", lambda db, company_id: bumped.append(company_id))
+    renamed = SimpleNamespace(name="sales", display_name="Old", cost_per_connected=None, is_active=True)
+    backfilled = SimpleNamespace(name="support", display_name="Support", cost_per_connected=None, is_active=True)
+    db = SimpleNamespace(
+        query=lambda entity: ProfileQuery([renamed, backfilled]),
+        add=lambda row: None,
+        commit=lambda: None,
+    )
+    payload = RegisterScenariosRequest(
+        company="acme",
+        scenarios=[{"name": "sales", "display_name": "Sales"}, {"name": "support", "display_name": "Support"}],
+    )
+
+    result = dialer_api.register_scenarios(payload, db=db)
+
+    assert result == {"registered": 2, "created": 0, "updated": 1, "deactivated": 0}
+    assert renamed.cost_per_connected == backfilled.cost_per_connected == 150
+    assert bumped == [1]
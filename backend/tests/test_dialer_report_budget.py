@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.models.phone_number import CallStatus, GlobalStatus
+from app.models.user import UserRole
+from app.schemas.dialer import DialerReport
+from app.services import dialer_service
+
+
+class Result:
+    def __init__(self, value=None, rows=(), rowcount=0):
+        self.value = value
+        self.rows = list(rows)
+        self.rowcount = rowcount
+
+    def one_or_none(self):
+        return self.value
+
+    def scalar_one_or_none(self):
+        return self.value
+
+    def first(self):
+        return self.value
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class CountingDB:
+    """Records every statement; answers like a database where nothing matches the trace lookup."""
+
+    def __init__(self, agent, new_number=False):
+        self.agent = agent
+        self.new_number = new_number
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        sql = str(stmt)
+        if sql.startswith("SELECT") and "admin_users" in sql:
+            return Result(rows=[self.agent])
+        if sql.startswith("INSERT INTO numbers"):
+            return Result(
+                SimpleNamespace(id=7, phone_number="09123456789", global_status=GlobalStatus.ACTIVE, inserted=self.new_number)
+            )
+        if sql.startswith("WITH inserted_call AS \n(INSERT INTO call_results"):
+            return Result(101)
+        if sql.startswith("DELETE FROM number_leases"):
+            return Result("batch-1")
+        if sql.startswith("UPDATE dialer_batch_items"):
+            return Result(None)
+        if sql.startswith("UPDATE schedule_configs"):
+            return Result((1,))
+        if sql.startswith("INSERT INTO wallet_charges"):
+            return Result(rowcount=1)
+        return Result()
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_report_result_stays_within_statement_budget_on_worst_case_path():
+    agent = SimpleNamespace(id=5, phone_number="09350000000", role=UserRole.AGENT, is_active=True)
+    db = CountingDB(agent)
+    report = DialerReport(
+        number_id=7,
+        phone_number="09123456789",
+        company="acme",
+        status=CallStatus.CONNECTED,  # billable
+        attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        call_allowed=False,
+        agent_id=5,
+        batch_id="batch-1",
+    )
+
+    result = dialer_service.report_result(db, report, company=SimpleNamespace(id=1))
+
+    assert result["id"] == 7
+    assert len(db.statements) <= dialer_service.REPORT_STATEMENT_BUDGET
+    assert db.commits == 1
+
+
+def test_a_number_first_seen_in_a_report_is_queued_for_the_other_companies():
+    db = CountingDB(agent=None, new_number=True)
+    report = DialerReport(
+        phone_number="09123456789",
+        company="acme",
+        status=CallStatus.NOT_INTERESTED,
+        attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+    dialer_service.report_result(db, report, company=SimpleNamespace(id=1))
+
+    sql = [str(stmt) for stmt in db.statements]
+    assert "xmax = 0" in sql[0]
+    assert not any(s.startswith(("DELETE FROM number_leases", "DELETE FROM company_dial_queue")) for s in sql)
+    enqueue = next(s for s in sql if s.startswith("INSERT INTO company_dial_queue"))
+    assert "bool_or(reported.company_id = companies.id)" in enqueue
+    assert len(sql) <= dialer_service.REPORT_STATEMENT_BUDGET
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert, Update, visitors
+from sqlalchemy.sql.selectable import CTE
+
+from app.models import Company, CompanyDialQueue, NumberLease, PhoneNumber
+from app.services import dialer_service
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def reservation(company_id=1, batch_id="abc", requested_size=40, now_utc=NOW):
+    return dialer_service._build_reservation_stmt(
+        company_id=company_id, batch_id=batch_id, requested_size=requested_size, now_utc=now_utc
+    )
+
+
+def ctes(stmt) -> dict:
+    return {element.name: element.element for element in visitors.iterate(stmt) if isinstance(element, CTE)}
+
+
+def test_reservation_locks_queue_rows_and_claims_leases_in_one_statement():
+    parts = ctes(reservation())
+
+    candidates = parts["candidates"]
+    assert [table.name for table in candidates._for_update_arg.of] == ["company_dial_queue"]
+    assert candidates._for_update_arg.skip_locked is True
+    assert candidates._limit == 40
+
+    claimed = parts["claimed"]
+    assert isinstance(claimed, Insert) and claimed.table.name == "number_leases"
+    assert [column.key for column in claimed._post_values_clause.inferred_target_elements] == ["number_id"]
+    assert {parts["items"].table.name, parts["batch"].table.name} == {"dialer_batch_items", "dialer_batches"}
+
+
+def test_reservation_reads_the_dial_queue_and_never_writes_numbers():
+    stmt = reservation()
+    elements = list(visitors.iterate(stmt))
+
+    tables = {element.name for element in elements if isinstance(element, Table)}
+    assert "company_dial_queue" in tables and "call_results" not in tables
+    assert not any(isinstance(element, Update) for element in elements)
+    written = {element.table.name for element in elements if isinstance(element, Insert)}
+    assert written == {"number_leases", "dialer_batch_items", "dialer_batches"}
+
+
+# Against Postgres (TEST_DATABASE_URL).
+
+
+def queue_numbers(db, company, count):
+    numbers = [PhoneNumber(phone_number=f"0912{i:07d}") for i in range(count)]
+    db.add_all(numbers)
+    db.flush()
+    db.add_all(
+        CompanyDialQueue(company_id=company.id, number_id=n.id, eligible_at=NOW - timedelta(minutes=1)) for n in numbers
+    )
+    db.commit()
+    return {n.id for n in numbers}
+
+
+def test_concurrent_reservations_never_hand_out_the_same_number(pg_engine):
+    with Session(pg_engine) as setup:
+        company = Company(name="a", display_name="A")
+        setup.add(company)
+        setup.flush()
+        queued = queue_numbers(setup, company, 5)
+        company_id = company.id
+
+    with Session(pg_engine) as first, Session(pg_engine) as second:
+        # The first poll holds its queue rows locked; the second skips them instead of waiting.
+        first_ids = {row.id for row in first.execute(reservation(company_id, "b1", 3)).all()}
+        second_ids = {row.id for row in second.execute(reservation(company_id, "b2", 3)).all()}
+        first.commit()
+        second.commit()
+
+    assert len(first_ids) == 3 and len(second_ids) == 2
+    assert first_ids | second_ids == queued and not first_ids & second_ids
+
+    with Session(pg_engine) as db:
+        assert db.execute(select(func.count()).select_from(NumberLease)).scalar() == 5
+        assert db.execute(reservation(company_id, "b3", 3)).all() == []  # everything is leased
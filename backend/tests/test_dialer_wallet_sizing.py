@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+from app.services import dialer_service
+
+
+class RatioDB:
+    def __init__(self, billable, total):
+        self.row = (billable, total)
+        self.queries = 0
+
+    def execute(self, stmt):
+        self.queries += 1
+        row = self.row
+        return SimpleNamespace(one=lambda: row)
+
+
+def _config(cost=100, balance=2000):
+    return SimpleNamespace(cost_per_connected=cost, wallet_balance=balance)
+
+
+def test_batch_is_capped_by_affordable_billable_calls(monkeypatch):
+    monkeypatch.setattr(dialer_service, "available_balance", lambda db, company_id, balance: balance)
+    monkeypatch.setattr(dialer_service, "_billable_ratio", lambda db, company_id: 0.25)
+
+    # 2000 / 200 (priciest active scenario) = 10 billable calls, at 1 in 4 billable -> 40 numbers
+    assert dialer_service._affordable_batch_size(None, 1, _config(), [None, 200]) == 40
+
+
+def test_free_calls_and_empty_wallets(monkeypatch):
+    monkeypatch.setattr(dialer_service, "available_balance", lambda db, company_id, balance: balance)
+    monkeypatch.setattr(dialer_service, "_billable_ratio", lambda db, company_id: 1.0)
+
+    assert dialer_service._affordable_batch_size(None, 1, _config(cost=0), []) is None
+    assert dialer_service._affordable_batch_size(None, 1, _config(balance=0), []) == 0
+    # Less than one call left still lets the last call through.
+    assert dialer_service._affordable_batch_size(None, 1, _config(balance=30), []) == 1
+
+
+def test_billable_ratio_needs_a_sample_and_is_cached(monkeypatch):
+    monkeypatch.setattr(dialer_service, "_billable_ratio_cache", {})
+
+    small = RatioDB(billable=1, total=dialer_service.BILLABLE_RATIO_MIN_SAMPLE - 1)
+    assert dialer_service._billable_ratio(small, company_id=1) == 1.0
+
+    db = RatioDB(billable=30, total=120)
+    assert dialer_service._billable_ratio(db, company_id=2) == 0.25
+    assert dialer_service._billable_ratio(db, company_id=2) == 0.25
+    assert db.queries == 1
+
+    silent = RatioDB(billable=0, total=500)
+    assert dialer_service._billable_ratio(silent, company_id=3) == dialer_service.BILLABLE_RATIO_FLOOR
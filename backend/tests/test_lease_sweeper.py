@@ -0,0 +1,69 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from app.core import metrics
+from app.services import dialer_service
+
+
+class FakeDB:
+    def __init__(self, rowcounts):
+        self.rowcounts = list(rowcounts)
+        self.statements = []
+        self.commits = 0
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(rowcount=self.rowcounts.pop(0))
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_release_expired_leases_deletes_in_chunks_until_short_chunk():
+    db = FakeDB([100, 100, 7])
+    assert dialer_service.release_expired_leases(db, chunk_size=100) == 207
+    assert db.commits == 3
+    assert all(str(stmt).startswith("DELETE FROM number_leases") for stmt in db.statements)
+
+
+def test_sweep_skips_when_another_worker_holds_the_lock(monkeypatch):
+    @contextmanager
+    def held_elsewhere(name):
+        yield None
+
+    called = []
+    metrics.reset()
+    monkeypatch.setattr(dialer_service, "advisory_lock", held_elsewhere)
+    monkeypatch.setattr(dialer_service, "release_expired_leases", lambda db: called.append(db))
+
+    dialer_service.sweep_expired_leases()
+
+    assert called == []
+    assert metrics.snapshot()["counters"]["lease_sweeper.skipped_locked"] == 1
+
+
+
+def test_heartbeat_extends_only_this_company_batch():
+    db = FakeDB([12])
+    result = dialer_service.heartbeat_batch(db, "batch-1", company=SimpleNamespace(id=3))
+    assert result["extended"] == 12
+    assert db.commits == 1
+    sql = str(db.statements[0])
+    assert sql.startswith("UPDATE number_leases SET expires_at")
+    assert "number_leases.batch_id" in sql and "number_leases.company_id" in sql
+
+
+def test_release_with_empty_selection_is_a_noop():
+    db = FakeDB([])
+    result = dialer_service.release_batch(db, "batch-1", company=SimpleNamespace(id=3), number_ids=[])
+    assert result == {"batch_id": "batch-1", "released": 0}
+    assert db.statements == []
+
+
+def test_release_selected_numbers():
+    db = FakeDB([2, 1])
+    result = dialer_service.release_batch(db, "batch-1", company=SimpleNamespace(id=3), number_ids=[5, 6])
+    assert result["released"] == 2
+    assert "number_leases.number_id IN" in str(db.statements[0])
+    # Long-polling dialers of the company are woken on commit.
+    assert "pg_notify" in str(db.statements[1])
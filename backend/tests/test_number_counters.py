@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.models.phone_number import CallStatus, GlobalStatus, PhoneNumber
+from app.services import number_counter_service, phone_service
+
+ADMIN = SimpleNamespace(is_superuser=True)
+
+
+def use_company(monkeypatch, company_id):
+    monkeypatch.setattr(phone_service, "_resolve_company_id", lambda db, user, name: company_id)
+
+
+def fake_counters(monkeypatch, totals, called):
+    monkeypatch.setattr(
+        number_counter_service,
+        "total",
+        lambda db, global_status=None: totals[global_status.value] if global_status else sum(totals.values()),
+    )
+    monkeypatch.setattr(number_counter_service, "called", lambda db, company_id: called[company_id])
+
+
+def test_unfiltered_and_queued_totals_come_from_the_counters(monkeypatch):
+    fake_counters(monkeypatch, {"ACTIVE": 900, "POWER_OFF": 60, "COMPLAINED": 40}, {3: 250})
+    db = SimpleNamespace()  # any query on it would fail
+
+    use_company(monkeypatch, None)
+    assert phone_service.count_numbers(db, ADMIN) == (1000, False)
+    assert phone_service.count_numbers(db, ADMIN, global_status=GlobalStatus.POWER_OFF) == (60, False)
+
+    use_company(monkeypatch, 3)
+    assert phone_service.count_numbers(db, ADMIN, status=CallStatus.IN_QUEUE) == (750, False)
+
+
+def test_estimate_explains_the_filtered_select_without_counting(monkeypatch):
+    use_company(monkeypatch, 3)
+    monkeypatch.setattr(phone_service.settings, "numbers_count_estimate_min_rows", 50000)
+    explained = []
+
+    def planner_rows(db, stmt):
+        explained.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return 2_000_000
+
+    monkeypatch.setattr(number_counter_service, "planner_rows", planner_rows)
+
+    total = phone_service.count_numbers(Session(), ADMIN, status=CallStatus.MISSED, estimate=True)
+
+    assert total == (2_000_000, True)
+    assert explained[0].startswith("SELECT numbers.id \nFROM numbers LEFT OUTER JOIN company_number_state")
+    assert "count(" not in explained[0]
+
+
+def test_planner_rows_explains_through_the_session_with_expanded_binds():
+    executed = []
+
+    def execute(stmt):
+        executed.append(stmt)
+        return SimpleNamespace(scalar=lambda: [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 1234.0}}])
+
+    db = SimpleNamespace(execute=execute)
+    stmt = select(PhoneNumber.id).where(
+        PhoneNumber.global_status.in_([GlobalStatus.ACTIVE, GlobalStatus.POWER_OFF])
+    )
+
+    assert number_counter_service.planner_rows(db, stmt) == 1234
+    compiled = executed[0].compile(dialect=postgresql.dialect(), compile_kwargs={"render_postcompile": True})
+    assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT numbers.id")
+    assert list(compiled.params.values()) == [GlobalStatus.ACTIVE, GlobalStatus.POWER_OFF]
@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.call_result import CallResult
+from app.models.phone_number import CallStatus, PhoneNumber
+from app.services import number_state_service, phone_service
+
+
+def pg(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class RecordingDB:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def test_calls_of_one_pair_are_folded_into_one_upsert_row():
+    db = RecordingDB()
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    number_state_service.record_calls(
+        db,
+        [
+            (1, 7, 12, "BUSY", at, None),
+            (1, 7, 10, "MISSED", at, None),
+            (2, 7, 11, "CONNECTED", at, 5),
+        ],
+    )
+
+    assert len(db.statements) == 1
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (company_id, number_id) DO UPDATE" in str(compiled)
+    rows: dict[str, dict] = {}
+    for key, value in compiled.params.items():
+        name, row = key.rsplit("_", 1)
+        rows.setdefault(row, {})[name] = value
+    assert sorted(
+        (r["company_id"], r["latest_call_id"], r["latest_status"], r["total_attempts"]) for r in rows.values()
+    ) == [(1, 12, "BUSY", 2), (2, 11, "CONNECTED", 1)]
+
+
+def test_report_insert_and_state_upsert_are_one_statement():
+    call_insert = (
+        insert(CallResult)
+        .values(
+            phone_number_id=7,
+            company_id=1,
+            status="MISSED",
+            attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+            report_id="r-1",
+        )
+        .on_conflict_do_nothing(
+            index_elements=[CallResult.company_id, CallResult.report_id, CallResult.attempted_at],
+            index_where=CallResult.report_id.is_not(None),
+        )
+    )
+
+    sql = pg(number_state_service.record_call_stmt(call_insert))
+
+    assert sql.startswith("WITH inserted_call AS \n(INSERT INTO call_results")
+    assert "INSERT INTO company_number_state" in sql
+    # An older call landing late never overwrites the latest one.
+    assert "greatest(company_number_state.latest_call_id, excluded.latest_call_id)" in sql
+    assert "RETURNING (SELECT inserted_call.id" in sql
+
+
+def test_numbers_page_filters_read_the_state_table_not_call_results():
+    db = Session()
+
+    queued = phone_service._apply_latest_call_filters(
+        db.query(func.count(PhoneNumber.id)),
+        status=CallStatus.IN_QUEUE,
+        target_company_id=3,
+        agent_id=None,
+        db=db,
+    )
+    mutable = phone_service._build_query(
+        db,
+        current_user=SimpleNamespace(is_superuser=False),
+        select_all=True,
+        ids=[],
+        filter_status=CallStatus.MISSED,
+        filter_global_status=None,
+        search=None,
+        excluded_ids=[],
+        target_company_id=3,
+        agent_id=4,
+        require_mutable=True,
+        join_state=True,
+    ).order_by(phone_service._sort_column("total_attempts", 3))
+
+    for query in (queued, mutable):
+        sql = pg(query.statement)
+        assert "call_results" not in sql
+        assert sql.count("LEFT OUTER JOIN company_number_state") == 1
+    assert "company_number_state.number_id IS NULL" in pg(queued.statement)
@@ -2,7 +2,7 @@ from datetime import time, datetime
 from zoneinfo import ZoneInfo
 
 from app.services.phone_service import normalize_phone
-from app.services.schedule_service import _next_start, TEHRAN_TZ
+from app.services.schedule_service import CompiledSchedule, TEHRAN_TZ
 from app.models.schedule import ScheduleWindow
 
 
@@ -21,6 +21,6 @@ def test_normalize_phone_rejects_invalid_numbers():
 def test_next_start_rolls_over_week():
     now = datetime(2024, 1, 1, 23, 0, tzinfo=TEHRAN_TZ)
     intervals = [ScheduleWindow(day_of_week=1, start_time=time(9, 0), end_time=time(10, 0))]
-    nxt = _next_start(now, intervals)
+    nxt = CompiledSchedule.from_windows(intervals).next_opening(now)
     assert nxt.tzinfo == TEHRAN_TZ
-    assert nxt.date() >= now.date()
+    assert nxt == datetime(2024, 1, 7, 9, 0, tzinfo=TEHRAN_TZ)
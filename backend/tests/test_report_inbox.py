@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi import Response
+
+from app.api import dialer as dialer_api
+from app.models.phone_number import CallStatus
+from app.schemas.dialer import DialerReport
+from app.services import report_inbox_service
+
+
+def _report(phone="09123456789"):
+    return DialerReport(
+        phone_number=phone,
+        company="acme",
+        status=CallStatus.MISSED,
+        attempted_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+def test_async_mode_accepts_report_with_202(monkeypatch):
+    monkeypatch.setattr(report_inbox_service.settings, "report_ingest_mode", "async")
+    monkeypatch.setattr(report_inbox_service, "enqueue", lambda db, reports: [41])
+    response = Response()
+    body = dialer_api.report_result(_report(), response, db=object())
+    assert response.status_code == 202
+    assert body == {"accepted": True, "inbox_id": 41}
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def with_for_update(self, **kwargs):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.commits = 0
+
+    def query(self, *entities):
+        return FakeQuery(self.rows)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_process_company_applies_rows_in_order_and_keeps_item_errors(monkeypatch):
+    rows = [
+        SimpleNamespace(id=10, payload=_report("09120000001").model_dump(mode="json"), processed_at=None, attempts=0, error=None),
+        SimpleNamespace(id=11, payload=_report("09120000002").model_dump(mode="json"), processed_at=None, attempts=0, error=None),
+    ]
+    seen = []
+
+    def fake_report_results(db, reports):
+        seen.extend(r.phone_number for r in reports)
+        return [{"index": 0, "ok": True}, {"index": 1, "ok": False, "error": "Agent is inactive"}]
+
+    monkeypatch.setattr(report_inbox_service.dialer_service, "report_results", fake_report_results)
+    db = FakeDB(rows)
+
+    assert report_inbox_service.process_company(db, "acme", batch_size=10) == 2
+    assert seen == ["09120000001", "09120000002"]
+    assert all(row.processed_at is not None and row.attempts == 1 for row in rows)
+    assert rows[0].error is None
+    assert rows[1].error == "Agent is inactive"
@@ -0,0 +1,99 @@
+from datetime import datetime, time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import schedule_service
+
+TZ = schedule_service.TEHRAN_TZ
+SATURDAY = datetime(2026, 10, 17, tzinfo=TZ)
+
+
+def window(day, start, end):
+    return SimpleNamespace(day_of_week=day, start_time=start, end_time=end)
+
+
+@pytest.fixture
+def schedule(monkeypatch):
+    """Company 1 with Saturday 08:00-12:00 + 11:00-14:00 (merged) and Monday 09:00-10:00."""
+    calls = []
+    windows = [
+        window(0, time(8, 0), time(12, 0)),
+        window(0, time(11, 0), time(14, 0)),
+        window(2, time(9, 0), time(10, 0)),
+    ]
+    config = SimpleNamespace(wallet_balance=1000, enabled=True, skip_holidays=False, disabled_by_dialer=False, version=1)
+
+    def list_intervals(_db, company_id=None):
+        calls.append(company_id)
+        return windows
+
+    monkeypatch.setattr(schedule_service, "_compiled_cache", {})
+    monkeypatch.setattr(schedule_service, "ensure_config", lambda _db, company_id=None: config)
+    monkeypatch.setattr(schedule_service, "list_intervals", list_intervals)
+    monkeypatch.setattr(schedule_service, "pending_total", lambda _db, company_id: 0)
+    monkeypatch.setattr(schedule_service, "is_holiday", lambda _now: False)
+    return SimpleNamespace(config=config, calls=calls)
+
+
+def test_compile_merges_overlapping_windows():
+    compiled = schedule_service.CompiledSchedule.from_windows(
+        [window(0, time(11, 0), time(14, 0)), window(0, time(8, 0), time(12, 0))]
+    )
+    assert compiled.starts == (8 * 3600,)
+    assert compiled.ends == (14 * 3600,)
+
+
+def test_allowed_inside_window_reports_when_it_closes(schedule):
+    decision = schedule_service.evaluate_schedule(SATURDAY.replace(hour=13), None, company_id=1)
+
+    assert decision.allowed is True
+    assert decision.window_closes_in_seconds == 3600
+
+
+def test_outside_window_retries_exactly_when_it_opens(schedule):
+    decision = schedule_service.evaluate_schedule(SATURDAY.replace(hour=7, minute=50), None, company_id=1)
+
+    assert decision.allowed is False
+    assert decision.reason == "outside_allowed_time_window"
+    assert decision.retry_after_seconds == 600
+
+
+def test_retry_hint_is_capped_by_long_retry(schedule):
+    # Sunday has no window; the next one opens on Monday 09:00.
+    decision = schedule_service.evaluate_schedule(SATURDAY.replace(day=18, hour=12), None, company_id=1)
+
+    assert decision.reason == "no_window"
+    assert decision.retry_after_seconds == schedule_service.settings.long_retry_seconds
+
+
+def test_next_opening_skips_holidays_and_wraps_the_week(monkeypatch, schedule):
+    compiled = schedule_service.CompiledSchedule.from_windows([window(0, time(8, 0), time(9, 0))])
+    monkeypatch.setattr(schedule_service, "is_holiday", lambda value: value.day == 24)
+
+    assert compiled.next_opening(SATURDAY.replace(hour=10)) == datetime(2026, 10, 24, 8, 0, tzinfo=TZ)
+    assert compiled.next_opening(SATURDAY.replace(hour=10), skip_holidays=True) == datetime(2026, 10, 31, 8, 0, tzinfo=TZ)
+
+
+def test_windows_are_queried_once_per_schedule_version(schedule):
+    for minute in (0, 1, 2):
+        schedule_service.evaluate_schedule(SATURDAY.replace(hour=9, minute=minute), None, company_id=1)
+    assert schedule.calls == [1]
+
+    schedule.config.version += 1
+    schedule_service.evaluate_schedule(SATURDAY.replace(hour=9), None, company_id=1)
+    assert schedule.calls == [1, 1]
+
+
+def test_ensure_config_reads_the_row_without_catalog_checks():
+    config = SimpleNamespace(enabled=True, cost_per_connected=150, wallet_balance=0)
+    queried = []
+
+    class QueryOnlyDB:
+        # No connection(): any schema introspection would fail here.
+        def query(self, model):
+            queried.append(model)
+            return SimpleNamespace(filter_by=lambda **_kw: SimpleNamespace(first=lambda: config))
+
+    assert schedule_service.ensure_config(QueryOnlyDB(), company_id=1) is config
+    assert queried == [schedule_service.ScheduleConfig]
@@ -0,0 +1,46 @@
+import pytest
+
+from app.core import schema_check
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    monkeypatch.setattr(schema_check, "_status", None)
+    monkeypatch.setattr(schema_check, "expected_head", lambda: "0019")
+    reads = []
+
+    def current_revision():
+        reads.append(1)
+        return "0018"
+
+    monkeypatch.setattr(schema_check, "current_revision", current_revision)
+    return reads
+
+
+def test_shipped_head_is_read_from_the_migration_files():
+    head = schema_check.expected_head.__wrapped__()
+    assert (schema_check.SCRIPT_LOCATION / "versions" / f"{head}.py").exists()
+
+
+def test_mismatch_is_logged_once_per_process(monkeypatch, fresh):
+    monkeypatch.setattr(schema_check.settings, "schema_check", "warn")
+
+    first = schema_check.check_schema()
+    second = schema_check.check_schema()
+
+    assert first is second and not first.ok
+    assert fresh == [1]
+
+
+def test_strict_mode_refuses_to_start(monkeypatch, fresh):
+    monkeypatch.setattr(schema_check.settings, "schema_check", "strict")
+
+    with pytest.raises(RuntimeError, match="alembic upgrade head"):
+        schema_check.check_schema()
+
+
+def test_off_skips_the_query(monkeypatch, fresh):
+    monkeypatch.setattr(schema_check.settings, "schema_check", "off")
+
+    assert schema_check.check_schema().ok
+    assert fresh == []
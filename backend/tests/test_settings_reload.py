@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from app.core import config
+from app.core.cors import ReloadableCORSMiddleware
+from app.services import wallet_service
+
+
+@pytest.fixture
+def fresh_settings(monkeypatch):
+    """A private settings object and hook list; the process-wide ones are restored afterwards."""
+    monkeypatch.setattr(config, "_settings", None)
+    monkeypatch.setattr(config, "_reload_hooks", [])
+
+
+def test_settings_are_parsed_once_per_process_under_load(monkeypatch, fresh_settings):
+    parsed = []
+    real = config.Settings
+
+    def counting_settings():
+        parsed.append(1)
+        time.sleep(0.01)  # widen the race window
+        return real()
+
+    monkeypatch.setattr(config, "Settings", counting_settings)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda _: config.get_settings(), range(2000)))
+
+    assert parsed == [1]
+    assert all(result is results[0] for result in results)
+
+
+def test_reload_updates_the_shared_object_in_place_and_runs_hooks(monkeypatch, fresh_settings):
+    current = config.get_settings()
+    seen = []
+    config.on_reload(seen.append)
+    monkeypatch.setenv("CALL_COOLDOWN_DAYS", str(current.call_cooldown_days + 4))
+    monkeypatch.setenv("DATABASE_URL", "postgresql://elsewhere/db")
+
+    changed = config.reload_settings()
+
+    assert changed == ["call_cooldown_days"]  # database_url needs a restart
+    assert config.get_settings() is current
+    assert current.call_cooldown_days == config.Settings().call_cooldown_days
+    assert current.database_url != "postgresql://elsewhere/db"
+    assert seen == [current]
+
+
+def test_cors_origins_follow_a_reload(monkeypatch, fresh_settings):
+    cors = ReloadableCORSMiddleware(app=None, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+    assert not cors.is_allowed_origin("https://panel.example.com")
+
+    monkeypatch.setenv("CORS_ORIGINS", '["https://panel.example.com"]')
+    config.reload_settings()
+
+    assert cors.is_allowed_origin("https://panel.example.com")
+    assert cors.simple_headers["Access-Control-Allow-Credentials"] == "true"
+
+
+def test_bank_profiles_are_rebuilt_only_after_a_reload(monkeypatch):
+    built = []
+    monkeypatch.setattr(wallet_service, "_bank_profiles", None)
+    monkeypatch.setattr(wallet_service, "_build_bank_profiles", lambda: built.append(1) or [])
+
+    wallet_service._resolve_profile_by_sender("30008528")
+    wallet_service._resolve_profile_by_sender("30008528")
+    assert built == [1]
+
+    wallet_service._reset_bank_profiles(config.get_settings())
+    wallet_service._resolve_profile_by_sender("30008528")
+    assert built == [1, 1]
@@ -0,0 +1,90 @@
+import threading
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import events, metrics
+from app.services import stats_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    stats_cache.clear()
+    metrics.reset()
+    monkeypatch.setattr(stats_cache.settings, "stats_cache_ttl_seconds", 15)
+    monkeypatch.setattr(stats_cache.settings, "stats_cache_closed_ttl_seconds", 3600)
+    monkeypatch.setattr(stats_cache.settings, "stats_cache_size", 100)
+    monkeypatch.setattr(events, "publish", lambda db, channel, payload: None)
+    yield
+    stats_cache.clear()
+
+
+def counter(name):
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_identical_requests_are_served_from_one_computation():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total": 3}
+
+    first = stats_cache.get("costs", 1, {}, compute)
+    second = stats_cache.get("costs", 1, {}, compute)
+    other = stats_cache.get("costs", 2, {}, compute)
+
+    assert first == second == other == {"total": 3}
+    assert len(calls) == 2
+    assert (counter("stats_cache.hits"), counter("stats_cache.misses")) == (1, 2)
+
+
+def test_concurrent_misses_wait_for_the_running_computation():
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(stats_cache.get("dashboard-stats", 1, {"f": "7d"}, compute)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for _ in range(500):  # at most 5s for the other three to park
+        if counter("stats_cache.coalesced") == 3:
+            break
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["result"] * 4
+    assert len(calls) == 1
+
+
+def test_a_late_report_drops_the_company_and_all_company_results():
+    db = SimpleNamespace()
+    for company_id in (1, 2, None):
+        stats_cache.get("dashboard-stats", company_id, {}, lambda: "old", closed_day=date(2026, 1, 1))
+
+    stats_cache.invalidate(db, {1})
+
+    def recompute(company_id):
+        return stats_cache.get("dashboard-stats", company_id, {}, lambda: "new", closed_day=date(2026, 1, 1))
+
+    assert [recompute(1), recompute(2), recompute(None)] == ["new", "old", "new"]
+
+
+def test_a_result_computed_across_an_invalidation_is_not_kept():
+    def compute():
+        stats_cache._drop("1")  # a late report for company 1 is rolled up meanwhile
+        return "stale"
+
+    assert stats_cache.get("numbers-summary", 1, {}, compute) == "stale"
+    assert stats_cache.get("numbers-summary", 1, {}, lambda: "fresh") == "fresh"
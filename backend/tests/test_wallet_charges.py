@@ -0,0 +1,119 @@
+from datetime import datetime, time
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.api import companies as companies_api
+from app.schemas.company import CompanyDeleteRequest
+from app.services import schedule_service, wallet_charge_service
+
+
+class FakeDB:
+    def __init__(self, rowcount=0, row=None):
+        self.statements = []
+        self.rowcount = rowcount
+        self.row = row
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        row = self.row
+        return SimpleNamespace(rowcount=self.rowcount, first=lambda: row)
+
+    def commit(self):
+        pass
+
+    def refresh(self, _obj):
+        pass
+
+
+def test_record_charges_is_one_ledger_insert_without_touching_the_config_row(monkeypatch):
+    monkeypatch.setattr(wallet_charge_service, "_note_recorded", lambda count: None)
+    db = FakeDB(rowcount=2)
+
+    recorded = wallet_charge_service.record_charges(db, [(1, 10, None), (1, 11, 7)])
+
+    assert recorded == 2
+    assert len(db.statements) == 1
+    sql = str(db.statements[0])
+    assert sql.startswith("INSERT INTO wallet_charges")
+    assert "UPDATE schedule_configs" not in sql and "FOR UPDATE" not in sql
+
+
+def test_record_charges_without_billable_calls_is_a_noop():
+    db = FakeDB()
+    assert wallet_charge_service.record_charges(db, []) == 0
+    assert db.statements == []
+
+
+def test_settler_is_woken_after_max_pending_charges(monkeypatch):
+    woken = []
+    monkeypatch.setattr(wallet_charge_service.settings, "wallet_settle_max_pending", 3)
+    monkeypatch.setattr(wallet_charge_service, "_recorded_since_settle", 0)
+    monkeypatch.setattr(wallet_charge_service.jobs, "wake_job", woken.append)
+
+    wallet_charge_service._note_recorded(2)
+    assert woken == []
+    wallet_charge_service._note_recorded(1)
+    assert woken == [wallet_charge_service.SETTLER_JOB]
+
+
+def test_settle_company_folds_a_locked_chunk_in_one_statement():
+    db = FakeDB(row=(4,))
+
+    assert wallet_charge_service.settle_company(db, 1, chunk_size=100) == 4
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH settled AS")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "UPDATE schedule_configs SET" in sql
+
+
+def test_pending_charges_count_against_the_balance_check(monkeypatch):
+    now = datetime.now(schedule_service.TEHRAN_TZ)
+    interval = SimpleNamespace(day_of_week=schedule_service._iran_weekday(now), start_time=time(0, 0), end_time=time(23, 59))
+    config = SimpleNamespace(wallet_balance=300, enabled=True, skip_holidays=False, disabled_by_dialer=False, version=1)
+    monkeypatch.setattr(schedule_service, "ensure_config", lambda _db, company_id=None: config)
+    monkeypatch.setattr(schedule_service, "list_intervals", lambda _db, company_id=None: [interval])
+    monkeypatch.setattr(schedule_service, "pending_total", lambda _db, company_id: 300)
+
+    allowed, reason, _ = schedule_service.is_call_allowed(now, FakeDB(), company_id=1)
+
+    assert allowed is False
+    assert reason == "insufficient_funds"
+    assert config.enabled is False and config.disabled_by_dialer is True
+    assert config.wallet_balance == 300  # nothing settled yet; only dialing is stopped
+
+
+def test_deleting_a_company_clears_its_charge_ledger_first():
+    class CleanupDB:
+        def __init__(self, company):
+            self.company = company
+            self.info = {}
+            self.log = []
+
+        def query(self, *entities):
+            model = getattr(entities[0], "class_", entities[0])
+            db = self
+            return SimpleNamespace(
+                filter=lambda *_a: SimpleNamespace(
+                    first=lambda: db.company,
+                    all=lambda: [],
+                    delete=lambda **_k: db.log.append(("delete", model.__name__)),
+                    update=lambda *_a, **_k: db.log.append(("update", model.__name__)),
+                )
+            )
+
+        def delete(self, obj):
+            self.log.append(("delete", "Company"))
+
+        def execute(self, _stmt):
+            return SimpleNamespace(scalar=lambda: 0)
+
+        def commit(self):
+            self.log.append(("commit", None))
+
+    db = CleanupDB(SimpleNamespace(id=3, name="acme"))
+
+    companies_api.delete_company(3, CompanyDeleteRequest(confirm_name="acme"), db=db, _=None)
+
+    assert db.log.index(("delete", "WalletCharge")) < db.log.index(("delete", "Company"))
@@ -124,6 +124,7 @@ const NumbersPage = () => {
   const pageSize = 50
   const [hasMore, setHasMore] = useState(false)
   const [totalCount, setTotalCount] = useState(0)
+  const [totalEstimated, setTotalEstimated] = useState(false)
 
   const [selectedIds, setSelectedIds] = useState<Set<number>>(new Set())
   const [excludedIds, setExcludedIds] = useState<Set<number>>(new Set())
@@ -211,7 +212,7 @@ const NumbersPage = () => {
   }
 
   const fetchStats = async () => {
-    const { data } = await client.get<{ total: number }>('/api/numbers/stats', {
+    const { data } = await client.get<{ total: number; estimated: boolean }>('/api/numbers/stats', {
       params: {
         company: company?.name || undefined,
         status: statusFilter || undefined,
@@ -219,9 +220,11 @@ const NumbersPage = () => {
         search: search || undefined,
         start_date: startDateIso,
         end_date: endDateIso,
+        estimate: true,
       },
     })
     setTotalCount(data.total)
+    setTotalEstimated(data.estimated)
   }
 
   useEffect(() => {
@@ -683,7 +686,7 @@ const NumbersPage = () => {
         </div>
         <div className="flex flex-wrap items-center gap-3 mb-3">
           <div className="text-xs text-slate-600">
-            تعداد فیلترشده: <strong className="text-slate-900">{totalCount.toLocaleString()}</strong>
+            تعداد فیلترشده: <strong className="text-slate-900">{totalEstimated ? '~' : ''}{totalCount.toLocaleString()}</strong>
           </div>
           {isAdmin && (
             <div className="flex flex-wrap items-center gap-2 w-full">